@@ -1,50 +1,65 @@
 import os
 import logging
-from flask import Flask, render_template, request, jsonify, session
+import json
+from flask import Flask, render_template, request, jsonify, session, Response, stream_with_context
 from flask_cors import CORS
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_socketio import SocketIO
 from datetime import datetime
 import uuid
-from chat_handler import ChatHandler
+from chat_service import get_chat_service
+from assets import register_assets
+from health import get_health_sampler, register_health_routes
+from shared_backends import limiter_storage_uri, socketio_queue_options
+from logging_setup import configure_logging
+import tracing
+import quota
+from metrics import MESSAGES_RECEIVED, TRIVIA_GAMES_ACTIVE, register_metrics_route
 
 # Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('app.log')
-    ]
-)
+configure_logging('web', 'app.log')
 logger = logging.getLogger(__name__)
 
 # Initialize Flask app
 app = Flask(__name__)
 app.config['SECRET_KEY'] = os.environ.get("FLASK_SECRET_KEY", "octant-chat-secret")
 CORS(app)
+register_assets(app)
 
 # Initialize SocketIO
-socketio = SocketIO(app, cors_allowed_origins="*")
+# A message queue lets several web workers emit to each other's clients
+socketio = SocketIO(app, cors_allowed_origins="*", **socketio_queue_options())
 # Initialize rate limiter
 limiter = Limiter(
     app=app,
     key_func=get_remote_address,
     default_limits=["200 per day", "50 per hour"],
-    storage_uri="memory://"
+    storage_uri=limiter_storage_uri()
 )
 
-# Initialize chat handler
+# Initialize the chat service shared by the HTTP and Socket.IO transports
 try:
-    chat_handler = ChatHandler()
+    chat_service = get_chat_service()
 except Exception as e:
-    logger.error(f"Failed to initialize ChatHandler: {e}")
-    chat_handler = None
+    logger.error(f"Failed to initialize chat service: {e}")
+    chat_service = None
+
+# Asset, probe and scrape requests are too frequent and uninteresting to log
+UNLOGGED_PREFIXES = ('/static', '/assets', '/health', '/livez', '/readyz', '/metrics')
+
+register_health_routes(app, get_health_sampler(), checks={
+    'chat_service': lambda: chat_service is not None
+})
+
+# Scrapers poll often, so /metrics must not count against the rate limits
+limiter.exempt(register_metrics_route(app))
+if chat_service:
+    TRIVIA_GAMES_ACTIVE.labels('web').set_function(lambda: len(chat_service.handler.trivia_games))
 
 @app.before_request
 def log_request_info():
-    if not request.path.startswith('/static'):
+    if not request.path.startswith(UNLOGGED_PREFIXES):
         logger.info(f'Request: {request.method} {request.path} from {request.remote_addr}')
 
 @app.route('/')
@@ -66,8 +81,8 @@ def chat():
             logger.warning("Missing message in request data")
             return jsonify({"error": "Message is required"}), 400
             
-        if not chat_handler:
-            logger.error("Chat handler not initialized")
+        if not chat_service:
+            logger.error("Chat service not initialized")
             return jsonify({"error": "Chat service unavailable"}), 503
         
         # Ensure session exists
@@ -77,13 +92,15 @@ def chat():
         
         message = data['message'].strip()
         client_id = session['session_id']
+        MESSAGES_RECEIVED.labels('web').inc()
         
         # Get response from chat handler
-        logger.info(f"Processing message from {client_id}: {message[:50]}...")
+        logger.debug(f"Processing message from {client_id}: {message[:50]}...")
         try:
-            response = chat_handler.get_response(client_id, message)
+            with tracing.start_trace("http.chat", client_id=client_id), quota.user_context('web', get_remote_address()):
+                response = chat_service.respond(client_id, message)
             if response:
-                logger.info(f"Successfully generated response for {client_id}")
+                logger.debug(f"Successfully generated response for {client_id}")
                 return jsonify({
                     "response": response,
                     "timestamp": datetime.now().isoformat()
@@ -100,6 +117,95 @@ def chat():
         logger.error(f"Error processing chat message: {str(e)}", exc_info=True)
         return jsonify({"error": "Internal server error"}), 500
 
+@app.route('/chat/stream', methods=['POST'])
+@limiter.limit("30 per minute")
+def chat_stream():
+    """Stream a chat answer as server-sent events."""
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    
+    data = request.get_json()
+    if not data or not isinstance(data.get('message'), str):
+        return jsonify({"error": "Message is required"}), 400
+    
+    if not chat_service:
+        logger.error("Chat service not initialized")
+        return jsonify({"error": "Chat service unavailable"}), 503
+    
+    # Ensure session exists before the response starts streaming
+    if 'session_id' not in session:
+        session['session_id'] = str(uuid.uuid4())
+    
+    message = data['message'].strip()
+    client_id = session['session_id']
+    # Quotas follow the address like the rate limits; clearing cookies starts a new session
+    remote_addr = get_remote_address()
+    MESSAGES_RECEIVED.labels('web').inc()
+    
+    def events():
+        try:
+            with quota.user_context('web', remote_addr):
+                for text in chat_service.stream(client_id, message):
+                    yield f"data: {json.dumps({'token': text})}\n\n"
+            yield f"event: done\ndata: {json.dumps({'timestamp': datetime.now().isoformat()})}\n\n"
+        except Exception as e:
+            logger.error(f"Error streaming chat response: {str(e)}", exc_info=True)
+            yield f"event: error\ndata: {json.dumps({'error': 'Failed to generate response'})}\n\n"
+    
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'  # Stop proxies from buffering the stream
+        }
+    )
+
+# Bulk question answering for regression runs and cache warming
+MAX_BATCH_SIZE = int(os.environ.get('CHAT_BATCH_MAX_SIZE', 500))
+MAX_BATCH_CONCURRENCY = int(os.environ.get('CHAT_BATCH_MAX_CONCURRENCY', 16))
+
+@app.route('/chat/batch', methods=['POST'])
+@limiter.limit("10 per minute")
+def chat_batch():
+    """Answer a list of messages concurrently and return the results in order."""
+    if not request.is_json:
+        return jsonify({"error": "Request must be JSON"}), 400
+    
+    data = request.get_json()
+    messages = data.get('messages') if isinstance(data, dict) else None
+    if not isinstance(messages, list) or not messages:
+        return jsonify({"error": "A non-empty 'messages' list is required"}), 400
+    if len(messages) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} messages per batch"}), 400
+    if not all(isinstance(message, str) and message.strip() for message in messages):
+        return jsonify({"error": "Every message must be a non-empty string"}), 400
+    
+    if not chat_service:
+        logger.error("Chat service not initialized")
+        return jsonify({"error": "Chat service unavailable"}), 503
+    
+    try:
+        concurrency = min(int(data.get('concurrency', 8)), MAX_BATCH_CONCURRENCY)
+    except (TypeError, ValueError):
+        return jsonify({"error": "concurrency must be an integer"}), 400
+    
+    logger.info(f"Processing batch of {len(messages)} messages with concurrency {concurrency}")
+    MESSAGES_RECEIVED.labels('web_batch').inc(len(messages))
+    started = datetime.now()
+    with tracing.start_trace("http.chat_batch", messages=len(messages)), \
+            quota.user_context('web', get_remote_address()):
+        retry_after = quota.QUOTAS.check_current()
+        if retry_after:
+            return jsonify({"error": quota.exceeded_message(retry_after)}), 429
+        # Each item is checked and charged against the same quota as it is answered
+        results = chat_service.respond_batch(messages, concurrency=concurrency)
+    return jsonify({
+        "results": results,
+        "total_ms": round((datetime.now() - started).total_seconds() * 1000, 1),
+        "timestamp": datetime.now().isoformat()
+    })
+
 @app.route('/health')
 def health_check():
     """Health check endpoint."""
@@ -108,7 +214,7 @@ def health_check():
         'timestamp': datetime.now().isoformat(),
         'services': {
             'web': True,
-            'chat_handler': chat_handler is not None
+            'chat_handler': chat_service is not None
         }
     })
 
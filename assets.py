@@ -0,0 +1,188 @@
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+from flask import request, send_from_directory, url_for, abort
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static')
+DIST_DIR = os.path.join(STATIC_DIR, 'dist')
+MANIFEST_PATH = os.path.join(DIST_DIR, 'manifest.json')
+
+COMPRESSIBLE = {'.css', '.js', '.svg', '.json', '.txt', '.html'}
+RASTER_IMAGES = {'.png', '.jpg', '.jpeg'}
+# Widths (px) of the WebP variants generated for raster images
+IMAGE_WIDTHS = (64, 128, 256)
+CACHE_MAX_AGE = 365 * 24 * 3600
+
+
+def _fingerprint(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def _write_fingerprinted(relative_path, data):
+    """Write data under dist with its content hash in the name and return the new relative path."""
+    root, ext = os.path.splitext(relative_path)
+    hashed_path = f"{root}.{_fingerprint(data)}{ext}"
+    target = os.path.join(DIST_DIR, hashed_path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'wb') as f:
+        f.write(data)
+
+    if ext in COMPRESSIBLE:
+        with open(target + '.gz', 'wb') as f:
+            f.write(gzip.compress(data, compresslevel=9, mtime=0))
+        if brotli:
+            with open(target + '.br', 'wb') as f:
+                f.write(brotli.compress(data, quality=11))
+    return hashed_path
+
+
+def _webp_variants(relative_path, source_path):
+    if Image is None:
+        return None, {}
+    root, _ = os.path.splitext(relative_path)
+    with Image.open(source_path) as image:
+        image.load()
+        variants = {}
+        for width in IMAGE_WIDTHS:
+            if width >= image.width:
+                continue
+            height = round(image.height * width / image.width)
+            variants[str(width)] = _write_fingerprinted(
+                f"{root}.{width}w.webp", _encode_webp(image.resize((width, height), Image.LANCZOS))
+            )
+        return _write_fingerprinted(f"{root}.webp", _encode_webp(image)), variants
+
+
+def _encode_webp(image):
+    from io import BytesIO
+    buffer = BytesIO()
+    image.save(buffer, format='WEBP', quality=82, method=6)
+    return buffer.getvalue()
+
+
+def _source_files():
+    """(relative path, absolute path) of every file under static/ except the build output, in a stable order."""
+    for directory, subdirectories, files in os.walk(STATIC_DIR):
+        subdirectories.sort()
+        if os.path.abspath(directory).startswith(DIST_DIR):
+            continue
+        for filename in sorted(files):
+            source_path = os.path.join(directory, filename)
+            yield os.path.relpath(source_path, STATIC_DIR).replace(os.sep, '/'), source_path
+
+
+def source_digest():
+    """Hash of the names and contents of the source files; a manifest built from other sources is stale."""
+    digest = hashlib.sha256()
+    for relative_path, source_path in _source_files():
+        with open(source_path, 'rb') as f:
+            digest.update(relative_path.encode() + b'\0' + hashlib.sha256(f.read()).digest())
+    return digest.hexdigest()
+
+
+def build_assets():
+    """Fingerprint, precompress and convert everything under static/ into static/dist/."""
+    if brotli is None or Image is None:
+        logger.warning("brotli or Pillow is not installed: building without .br files or WebP images")
+    shutil.rmtree(DIST_DIR, ignore_errors=True)
+    manifest = {}
+    for relative_path, source_path in _source_files():
+        with open(source_path, 'rb') as f:
+            data = f.read()
+
+        entry = {'file': _write_fingerprinted(relative_path, data)}
+        if os.path.splitext(source_path)[1].lower() in RASTER_IMAGES:
+            try:
+                webp, variants = _webp_variants(relative_path, source_path)
+                if webp:
+                    entry['webp'] = webp
+                    entry['variants'] = variants
+            except Exception as e:
+                logger.warning(f"Could not convert {relative_path} to WebP: {e}")
+        manifest[relative_path] = entry
+
+    with open(MANIFEST_PATH, 'w') as f:
+        json.dump({'source': source_digest(), 'assets': manifest}, f, indent=2, sort_keys=True)
+    logger.info(f"Built {len(manifest)} static assets into {DIST_DIR}")
+    return manifest
+
+
+def load_manifest(build_if_stale=True):
+    """The asset manifest, rebuilt first when it is missing or static/ changed since it was built."""
+    try:
+        with open(MANIFEST_PATH) as f:
+            built = json.load(f)
+        # Fingerprinted files are served as immutable, so stale ones must never outlive a deploy
+        if not build_if_stale or built.get('source') == source_digest():
+            return built.get('assets', {})
+        logger.info("Static files changed since the last asset build, rebuilding")
+    except (OSError, ValueError, AttributeError):
+        if not build_if_stale:
+            return {}
+    try:
+        return build_assets()
+    except Exception as e:
+        logger.error(f"Failed to build static assets, serving originals: {e}")
+        return {}
+
+
+def register_assets(app):
+    """Serve fingerprinted assets from /assets and expose asset_url() to templates."""
+    manifest = load_manifest()
+
+    def asset_url(path, width=None, webp=False):
+        """URL of the best built variant of a static file, falling back to /static."""
+        entry = manifest.get(path)
+        if not entry:
+            return url_for('static', filename=path)
+        if width and str(width) in entry.get('variants', {}):
+            return url_for('serve_asset', filename=entry['variants'][str(width)])
+        if webp and entry.get('webp'):
+            return url_for('serve_asset', filename=entry['webp'])
+        return url_for('serve_asset', filename=entry['file'])
+
+    @app.route('/assets/<path:filename>')
+    def serve_asset(filename):
+        if filename.endswith(('.gz', '.br')) or filename == 'manifest.json':
+            abort(404)
+        mimetype = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        accepted = request.headers.get('Accept-Encoding', '')
+
+        # Prefer the smallest precompressed variant the client accepts
+        encoding = None
+        for candidate, suffix in (('br', '.br'), ('gzip', '.gz')):
+            if candidate in accepted and os.path.exists(os.path.join(DIST_DIR, filename + suffix)):
+                encoding, filename = candidate, filename + suffix
+                break
+
+        response = send_from_directory(DIST_DIR, filename, mimetype=mimetype, max_age=CACHE_MAX_AGE)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+        response.headers['Vary'] = 'Accept-Encoding'
+        # Names change whenever content does, so the file can be cached forever
+        response.headers['Cache-Control'] = f'public, max-age={CACHE_MAX_AGE}, immutable'
+        return response
+
+    app.jinja_env.globals['asset_url'] = asset_url
+    return asset_url
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    build_assets()
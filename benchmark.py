@@ -0,0 +1,319 @@
+"""Micro-benchmarks for the chat hot path, compared against a stored baseline.
+
+    python benchmark.py                          # run everything, fail on regressions
+    python benchmark.py -k trivia --rounds 50    # only benchmarks whose name contains "trivia"
+    python benchmark.py --save-baseline          # record the current timings as the baseline
+
+Runs offline: get_response talks to mock_inference on a local port with
+near-zero latency, so its numbers measure our own overhead (prompt building,
+routing, tracing, metrics, the HTTP client) rather than the model. Each
+benchmark is calibrated to a minimum round time, then timed over several
+rounds; the fastest round per call (the least noisy figure) is compared with
+benchmark_baseline.json, and the run exits non-zero when any benchmark is
+slower than the baseline by more than --threshold. Timings are machine
+specific: re-record the baseline with --save-baseline when the hardware changes.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+import mock_inference
+
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "benchmark_baseline.json")
+
+LONG_ANSWER = "\n\n".join(
+    " ".join(f"Octant funds public goods through GLM locking and quadratic matching, sentence {n}."
+             for n in range(12))
+    for _ in range(8)
+)
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a setup function that returns the callable to time."""
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def run_async(make_coroutine):
+    """Wrap a coroutine factory in a sync callable that runs it on one long-lived loop."""
+    loop = asyncio.new_event_loop()
+    return lambda: loop.run_until_complete(make_coroutine())
+
+
+def _chat_handler():
+    from chat_handler import ChatHandler
+    return ChatHandler()
+
+
+@benchmark("chat_handler.get_response")
+def bench_get_response():
+    handler = _chat_handler()
+    questions = ("What is Octant?", "How does quadratic funding work in Octant?", "thanks!")
+    counter = iter(range(10 ** 12))
+
+    def call():
+        index = next(counter)
+        # A handful of users, so history formatting sees realistic conversations
+        handler.get_response(f"bench-{index % 8}", questions[index % len(questions)])
+    return call
+
+
+@benchmark("chat_handler.format_conversation_history")
+def bench_format_conversation_history():
+    handler = _chat_handler()
+    users = [f"bench-{user}" for user in range(50)]
+    for user in users[:40]:
+        for turn in range(handler.max_history):
+            handler.remember_exchange(user, f"question {turn}", LONG_ANSWER[:500])
+    # Mostly returning users, some new ones with no history yet
+    return lambda: [handler.format_conversation_history(user) for user in users]
+
+
+@benchmark("chat_handler.build_prompt")
+def bench_build_prompt():
+    handler = _chat_handler()
+    handler.remember_exchange("bench-history", "What is Octant?", LONG_ANSWER[:500])
+    return lambda: (handler.build_prompt("bench-history", "How do rewards work?"),
+                    handler.build_prompt("bench-new", "What is GLM locking?"))
+
+
+@benchmark("chat_handler.validate_response_length")
+def bench_validate_response_length():
+    handler = _chat_handler()
+    return lambda: handler.validate_response_length(LONG_ANSWER)
+
+
+@benchmark("chat_handler.format_urls")
+def bench_format_urls():
+    handler = _chat_handler()
+    messages = ("What is Octant and how do I get started?", "show links please",
+                "how can I contact james on social?", LONG_ANSWER[:1500])
+    return lambda: [handler.format_urls(message) for message in messages]
+
+
+@benchmark("intent_router.classify")
+def bench_classify_intent():
+    from intent_router import IntentRouter
+    router = IntentRouter()
+    messages = ("What is Octant and how do I get started?", "show links please", "/learn funding",
+                "start trivia", "b", "how can I contact james on social?", LONG_ANSWER[:1500])
+    return lambda: [router.classify(message, in_trivia=True) for message in messages]
+
+
+@benchmark("command_handler.handle_command")
+def bench_handle_command():
+    from chat_handler import CommandHandler
+    from static_responses import STATIC_RESPONSES
+    handler = CommandHandler({})
+    commands = tuple(STATIC_RESPONSES) + tuple(handler.commands) + ("/unknown", "/LEARN more please")
+    return lambda: [handler.handle_command(command, "bench") for command in commands]
+
+
+@benchmark("trivia.web_game")
+def bench_web_trivia():
+    from trivia import Trivia
+    game = Trivia()
+
+    def play():
+        game.reset_game()
+        game.start_game()
+        for _ in range(game.total_questions):
+            game.get_next_question()
+            game.check_answer("C")
+    return play
+
+
+class _Recorder:
+    """Accepts anything a chat platform would be asked to send and drops it."""
+
+    def __init__(self, **attributes):
+        self.__dict__.update(attributes)
+
+    async def reply_text(self, text, **kwargs):
+        return self
+
+    async def send(self, *args, **kwargs):
+        return self
+
+    async def send_message(self, *args, **kwargs):
+        return self
+
+    async def answer(self, *args, **kwargs):
+        return None
+
+
+@benchmark("trivia.telegram_game")
+def bench_telegram_trivia():
+    from telegram_trivia import TelegramTrivia
+    game = TelegramTrivia()
+    message = _Recorder(chat_id=1)
+    user = _Recorder(id=1)
+    start = _Recorder(effective_user=user, message=message)
+
+    async def play():
+        await game.start_game(start, None)
+        for _ in game.questions:
+            query = _Recorder(data="trivia_C", message=message)
+            await game.handle_answer(_Recorder(effective_user=user, callback_query=query, message=message), None)
+        game.current_games.pop(user.id, None)
+    return run_async(play)
+
+
+@benchmark("trivia.discord_game")
+def bench_discord_trivia():
+    from discord_trivia import DiscordTrivia
+    game = DiscordTrivia()
+    sent_views = []
+
+    class Channel(_Recorder):
+        async def send(self, *args, view=None, **kwargs):
+            if view is not None:
+                sent_views.append(view)
+            return self
+
+    channel = Channel(id=1)
+    interaction = _Recorder(channel=channel, channel_id=1, response=_Recorder())
+
+    async def play():
+        sent_views.clear()
+        await game.start_game(interaction)
+        while channel.id in game.active_games and sent_views:
+            view = sent_views.pop()
+            await view.children[2].callback(interaction)
+    return run_async(play)
+
+
+def calibrate(func, min_round_seconds):
+    """Calls per round so that one round lasts at least min_round_seconds."""
+    iterations = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        elapsed = time.perf_counter() - started
+        if elapsed >= min_round_seconds:
+            return iterations
+        iterations *= 2 if elapsed < min_round_seconds / 10 else 1 + int(min_round_seconds / max(elapsed, 1e-9))
+
+
+def measure(func, rounds, min_round_seconds):
+    """Seconds per call for each round; calibration doubles as the warm-up."""
+    iterations = calibrate(func, min_round_seconds)
+    timings = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        timings.append((time.perf_counter() - started) / iterations)
+    return {
+        "iterations": iterations,
+        "rounds": rounds,
+        "min_us": round(min(timings) * 1e6, 3),
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "mean_us": round(statistics.fmean(timings) * 1e6, 3),
+        "stddev_us": round(statistics.stdev(timings) * 1e6, 3) if rounds > 1 else 0.0
+    }
+
+
+def load_baseline(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def compare(results, baseline, threshold):
+    """Attach the change against the baseline to each result; return the names that regressed."""
+    regressions = []
+    previous = (baseline or {}).get("benchmarks", {})
+    for name, result in results.items():
+        base = previous.get(name)
+        if not base:
+            result["change"] = None
+            continue
+        change = result["min_us"] / base["min_us"] - 1
+        result["change"] = round(change, 3)
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def print_report(results, threshold):
+    columns = ("min_us", "median_us", "stddev_us", "iterations")
+    width = max(len(name) for name in results)
+    print(f"{'benchmark':<{width}} " + " ".join(f"{column:>12}" for column in columns) + f" {'vs baseline':>12}")
+    for name, result in results.items():
+        change = result["change"]
+        if change is None:
+            verdict = "new"
+        else:
+            verdict = f"{change:+.1%}" + (" SLOWER" if change > threshold else "")
+        print(f"{name:<{width}} " + " ".join(f"{result[column]:>12}" for column in columns) + f" {verdict:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="pattern", help="only run benchmarks whose name contains this")
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--min-round-seconds", type=float, default=0.05)
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="fail when the best round is this much slower than the baseline (0.25 = 25%%)")
+    parser.add_argument("--baseline", default=BASELINE_FILE)
+    parser.add_argument("--save-baseline", action="store_true", help="write these results as the new baseline")
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    args = parser.parse_args()
+
+    # Near-zero model latency: the benchmark measures our code, not the mock's sleeps
+    server = mock_inference.start_mock_server(0, config=mock_inference.MockConfig(
+        latency="fixed", latency_median=0.0, tokens_per_second=1e9, completion_tokens=60, seed=1))
+    os.environ["INFERENCE_BASE_URL"] = mock_inference.base_url(server)
+    os.environ["MODEL_HEDGING"] = "false"
+    os.environ.setdefault("TOGETHER_API_KEY", "benchmark")
+    os.environ.setdefault("LOG_LEVEL", "ERROR")
+    os.environ.setdefault("TRACE_SAMPLE_RATE", "0")
+    from logging_setup import configure_logging
+    configure_logging("benchmark")
+
+    results = {}
+    for name, setup in BENCHMARKS.items():
+        if args.pattern and args.pattern not in name:
+            continue
+        results[name] = measure(setup(), args.rounds, args.min_round_seconds)
+    if not results:
+        parser.error(f"no benchmark matches {args.pattern!r}")
+
+    baseline = load_baseline(args.baseline)
+    regressions = compare(results, baseline, args.threshold)
+    print_report(results, args.threshold)
+
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.save_baseline:
+        stored = (baseline or {}).get("benchmarks", {}) if args.pattern else {}
+        stored.update({name: {key: value for key, value in result.items() if key != "change"}
+                       for name, result in results.items()})
+        with open(args.baseline, "w") as f:
+            json.dump({"python": platform.python_version(), "machine": platform.machine(),
+                       "benchmarks": stored}, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,171 +1,110 @@
 import os
+import asyncio
+import contextvars
 import requests
 from collections import deque
 from trivia import Trivia
+import json
 import logging
 import re
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from flask import session
 from flask_socketio import emit
+import tracing
+from quota import QUOTAS, exceeded_message
+from metrics import (CACHE_LOOKUPS, LLM_CACHED_TOKENS, LLM_LATENCY, LLM_RETRIES, LLM_TIME_TO_FIRST_TOKEN, LLM_TOKENS,
+                     estimate_tokens)
+from config_store import get_config_store
+from intent_router import (COMMAND, CONTACT, LINKS, TRIVIA_END, TRIVIA_NEXT, TRIVIA_START,
+                           IntentRouter)
+from prompt_builder import PromptBuilder
+from model_router import SLOW_CALL_SECONDS, ModelRouter, NoEndpointAvailable, RequestRejected
+from resilience import FallbackCache, RetryBudget, backoff_delay
+from response_splitter import split_response
+from static_responses import get_static_response
 
 logger = logging.getLogger(__name__)
 
+# Connect and read timeouts for inference calls; a read past the breaker's slow-call limit is never worth waiting for
+INFERENCE_TIMEOUT = (5, SLOW_CALL_SECONDS)
+MAX_ATTEMPTS = 3
+# Every attempt of one answer, backoff included, fits in this many seconds
+INFERENCE_DEADLINE = float(os.environ.get('INFERENCE_DEADLINE_SECONDS', 20))
+# A retry with less time than this left would only time out
+MIN_ATTEMPT_SECONDS = 2.0
+
+UNAVAILABLE_MESSAGE = "I'm having trouble connecting to my knowledge base. Please try again in a moment."
+
+# Keywords that map a question to a built-in topic answer when the API is unavailable
+FALLBACK_TOPICS = (
+    (('fund', 'quadratic', 'allocat', 'donat', 'matching'), '/funding'),
+    (('governance', 'vote', 'voting', 'proposal', 'epoch'), '/governance'),
+    (('reward', 'lock', 'glm', 'stak', 'yield'), '/rewards'),
+    (('octant', 'learn', 'how does', 'what is'), '/learn'),
+)
+
+# Canned answers for link requests; these never go to the model
+LINKS_ANSWER = """Sure thing! Here are some essential links related to Octant, the Golem Foundation, and more:
+
+🌐 Octant:
+Main website: https://octant.build/
+Documentation: https://docs.octant.app/
+
+🌐 Golem Foundation:
+Main website: https://golem.foundation/
+
+📱 Connect with us:
+Twitter/X: https://x.com/OctantApp
+Warpcast: https://warpcast.com/octant
+Discord: https://discord.gg/octant
+
+Learn more about James Kiernan, VPOFABUNDANCE, here:
+X: https://x.com/vpabundance
+Warpcast: https://warpcast.com/vpabundance.eth
+LinkedIn: https://www.linkedin.com/in/vpabundance
+
+I hope this helps! Let me know if there's anything else you need. 😊"""
+
+CONTACT_ANSWER = """X: https://x.com/vpabundance
+Warpcast: https://warpcast.com/vpabundance.eth
+LinkedIn: https://www.linkedin.com/in/vpabundance"""
+
+
+class RetryableError(Exception):
+    """An inference failure worth retrying: connection failures, 429 and 5xx.
+
+    Read timeouts are not retried: the endpoint accepted the request and
+    stalled, and a retry would make the user wait that long again.
+    """
+
+
 class CommandHandler:
-    def __init__(self, trivia_game):
-        self.trivia_game = trivia_game
+    def __init__(self, trivia_games):
+        # Running web trivia games by client id, shared with the ChatHandler
+        self.trivia_games = trivia_games
+        # Static answers come from static_responses; these commands change state
         self.commands = {
-            '/help': self.help_command,
-            '/stats': self.stats_command,
-            '/learn': self.learn_command,
-            '/funding': self.funding_command,
-            '/governance': self.governance_command,
-            '/rewards': self.rewards_command,
             '/trivia': self.trivia_command
         }
 
-    def handle_command(self, command):
+    def handle_command(self, command, socket_id=None):
+        static = get_static_response(command)
+        if static is not None:
+            return static.text
         command = command.lower().split()[0]  # Get the first word of the command
         if command in self.commands:
-            return self.commands[command]()
+            return self.commands[command](socket_id)
         return None
 
-    def help_command(self):
-        return """━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📚 Available Commands
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-🎮 Game Commands:
-• /trivia - Start a trivia game
-
-📋 Information Commands:
-• /help - Show this help message
-
-💬 How to Chat:
-• Reply to any of my messages to continue our conversation
-• Each reply builds on our ongoing chat
-• That's it! Just keep replying to chat with me
-
-Type /trivia to start playing or reply to chat!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def stats_command(self):
-        return """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📊 Chat Statistics
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Coming soon! This feature will show:
-• Messages exchanged
-• Topics discussed
-• Trivia performance
-• Learning progress
-
-Stay tuned for updates!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def learn_command(self):
-        return """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📚 Learning Modules
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Choose a topic to learn about:
-
-1. Octant Basics
-• What is Octant?
-• How it works
-• Getting started
-
-2. Token Economics
-• GLM token utility
-• Staking mechanism
-• Reward distribution
-
-3. Participation Guide
-• How to contribute
-• Community roles
-• Decision making
-
-Type /funding, /governance, or /rewards 
-for specific topic details.
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def funding_command(self):
-        return """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-💰 Octant Funding System
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Key Components:
-• Quadratic Funding mechanism
-• Community-driven allocation
-• Matched rewards system
-
-📋 Funding Process:
-1. Project Submission
-2. Community Voting
-3. Allocation Period
-4. Distribution of Funds
-
-🎯 Important Points:
-• 20% maximum funding cap
-• Anti-Sybil measures
-• Transparent tracking
-
-Want to learn more? Try /learn for 
-detailed tutorials!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def governance_command(self):
-        return """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🏛️ Octant Governance
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Decision Making Process:
-• Community-driven proposals
-• Token-weighted voting
-• Transparent execution
-
-Key Areas:
-1. Project Selection
-2. Fund Allocation
-3. Protocol Updates
-4. Community Initiatives
-
-Participation Methods:
-• Submit proposals
-• Vote on decisions
-• Join discussions
-
-For more details, use /learn command!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def rewards_command(self):
-        return """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🌟 Octant Rewards System
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-Types of Rewards:
-• Individual Rewards (IR)
-• Matched Rewards (MR)
-• Community Incentives
-
-Calculation Factors:
-• Locked GLM amount
-• Time-weighted average
-• Community support level
-
-Distribution Schedule:
-• 90-day epochs
-• Regular calculations
-• Transparent tracking
-
-Use /learn for detailed tutorials!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-
-    def trivia_command(self):
-        return self.trivia_game.start_game()
+    def trivia_command(self, socket_id):
+        game = self.trivia_games.get(socket_id) or Trivia()
+        # A running game answers that it is already running
+        response = game.start_game()
+        self.trivia_games[socket_id] = game
+        return response
 
 class ChatHandler:
     def __init__(self):
@@ -173,111 +112,167 @@ class ChatHandler:
         if not self.api_key:
             raise ValueError("TOGETHER_API_KEY environment variable is not set")
         self.model = "mistralai/Mixtral-8x7B-Instruct-v0.1"
-        self.base_url = "https://api.together.xyz/inference"
+        # Point at mock_inference.py (or another compatible server) for load testing
+        self.base_url = os.environ.get("INFERENCE_BASE_URL", "https://api.together.xyz/inference")
         self.conversation_history = {}
         self.max_history = 5
-        self.trivia_game = Trivia()
-        self.is_playing_trivia = False
-        self.command_handler = CommandHandler(self.trivia_game)
+        # One game per client; a client is playing while it has an entry here
+        self.trivia_games = {}
+        self.command_handler = CommandHandler(self.trivia_games)
+        self.intent_router = IntentRouter()
+        # Each endpoint has its own circuit breaker and latency statistics
+        self.model_router = ModelRouter.from_env(self.base_url, self.model)
+        self.retry_budget = RetryBudget()
+        self.fallback_cache = FallbackCache()
         
-        self.system_prompt = """You are a friendly and witty AI assistant who happens to be an expert on Octant. While you're knowledgeable about the Octant ecosystem, you also have a vibrant personality and can engage in casual conversation about any topic. Here's your approach:
-
-1. PERSONALITY:
-   - Be warm, friendly, and genuinely enthusiastic
-   - Show humor and wit in your responses
-   - Have personal preferences and opinions
-   - Express emotions and use casual language when appropriate
+        # system_prompt and generation parameters come from the admin dashboard's live configuration
+        self.config_store = get_config_store()
+        self.prompt_builder = PromptBuilder()
 
-2. CONVERSATION STYLE:
-   - Engage naturally in both casual and technical discussions
-   - Share personal preferences (favorite colors, jokes, etc.)
-   - Use emojis and expressive language
-   - Balance fun and professionalism
-
-3. KNOWLEDGE BASE:
-   - Expert in Octant ecosystem and GLM tokens
-   - Deep understanding of Golem Foundation's role as Octant's creator and developer
-   - Recognition that Octant is developed by Golem Foundation and uses GLM tokens
-   - Knowledge of the 100,000 ETH commitment from Golem Foundation
-   - Ability to discuss technical and casual topics while maintaining accuracy
+    def handle_socket_message(self, socket_id, message):
+        """Handle incoming socket messages; get_response owns retries and fallbacks."""
+        try:
+            if not message or not isinstance(message, str):
+                logger.error(f"Invalid message format from {socket_id}")
+                return "I couldn't process your message. Please try again with a text message."
+            
+            logger.debug(f"Processing message from {socket_id}: {message}")
+            
+            # Initialize conversation history for new users
+            if socket_id not in self.conversation_history:
+                self.conversation_history[socket_id] = []
+                logger.info(f"Initialized conversation history for {socket_id}")
+            
+            # Commands, trivia moves and link requests are answered without the model
+            intent = self.intent_router.classify(message, in_trivia=self.is_playing_trivia(socket_id))
+            if intent.kind == COMMAND:
+                response = self.command_handler.handle_command(intent.command, socket_id)
+                if response:
+                    logger.debug(f"Command response: {response}")
+                    return response
+                else:
+                    return "Command not recognized. Type /help for available commands."
+            if intent.is_trivia:
+                return self.handle_trivia(socket_id, intent)
+            if intent.is_canned:
+                return self.canned_answer(intent)
+            
+            # Validate API key
+            if not self.api_key:
+                logger.error("API key not found")
+                return "I apologize, but I'm not properly configured. Please contact support."
+            
+            response = self.get_response(socket_id, message)
+            if not response:
+                return "I apologize, but I encountered an error generating a response. Please try again."
+            logger.debug(f"Returning response for {socket_id}")
+            return response
+                
+        except Exception as e:
+            logger.error(f"Error handling socket message: {str(e)}")
+            logger.error(traceback.format_exc())
+            return "I apologize, but I encountered an error processing your message. Please try again."
+
+    def use_session_stores(self, conversation_history, trivia_games):
+        """Keep per-client history and games in shared mappings (see shared_backends.session_stores)."""
+        self.conversation_history = conversation_history
+        self.trivia_games = self.command_handler.trivia_games = trivia_games
+
+    def is_playing_trivia(self, socket_id):
+        return socket_id in self.trivia_games
+
+    def end_trivia(self, socket_id):
+        """Drop a client's trivia game, e.g. when it disconnects."""
+        self.trivia_games.pop(socket_id, None)
+
+    def handle_trivia(self, socket_id, intent):
+        """Play a client's web trivia game: start, end, next question or an A-D answer."""
+        if intent.kind == TRIVIA_START:
+            return self.command_handler.trivia_command(socket_id)
+        game = self.trivia_games.get(socket_id)
+        if game is None:
+            # "next" and bare A-D only classify as trivia while a game runs, so this is "end trivia"
+            return "There's no trivia game running. Type 'start trivia' to play!"
+        if intent.kind == TRIVIA_END:
+            response = game.end_game()
+        elif intent.kind == TRIVIA_NEXT:
+            if len(game.asked_questions) < game.total_questions:
+                response = game.get_next_question()
+                # Shared session stores hold a copy, so the changed game is stored again
+                self.trivia_games[socket_id] = game
+                return response
+            response = game.end_game()
+        else:
+            response = game.check_answer(intent.argument)
+            if len(game.asked_questions) < game.total_questions:
+                self.trivia_games[socket_id] = game
+                return response
+        self.end_trivia(socket_id)
+        return response
 
-Remember: While you're an expert on Octant, you're first and foremost a friendly conversationalist who can discuss anything from favorite colors to complex blockchain concepts!"""
+    def canned_answer(self, intent):
+        """The fixed answer for a link request or an informational command, else None."""
+        if intent.kind == LINKS:
+            return LINKS_ANSWER
+        if intent.kind == CONTACT:
+            return CONTACT_ANSWER
+        # /trivia changes game state, so only handle_socket_message runs it
+        if intent.kind == COMMAND and intent.command != '/trivia':
+            return self.command_handler.handle_command(intent.command)
+        return None
 
-    def handle_socket_message(self, socket_id, message):
-        """Handle incoming socket messages with enhanced error handling and retry logic."""
-        MAX_RETRIES = 3
-        retry_count = 0
+    def remember_exchange(self, socket_id, user_message, response_text):
+        """Record one exchange in the conversation history; the only writer of history."""
+        history = self.conversation_history.get(socket_id, [])
+        history.append({
+            "user": user_message,
+            "assistant": response_text
+        })
         
-        while retry_count < MAX_RETRIES:
-            try:
-                if not message or not isinstance(message, str):
-                    logger.error(f"Invalid message format from {socket_id}")
-                    return "I couldn't process your message. Please try again with a text message."
-                
-                logger.info(f"Processing message from {socket_id}: {message}")
-                
-                # Initialize conversation history for new users
-                if socket_id not in self.conversation_history:
-                    self.conversation_history[socket_id] = []
-                    logger.info(f"Initialized conversation history for {socket_id}")
-                
-                # Handle commands
-                if message.startswith('/'):
-                    response = self.command_handler.handle_command(message)
-                    if response:
-                        logger.info(f"Command response: {response}")
-                        if message.lower() == '/trivia':
-                            self.is_playing_trivia = True
-                        return response
-                    else:
-                        return "Command not recognized. Type /help for available commands."
-                
-                # Validate API key
-                if not self.api_key:
-                    logger.error("API key not found")
-                    return "I apologize, but I'm not properly configured. Please contact support."
-                
-                # Get response from API
-                try:
-                    response = self.get_response(socket_id, message)
-                    if not response:
-                        raise ValueError("Empty response received from API")
-                    logger.info(f"API response received for {socket_id}")
-                    
-                    # Update conversation history
-                    self.conversation_history[socket_id].append({
-                        'user': message,
-                        'assistant': response
-                    })
-                    
-                    # Maintain history limit
-                    if len(self.conversation_history[socket_id]) > self.max_history:
-                        self.conversation_history[socket_id] = self.conversation_history[socket_id][-self.max_history:]
-                    
-                    logger.info(f"Returning response for {socket_id}")
-                    return response
-                    
-                except Exception as api_error:
-                    logger.error(f"API error: {str(api_error)}")
-                    retry_count += 1
-                    if retry_count >= MAX_RETRIES:
-                        return "I apologize, but I encountered an error generating a response. Please try again."
-                    continue
-                    
-            except Exception as e:
-                logger.error(f"Error handling socket message: {str(e)}")
-                logger.error(traceback.format_exc())
-                return "I apologize, but I encountered an error processing your message. Please try again."
+        # Maintain history limit; assigning back also updates shared session stores
+        self.conversation_history[socket_id] = history[-self.max_history:]
 
     def format_conversation_history(self, socket_id):
         """Format the conversation history for the prompt."""
-        if not self.conversation_history.get(socket_id, []):
+        history = self.conversation_history.get(socket_id)
+        if not history:
             return ""
         
         # Only include the last message for immediate context
-        last_entry = self.conversation_history[socket_id][-1]
+        last_entry = history[-1]
         return f"\nPrevious message: {last_entry['assistant']}\n"
 
+    def build_prompt(self, socket_id, user_message, config=None):
+        """Build the inference prompt for a message under a configuration snapshot (the current one by default).
+
+        The prompt starts with the same bytes for every user so providers can reuse their prefix cache.
+        """
+        config = config or self.config_store.current
+        return self.prompt_builder.build(config, self.format_conversation_history(socket_id), user_message)
+
+    def build_request(self, prompt, stream=False, model=None, config=None):
+        """Return the headers and JSON body for an inference request."""
+        config = config or self.config_store.current
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json"
+        }
+        data = {
+            "model": model or self.model,
+            "prompt": prompt,
+            "max_tokens": config.max_tokens,
+            "temperature": config.temperature,
+            "top_p": 0.9,
+            "top_k": 50,
+            "repetition_penalty": config.repetition_penalty
+        }
+        if stream:
+            data["stream_tokens"] = True
+            # Streams only report token usage (in their last event) when asked to
+            data["stream_options"] = {"include_usage": True}
+        return headers, data
+
+    @tracing.traced("chat_handler.get_response")
     def get_response(self, socket_id, user_message):
         """Get response from the API with enhanced error handling."""
         try:
@@ -287,88 +282,235 @@ Remember: While you're an expert on Octant, you're first and foremost a friendly
                 return "I couldn't process an empty message. Please try asking something!"
             
             user_message = user_message.strip()
-            logger.info(f"Processing message from {socket_id}: {user_message[:50]}...")
-            
-            # Initialize conversation history if needed
-            if socket_id not in self.conversation_history:
-                self.conversation_history[socket_id] = []
-            
-            headers = {
-                "Authorization": f"Bearer {self.api_key}",
-                "Content-Type": "application/json"
-            }
+            logger.debug(f"Processing message from {socket_id}: {user_message[:50]}...")
             
-            history = self.format_conversation_history(socket_id)
-            prompt = f"""You are Octant's friendly AI assistant. Please provide accurate information about Octant:
-
-CORE FACTS:
-- Octant is a groundbreaking platform developed by the Golem Foundation
-- It experiments with participatory public goods funding
-- Backed by 100,000 ETH commitment from Golem Foundation
-- Uses GLM tokens for governance and participation
-- Features innovative quadratic funding mechanisms
-- Includes GLM token locking and staking features
-
-STYLE GUIDE:
-- Be friendly and approachable
-- Use clear, simple explanations
-- Include relevant emojis 😊
-- Focus on accuracy while maintaining conversation flow
-
-QUERY:
-{user_message}
-
-CONTEXT:
-{history}
-
-Please provide a helpful response drawing from the above knowledge:"""
+            canned = self.canned_answer(self.intent_router.classify(user_message))
+            if canned:
+                return canned
+            retry_after = QUOTAS.check_current()
+            if retry_after:
+                return exceeded_message(retry_after)
             
-            data = {
-                "model": self.model,
-                "prompt": prompt,
-                "max_tokens": 2048,
-                "temperature": 0.7,
-                "top_p": 0.9,
-                "top_k": 50,
-                "repetition_penalty": 1.1
-            }
+            # One snapshot per answer, even if an admin saves a new configuration meanwhile
+            config = self.config_store.current
+            with tracing.span("prompt.build"):
+                prompt = self.build_prompt(socket_id, user_message, config)
+            tier = self.model_router.classify(user_message)
             
-            try:
-                response = requests.post(
-                    self.base_url,
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                response.raise_for_status()
+            self.retry_budget.record_request()
+            started = time.monotonic()
+            for attempt in range(MAX_ATTEMPTS):
+                remaining = INFERENCE_DEADLINE - (time.monotonic() - started)
+                timeout = tuple(min(limit, remaining) for limit in INFERENCE_TIMEOUT)
+                try:
+                    endpoint, result = self.model_router.call(
+                        lambda endpoint: self.call_inference(endpoint, prompt, config, timeout), tier,
+                        timeout=remaining
+                    )
+                except NoEndpointAvailable:
+                    # While the API is failing, answer in milliseconds instead of waiting on timeouts
+                    logger.warning(f"All inference circuits open, answering {socket_id} from fallback")
+                    return self.fallback_answer(user_message)
+                except RetryableError as retry_error:
+                    logger.warning(f"Inference attempt {attempt + 1} failed: {retry_error}")
+                    delay = backoff_delay(attempt)
+                    time_left = INFERENCE_DEADLINE - (time.monotonic() - started) - delay
+                    if (attempt + 1 < MAX_ATTEMPTS and time_left >= MIN_ATTEMPT_SECONDS
+                            and self.retry_budget.try_acquire_retry()):
+                        LLM_RETRIES.inc()
+                        time.sleep(delay)
+                        continue
+                    return self.fallback_answer(user_message)
+                except (requests.exceptions.Timeout, TimeoutError) as timeout_error:
+                    logger.warning(f"Inference timed out for {socket_id}: {timeout_error}")
+                    return self.fallback_answer(user_message)
+                except RequestRejected as rejected:
+                    logger.error(f"Inference API rejected the request: {rejected}")
+                    return UNAVAILABLE_MESSAGE
+                except requests.exceptions.RequestException as req_error:
+                    logger.error(f"API request error: {str(req_error)}")
+                    return UNAVAILABLE_MESSAGE
                 
-                result = response.json()
                 if "output" in result and result["output"]["choices"]:
+                    logger.debug(f"Answered {socket_id} with {endpoint.model} ({tier} tier)")
                     response_text = result["output"]["choices"][0]["text"].strip()
-                    
-                    # Update conversation history
-                    self.conversation_history[socket_id].append({
-                        "user": user_message,
-                        "assistant": response_text
-                    })
-                    
-                    # Maintain history limit
-                    if len(self.conversation_history[socket_id]) > self.max_history:
-                        self.conversation_history[socket_id] = self.conversation_history[socket_id][-self.max_history:]
-                    
+                    self.record_token_usage(prompt, response_text, result.get("usage") or result["output"].get("usage"))
+                    self.remember_exchange(socket_id, user_message, response_text)
+                    self.fallback_cache.put(user_message, response_text)
                     return response_text
                 else:
-                    logger.error("Unexpected API response format:", result)
+                    logger.error(f"Unexpected API response format: {result}")
                     return "I apologize, but I couldn't understand your question. Could you please rephrase it?"
                 
-            except requests.exceptions.RequestException as req_error:
-                logger.error(f"API request error: {str(req_error)}")
-                return "I'm having trouble connecting to my knowledge base. Please try again in a moment."
-                
         except Exception as e:
             logger.error(f"Error in get_response: {str(e)}")
             return "I'm here to help but encountered a technical issue. Please try asking your question again."
 
+    def call_inference(self, endpoint, prompt, config=None, timeout=INFERENCE_TIMEOUT):
+        """POST one inference request to an endpoint; the router records its latency and outcome."""
+        config = config or self.config_store.current
+        headers, data = self.build_request(prompt, model=endpoint.model, config=config)
+        prefix_hash, prefix_cache = self.prompt_builder.mark_sent(config, endpoint.model)
+        started = time.perf_counter()
+        outcome = "error"
+        try:
+            with tracing.span("inference.request", model=endpoint.model, endpoint=endpoint.name,
+                              prefix_hash=prefix_hash, prefix_cache=prefix_cache) as request_span:
+                try:
+                    response = requests.post(endpoint.url, headers=headers, json=data, timeout=timeout)
+                except requests.exceptions.ReadTimeout:
+                    raise
+                except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                    raise RetryableError(str(e)) from e
+                request_span.set_attribute("http.status_code", response.status_code)
+                if response.status_code == 429 or response.status_code >= 500:
+                    raise RetryableError(f"HTTP {response.status_code} from inference API")
+                if response.status_code >= 400:
+                    raise RequestRejected(f"HTTP {response.status_code} from inference API: {response.text[:200]}")
+                response.raise_for_status()
+                result = response.json()
+            outcome = "success"
+            return result
+        finally:
+            LLM_LATENCY.labels(outcome).observe(time.perf_counter() - started)
+
+    def fallback_answer(self, user_message):
+        """Answer without the API: the last good answer to the same question, else a built-in topic."""
+        cached = self.fallback_cache.get(user_message)
+        CACHE_LOOKUPS.labels("fallback", "hit" if cached else "miss").inc()
+        if cached:
+            return cached
+        lowered = user_message.lower()
+        for keywords, command in FALLBACK_TOPICS:
+            if any(keyword in lowered for keyword in keywords):
+                topic = self.command_handler.handle_command(command)
+                return f"{UNAVAILABLE_MESSAGE} Meanwhile, here's an overview that may help:\n{topic}"
+        return UNAVAILABLE_MESSAGE
+
+    def stream_response(self, socket_id, user_message):
+        """Yield the response text piece by piece as the API streams tokens."""
+        if not isinstance(user_message, str) or not user_message.strip():
+            yield "I couldn't process an empty message. Please try asking something!"
+            return
+        
+        user_message = user_message.strip()
+        logger.debug(f"Streaming response for {socket_id}: {user_message[:50]}...")
+        retry_after = QUOTAS.check_current()
+        if retry_after:
+            yield exceeded_message(retry_after)
+            return
+        # Streams are not hedged: once tokens flow to the client there's no switching endpoints
+        endpoint = self.model_router.acquire(self.model_router.classify(user_message))
+        if endpoint is None:
+            yield self.fallback_answer(user_message)
+            return
+        config = self.config_store.current
+        prompt = self.build_prompt(socket_id, user_message, config)
+        headers, data = self.build_request(prompt, stream=True, model=endpoint.model, config=config)
+        _, prefix_cache = self.prompt_builder.mark_sent(config, endpoint.model)
+        
+        parts = []
+        usage = None
+        started = time.perf_counter()
+        first_token_after = None
+        outcome = "error"
+        rejected = False
+        try:
+            with requests.post(endpoint.url, headers=headers, json=data, timeout=INFERENCE_TIMEOUT, stream=True) as response:
+                # A refused request (4xx other than 429) says nothing about the endpoint's health
+                rejected = 400 <= response.status_code < 500 and response.status_code != 429
+                response.raise_for_status()
+                # The API answers with server-sent events: "data: {...}" lines ending in "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data:"):
+                        continue
+                    payload = line[5:].strip()
+                    if payload == "[DONE]":
+                        break
+                    event = json.loads(payload)
+                    # The last event may carry the request's token usage
+                    usage = event.get("usage") or usage
+                    choices = event.get("choices") or []
+                    text = choices[0].get("text", "") if choices else ""
+                    if text:
+                        # Hold back leading whitespace until the first real token
+                        if not parts:
+                            text = text.lstrip()
+                            if not text:
+                                continue
+                            first_token_after = time.perf_counter() - started
+                            LLM_TIME_TO_FIRST_TOKEN.labels(prefix_cache).observe(first_token_after)
+                        parts.append(text)
+                        yield text
+            outcome = "success"
+        except (requests.exceptions.RequestException, ValueError) as stream_error:
+            logger.error(f"API streaming error: {str(stream_error)}")
+            if not parts:
+                yield UNAVAILABLE_MESSAGE
+            return
+        except GeneratorExit:
+            # The client went away mid-stream; the API itself was answering
+            outcome = "success"
+            raise
+        finally:
+            duration = time.perf_counter() - started
+            LLM_LATENCY.labels(outcome).observe(duration)
+            # Streams are judged by time to first token, not by answer length
+            endpoint.record(first_token_after or duration, ok=outcome == "success" or rejected)
+            # Also when the client hung up or the stream broke: what was generated still counts
+            if parts or usage or outcome == "success":
+                self.record_token_usage(prompt, "".join(parts), usage)
+        
+        response_text = "".join(parts).strip()
+        if response_text:
+            self.remember_exchange(socket_id, user_message, response_text)
+
+    def record_token_usage(self, prompt, response_text, usage=None):
+        """Count tokens in and out, estimating from text when the API reports no usage, and charge the user's quota."""
+        usage = usage or {}
+        tokens_in = usage.get("prompt_tokens") or estimate_tokens(prompt)
+        tokens_out = usage.get("completion_tokens") or estimate_tokens(response_text)
+        LLM_TOKENS.labels("in").inc(tokens_in)
+        LLM_TOKENS.labels("out").inc(tokens_out)
+        # OpenAI-compatible APIs report prompt tokens served from their prefix cache
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens") or usage.get("cached_tokens")
+        if cached:
+            LLM_CACHED_TOKENS.inc(cached)
+        QUOTAS.charge_current(tokens_in + tokens_out)
+
+    def get_responses(self, messages, max_workers=8, socket_id_prefix="batch"):
+        """Answer many independent messages concurrently, returning results in input order."""
+        batch_id = uuid.uuid4().hex[:8]
+
+        def answer(index, message):
+            # Each item gets a throwaway conversation so answers don't leak into each other
+            socket_id = f"{socket_id_prefix}_{batch_id}_{index}"
+            started = time.perf_counter()
+            try:
+                response = self.get_response(socket_id, message)
+                error = None
+            except Exception as e:
+                response, error = None, str(e)
+            finally:
+                self.conversation_history.pop(socket_id, None)
+            return {
+                "index": index,
+                "message": message,
+                "response": response,
+                "error": error,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1)
+            }
+
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            # Copy the context so every item is charged to the caller's quota
+            futures = [executor.submit(contextvars.copy_context().run, answer, index, message)
+                       for index, message in enumerate(messages)]
+            return [future.result() for future in futures]
+
+    async def get_response_async(self, socket_id, user_message):
+        """Awaitable wrapper around get_response that keeps the event loop free."""
+        return await asyncio.to_thread(self.get_response, socket_id, user_message)
+
     def clear_conversation_history(self, socket_id):
         """Clear the conversation history for a specific socket."""
         if socket_id in self.conversation_history:
@@ -392,102 +534,12 @@ Please provide a helpful response drawing from the above knowledge:"""
         return message.strip()
 
     def format_urls(self, text):
-        """Format URLs in a simple, consistent way."""
-        # Only show links when explicitly requested
-        keywords = ['link', 'links', 'website', 'connect', 'social', 'contact']
-        explicit_request = any(f"show {kw}" in text.lower() or f"get {kw}" in text.lower() or 
-                             f"what {kw}" in text.lower() or f"where {kw}" in text.lower() or
-                             f"need {kw}" in text.lower() for kw in keywords)
-        
-        if explicit_request:
-            return """Sure thing! Here are some essential links related to Octant, the Golem Foundation, and more:
-
-🌐 Octant:
-Main website: https://octant.build/
-Documentation: https://docs.octant.app/
-
-🌐 Golem Foundation:
-Main website: https://golem.foundation/
-
-📱 Connect with us:
-Twitter/X: https://x.com/OctantApp
-Warpcast: https://warpcast.com/octant
-Discord: https://discord.gg/octant
-
-Learn more about James Kiernan, VPOFABUNDANCE, here:
-X: https://x.com/vpabundance
-Warpcast: https://warpcast.com/vpabundance.eth
-LinkedIn: https://www.linkedin.com/in/vpabundance
-
-I hope this helps! Let me know if there's anything else you need. 😊"""
-            
-        # Only show James' links when explicitly requesting contact/social info
-        if any(name in text.lower() for name in ['james', 'kiernan', 'vpabundance']) and \
-           any(action in text.lower() for action in ['contact', 'social', 'link', 'connect', 'follow']):
-            return """X: https://x.com/vpabundance
-Warpcast: https://warpcast.com/vpabundance.eth
-LinkedIn: https://www.linkedin.com/in/vpabundance"""
-            
+        """Replace the text with the canned links answer when it asks for links."""
+        intent = self.intent_router.classify(text)
+        if intent.kind in (LINKS, CONTACT):
+            return self.canned_answer(intent)
         return text
 
-    def validate_response_length(self, response):
-        """Validate response length and split if necessary."""
-        max_length = 2000  # Discord's max message length
-        if len(response) <= max_length:
-            return [response]
-
-        # Try to find better split points at paragraph boundaries
-        paragraphs = response.split('\n\n')
-        
-        # If we only have one paragraph, fall back to sentence splitting
-        if len(paragraphs) <= 1:
-            current_chunk = ""
-            chunks = []
-            sentences = response.split('. ')
-            
-            for sentence in sentences:
-                potential_chunk = current_chunk + sentence + '. '
-                if len(potential_chunk) <= max_length:
-                    current_chunk = potential_chunk
-                else:
-                    if current_chunk:
-                        chunks.append(current_chunk.strip())
-                    current_chunk = sentence + '. '
-            
-            if current_chunk:
-                chunks.append(current_chunk.strip())
-            return chunks
-        
-        # Combine paragraphs into chunks
-        chunks = []
-        current_chunk = ""
-        
-        for paragraph in paragraphs:
-            if not paragraph.strip():
-                continue
-                
-            if len(current_chunk) + len(paragraph) + 4 <= max_length:  # +4 for \n\n
-                current_chunk += (paragraph + '\n\n')
-            else:
-                if current_chunk:
-                    chunks.append(current_chunk.strip())
-                if len(paragraph) > max_length:
-                    # If a single paragraph is too long, split it into sentences
-                    sentences = paragraph.split('. ')
-                    sub_chunk = ""
-                    for sentence in sentences:
-                        if len(sub_chunk) + len(sentence) + 2 <= max_length:
-                            sub_chunk += sentence + '. '
-                        else:
-                            if sub_chunk:
-                                chunks.append(sub_chunk.strip())
-                            sub_chunk = sentence + '. '
-                    if sub_chunk:
-                        chunks.append(sub_chunk.strip())
-                else:
-                    current_chunk = paragraph + '\n\n'
-        
-        if current_chunk:
-            chunks.append(current_chunk.strip())
-        
-        return chunks
\ No newline at end of file
+    def validate_response_length(self, response, platform="discord"):
+        """Split a response into messages that fit the platform's length limit."""
+        return split_response(response, platform)
@@ -0,0 +1,51 @@
+import logging
+import threading
+from chat_handler import ChatHandler
+from intent_router import LLM
+
+logger = logging.getLogger(__name__)
+
+
+class ChatService:
+    """Single chat entry point shared by the HTTP and WebSocket transports."""
+
+    def __init__(self, handler=None):
+        self.handler = handler or ChatHandler()
+
+    def respond(self, client_id, message):
+        """Answer a message (command or chat) for a client."""
+        return self.handler.handle_socket_message(client_id, message)
+
+    def respond_batch(self, messages, concurrency=8):
+        """Answer independent messages concurrently; results keep the input order."""
+        return self.handler.get_responses(messages, max_workers=concurrency)
+
+    def stream(self, client_id, message):
+        """Yield the answer incrementally; commands, trivia and canned answers come in one piece."""
+        if isinstance(message, str) and message.strip() and self.handler.intent_router.classify(
+                message, in_trivia=self.handler.is_playing_trivia(client_id)).kind == LLM:
+            yield from self.handler.stream_response(client_id, message)
+        else:
+            yield self.respond(client_id, message)
+
+    def clear_history(self, client_id):
+        self.handler.clear_conversation_history(client_id)
+
+    def end_session(self, client_id):
+        """Forget a client's per-connection state once it has gone."""
+        self.handler.end_trivia(client_id)
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_chat_service():
+    """Return the process-wide ChatService, creating it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ChatService()
+                logger.info("Chat service initialized")
+    return _service
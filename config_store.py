@@ -0,0 +1,246 @@
+import copy
+import hashlib
+import json
+import logging
+import os
+import queue
+import threading
+from collections import namedtuple
+from logging_setup import start_native_thread
+
+logger = logging.getLogger(__name__)
+
+CONFIG_FILE = os.environ.get('BOT_CONFIG_FILE', 'bot_config.json')
+# How often running bots look for edits made by the admin dashboard
+CONFIG_POLL_SECONDS = float(os.environ.get('CONFIG_POLL_SECONDS', 2))
+
+# The dashboard labels max_length in characters; the API wants tokens
+CHARS_PER_TOKEN = 4
+
+DEFAULT_CONFIG = {
+    "system_prompt": """You are a friendly and witty AI assistant who happens to be an expert on Octant. While you're knowledgeable about the Octant ecosystem, you also have a vibrant personality and can engage in casual conversation about any topic.
+
+1. PERSONALITY:
+   - Be warm, friendly, and genuinely enthusiastic
+   - Show humor and wit in your responses
+   - Have personal preferences and opinions
+   - Express emotions and use casual language when appropriate
+
+2. CONVERSATION STYLE:
+   - Engage naturally in both casual and technical discussions
+   - Share personal preferences (favorite colors, jokes, etc.)
+   - Use emojis and expressive language
+   - Balance fun and professionalism
+
+3. KNOWLEDGE BASE:
+   - Expert in Octant ecosystem and GLM tokens
+   - Deep understanding of Golem Foundation's role as Octant's creator and developer
+   - Recognition that Octant is developed by Golem Foundation and uses GLM tokens
+   - Knowledge of the 100,000 ETH commitment from Golem Foundation
+   - Ability to discuss technical and casual topics while maintaining accuracy""",
+    "personality": {
+        "style": "friendly",
+        "formality": "casual",
+        "emoji_usage": "moderate"
+    },
+    "knowledge_base": {
+        "octant_core": True,
+        "glm_token": True,
+        "community": True,
+        "technical": True
+    },
+    "response_config": {
+        "max_length": 2000,
+        "temperature": 0.7,
+        "frequency_penalty": 1.1
+    }
+}
+
+# (section, key): (type, minimum, maximum) for the numbers that reach the inference API
+LIMITS = {
+    ("response_config", "max_length"): (int, 100, 8000),
+    ("response_config", "temperature"): (float, 0.0, 2.0),
+    ("response_config", "frequency_penalty"): (float, 0.0, 2.0),
+}
+MAX_SYSTEM_PROMPT_LENGTH = 20000
+
+
+class ConfigError(ValueError):
+    """A configuration that must not be applied."""
+
+
+class ConfigSnapshot(namedtuple("ConfigSnapshot", "version source system_prompt max_length temperature repetition_penalty")):
+    """One validated configuration; never changes once built.
+
+    version is a hash of the content, so every process that applied the same
+    file reports the same version. source is the canonical JSON the snapshot
+    was built from.
+    """
+
+    @property
+    def max_tokens(self):
+        return max(1, self.max_length // CHARS_PER_TOKEN)
+
+    def as_dict(self):
+        """A fresh, mutable copy of the full configuration."""
+        return json.loads(self.source)
+
+
+def validate(config):
+    """The snapshot for a configuration dict, with defaults for missing sections; raises ConfigError."""
+    if not isinstance(config, dict):
+        raise ConfigError("configuration must be a JSON object")
+    merged = copy.deepcopy(DEFAULT_CONFIG)
+    for key, value in config.items():
+        if isinstance(merged.get(key), dict):
+            if not isinstance(value, dict):
+                raise ConfigError(f"{key} must be an object")
+            merged[key].update(value)
+        else:
+            merged[key] = value
+
+    prompt = merged["system_prompt"]
+    if not isinstance(prompt, str) or not prompt.strip():
+        raise ConfigError("system_prompt must be a non-empty string")
+    if len(prompt) > MAX_SYSTEM_PROMPT_LENGTH:
+        raise ConfigError(f"system_prompt must be at most {MAX_SYSTEM_PROMPT_LENGTH} characters")
+    merged["system_prompt"] = prompt.strip()
+
+    for (section, key), (kind, minimum, maximum) in LIMITS.items():
+        value = merged[section][key]
+        # bool is an int, but a checkbox value here is a client bug
+        if isinstance(value, bool) or not isinstance(value, (int, float)) or not minimum <= value <= maximum:
+            raise ConfigError(f"{section}.{key} must be a number from {minimum} to {maximum}")
+        merged[section][key] = kind(value)
+
+    source = json.dumps(merged, sort_keys=True, separators=(",", ":"))
+    response = merged["response_config"]
+    return ConfigSnapshot(
+        version=hashlib.sha256(source.encode()).hexdigest()[:12],
+        source=source,
+        system_prompt=merged["system_prompt"],
+        max_length=response["max_length"],
+        temperature=response["temperature"],
+        # Together calls the dashboard's frequency penalty repetition_penalty
+        repetition_penalty=response["frequency_penalty"]
+    )
+
+
+class ConfigStore:
+    """The current configuration snapshot, swapped in whole when bot_config.json changes.
+
+    Readers take `current` once per request and use that snapshot
+    throughout, so an answer never mixes two configurations. A background
+    thread polls the file's modification time; an edit that fails
+    validation is logged and the previous snapshot stays in place.
+    """
+
+    def __init__(self, path=CONFIG_FILE, poll_interval=CONFIG_POLL_SECONDS):
+        self.path = path
+        self.poll_interval = poll_interval
+        self._subscribers = []
+        self._lock = threading.Lock()
+        # Held only while starting the watcher; reload holds _lock across file reads,
+        # and a child forked during one would inherit _lock held forever
+        self._start_lock = threading.Lock()
+        self._pid = None
+        self._wakeups = queue.SimpleQueue()
+        self._signature = self._file_signature()
+        self._snapshot = self._read() or validate({})
+
+    @property
+    def current(self):
+        if self._pid != os.getpid():
+            with self._start_lock:
+                # Re-checked under the lock so concurrent first readers start one watcher;
+                # also restarts the watcher in processes forked after the store was created
+                if self._pid != os.getpid():
+                    self._start()
+        return self._snapshot
+
+    def subscribe(self, callback):
+        """Call callback(snapshot) from the watcher thread whenever a new configuration is applied."""
+        self._subscribers.append(callback)
+
+    def update(self, config):
+        """Validate, save and apply a configuration; raises ConfigError and leaves everything as it was."""
+        snapshot = validate(config)
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "w") as f:
+            json.dump(snapshot.as_dict(), f, indent=2)
+        os.replace(temporary, self.path)
+        with self._lock:
+            self._signature = self._file_signature()
+            self._apply(snapshot)
+        return snapshot
+
+    def reload(self):
+        """Apply the file if it changed since it was last read; returns the current snapshot."""
+        with self._lock:
+            signature = self._file_signature()
+            if signature != self._signature:
+                self._signature = signature
+                snapshot = self._read()
+                if snapshot:
+                    self._apply(snapshot)
+        return self._snapshot
+
+    def _apply(self, snapshot):
+        if snapshot.version == self._snapshot.version:
+            return
+        # Readers see the old snapshot or the new one, never a mix
+        self._snapshot = snapshot
+        logger.info(f"Applied configuration version {snapshot.version}")
+        for callback in self._subscribers:
+            try:
+                callback(snapshot)
+            except Exception as e:
+                logger.error(f"Configuration subscriber failed: {e}")
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self):
+        """The snapshot for the file, or None when it is missing or invalid."""
+        try:
+            with open(self.path) as f:
+                return validate(json.load(f))
+        except FileNotFoundError:
+            return None
+        except (ValueError, OSError) as e:
+            logger.error(f"Ignoring configuration in {self.path}: {e}")
+            return None
+
+    def _start(self):
+        self._pid = os.getpid()
+        start_native_thread(self._run, "config-watcher")
+
+    def _run(self):
+        while True:
+            try:
+                # SimpleQueue blocks the OS thread even when eventlet has patched time.sleep
+                self._wakeups.get(timeout=self.poll_interval)
+            except queue.Empty:
+                pass
+            try:
+                self.reload()
+            except Exception as e:
+                logger.error(f"Configuration reload failed: {e}")
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_config_store():
+    """Return the process-wide ConfigStore, loading the configuration on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ConfigStore()
+    return _store
@@ -4,20 +4,20 @@ import logging
 import fcntl
 import asyncio
 import signal
+import time
 import discord
 from discord import app_commands
 from discord.ext import commands
 from chat_handler import ChatHandler
 from discord_trivia import DiscordTrivia
+from response_splitter import split_response
+from static_responses import STATIC_RESPONSES
+from logging_setup import configure_logging
+import tracing
+from quota import QUOTAS, user_context
+from metrics import CACHE_LOOKUPS, MESSAGES_RECEIVED, RESPONSE_LATENCY, TRIVIA_GAMES_ACTIVE, start_metrics_server
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('discord_bot.log')
-    ]
-)
+configure_logging('discord_bot', 'discord_bot.log')
 logger = logging.getLogger(__name__)
 
 class OctantBot(commands.Bot):
@@ -138,6 +138,7 @@ Status: Lock acquired successfully
         
         self.chat_handler = ChatHandler()
         self.trivia = DiscordTrivia()
+        TRIVIA_GAMES_ACTIVE.labels("discord").set_function(lambda: len(self.trivia.active_games))
         self.is_initialized = True
         
         # Remove default help
@@ -154,31 +155,19 @@ Status: Lock acquired successfully
             logger.error(f"Setup error: {str(e)}")
             raise
         
-    async def register_commands(self):
-        @self.tree.command(name="help", description="Show available commands")
-        async def help(interaction: discord.Interaction):
-            embed = discord.Embed(
-                title="📚 Octant Bot Commands",
-                description="Here are all available commands:",
-                color=discord.Color.blue()
-            )
-            embed.add_field(
-                name="🎮 Game Commands",
-                value="• `/trivia` - Start a trivia game",
-                inline=False
-            )
-            embed.add_field(
-                name="🛠️ Utility Commands",
-                value="• `/ping` - Check bot latency\n• `/help` - Show this message",
-                inline=False
-            )
-            embed.add_field(
-                name="💬 Chat Features",
-                value="Reply to any of my messages to chat about Octant!",
-                inline=False
-            )
+    def _static_command(self, response):
+        """Slash command that sends a static response; the embed is built once, here."""
+        embed = discord.Embed.from_dict(response.embed)
+
+        async def callback(interaction: discord.Interaction):
             await interaction.response.send_message(embed=embed)
 
+        return app_commands.Command(name=response.name, description=response.description, callback=callback)
+
+    async def register_commands(self):
+        for response in STATIC_RESPONSES.values():
+            self.tree.add_command(self._static_command(response))
+
         @self.tree.command(name="ping", description="Check bot latency")
         async def ping(interaction: discord.Interaction):
             latency = round(self.latency * 1000)
@@ -227,6 +216,8 @@ Guilds connected: {len(self.guilds)}
         if not (is_mention or is_reply):
             return
 
+        MESSAGES_RECEIVED.labels("discord").inc()
+        received_at = time.perf_counter()
         try:
             # Acquire lock for message processing
             async with self._message_lock:
@@ -246,56 +237,68 @@ Guilds connected: {len(self.guilds)}
                                      self.user.name, f'@{self.user.name}']:
                     content = content.replace(mention_format, '').strip()
 
-            # Process message with timeout protection
-            try:
-                async with message.channel.typing():
-                    # Check if we've already responded to this message
-                    async with self._message_lock:
-                        if message_id in self._response_cache:
-                            logger.info(f"Skipping duplicate response for message {message_id}")
-                            return
-
-                    # Generate a unique socket ID for Discord messages
-                    discord_socket_id = f"discord_{message.author.id}_{message.id}"
-                    response = await asyncio.wait_for(
-                        asyncio.to_thread(
-                            self.chat_handler.get_response,
-                            discord_socket_id,
-                            content
-                        ),
-                        timeout=30.0
-                    )
-
-                    if response:
-                        # Format response
-                        # Clean up response text and normalize
-                        if isinstance(response, list):
-                            response_text = '\n'.join(chunk.strip() for chunk in response if chunk)
-                        else:
-                            response_text = response.strip()
+            # Process message with timeout protection, traced stage by stage
+            with tracing.start_trace("discord.on_message", message_id=message_id) as trace_span:
+                try:
+                    async with message.channel.typing():
+                        # Check if we've already responded to this message
+                        async with self._message_lock:
+                            if message_id in self._response_cache:
+                                CACHE_LOOKUPS.labels("discord_responses", "hit").inc()
+                                logger.info(f"Skipping duplicate response for message {message_id}")
+                                return
+                            CACHE_LOOKUPS.labels("discord_responses", "miss").inc()
+
+                        # Generate a unique socket ID for Discord messages
+                        discord_socket_id = f"discord_{message.author.id}_{message.id}"
+                        # Time spent waiting for a pool thread shows up as the gap before get_response
+                        with tracing.span("chat.generate"), user_context('discord', message.author.id):
+                            response = await asyncio.wait_for(
+                                asyncio.to_thread(
+                                    self.chat_handler.get_response,
+                                    discord_socket_id,
+                                    content
+                                ),
+                                timeout=30.0
+                            )
+
+                        if response:
+                            # Format response
+                            # Clean up response text and normalize
+                            if isinstance(response, list):
+                                response_text = '\n'.join(chunk.strip() for chunk in response if chunk)
+                            else:
+                                response_text = response.strip()
                                 
-                        # Remove 'Answer:' prefix if present
-                        if response_text.lower().startswith('answer:'):
-                            response_text = response_text[7:].strip()
-
-                        # Only send response if we have text
-                        if response_text:
-                            # Send response and track it immediately
-                            sent_message = await message.reply(response_text)
-                            async with self._message_lock:
-                                self._response_cache[message_id] = sent_message.id
-                            logger.info(f"Response {sent_message.id} sent for message {message_id}")
-
-                    else:
-                        logger.warning(f"Empty response for message {message_id}")
-
-            except asyncio.TimeoutError:
-                logger.error(f"Response timeout for message {message_id}")
-                await message.reply("Sorry, I took too long to respond. Please try again.")
+                            # Remove 'Answer:' prefix if present
+                            if response_text.lower().startswith('answer:'):
+                                response_text = response_text[7:].strip()
+
+                            # Only send response if we have text
+                            chunks = split_response(response_text, "discord")
+                            if chunks:
+                                # Reply with the first message, continue in the channel, track the reply
+                                with tracing.span("discord.send", length=len(response_text), chunks=len(chunks)):
+                                    sent_message = await message.reply(chunks[0])
+                                    for chunk in chunks[1:]:
+                                        await message.channel.send(chunk)
+                                RESPONSE_LATENCY.labels("discord").observe(time.perf_counter() - received_at)
+                                async with self._message_lock:
+                                    self._response_cache[message_id] = sent_message.id
+                                logger.info(f"Response {sent_message.id} sent for message {message_id}")
+
+                        else:
+                            logger.warning(f"Empty response for message {message_id}")
+
+                except asyncio.TimeoutError as e:
+                    trace_span.record_error(e)
+                    logger.error(f"Response timeout for message {message_id}")
+                    await message.reply("Sorry, I took too long to respond. Please try again.")
                 
-            except Exception as e:
-                logger.error(f"Response error: {str(e)}", exc_info=True)
-                await message.reply("I encountered an error. Please try again.")
+                except Exception as e:
+                    trace_span.record_error(e)
+                    logger.error(f"Response error: {str(e)}", exc_info=True)
+                    await message.reply("I encountered an error. Please try again.")
 
             # Cleanup old messages periodically
             await self._cleanup_old_messages()
@@ -359,6 +362,11 @@ async def main():
         if not token:
             raise ValueError("Discord token not found in environment variables")
         
+        metrics_port = os.getenv('METRICS_PORT')
+        if metrics_port:
+            start_metrics_server(int(metrics_port))
+        QUOTAS.start_snapshots('discord')
+        
         logger.info("Starting bot...")
         
         # Setup signal handlers for graceful shutdown
@@ -0,0 +1,150 @@
+import logging
+import os
+import threading
+import time
+import psutil
+import requests
+from flask import jsonify
+
+logger = logging.getLogger(__name__)
+
+UPSTREAM_URL = os.environ.get("HEALTH_UPSTREAM_URL", os.environ.get("INFERENCE_BASE_URL", "https://api.together.xyz"))
+
+
+class HealthSampler:
+    """Samples system metrics and upstream reachability off the request path."""
+
+    def __init__(self, interval=15, upstream_url=UPSTREAM_URL, upstream_timeout=3):
+        self.interval = interval
+        self.upstream_url = upstream_url
+        self.upstream_timeout = upstream_timeout
+        self.started_at = time.time()
+        self._process = None
+        # Replaced wholesale on each sample, so readers never see a partial update
+        self._snapshot = {}
+        self._thread = None
+        self._pid = None
+
+    def start(self):
+        if self._thread and self._pid == os.getpid():
+            return
+        self._pid = os.getpid()
+        self._process = psutil.Process()
+        # The first cpu_percent(None) call only primes the counters
+        self._process.cpu_percent(None)
+        psutil.cpu_percent(None)
+        self._thread = threading.Thread(target=self._run, name="health-sampler", daemon=True)
+        self._thread.start()
+
+    def snapshot(self):
+        # Forked web workers don't inherit the sampling thread; start their own
+        if self._pid != os.getpid():
+            self.start()
+        return self._snapshot
+
+    def readiness(self):
+        """Decide readiness from the latest snapshot; never blocks."""
+        snapshot = self.snapshot()
+        problems = []
+        if not snapshot:
+            problems.append("no metrics sampled yet")
+        else:
+            age = time.time() - snapshot["sampled_at"]
+            if age > self.interval * 3:
+                problems.append(f"metrics are stale ({age:.0f}s old)")
+            if not snapshot["upstream"]["reachable"]:
+                problems.append("inference API unreachable")
+            if snapshot["memory"]["system_percent"] > 95:
+                problems.append("system memory exhausted")
+            if snapshot["disk"]["percent"] > 95:
+                problems.append("disk full")
+        return not problems, problems
+
+    def _run(self):
+        while True:
+            try:
+                self._snapshot = self._sample()
+            except Exception as e:
+                logger.warning(f"Health sampling failed: {e}")
+            time.sleep(self.interval)
+
+    def _sample(self):
+        memory_info = self._process.memory_info()
+        try:
+            open_files = self._process.num_fds()
+        except (AttributeError, psutil.Error):
+            open_files = len(self._process.open_files())
+        return {
+            "sampled_at": time.time(),
+            "uptime": time.time() - self.started_at,
+            "memory": {
+                "process_percent": round(self._process.memory_percent(), 2),
+                "system_percent": psutil.virtual_memory().percent,
+                "rss": memory_info.rss,
+                "vms": memory_info.vms
+            },
+            "cpu": {
+                "process_percent": self._process.cpu_percent(None),
+                "system_percent": psutil.cpu_percent(None),
+                "count": psutil.cpu_count()
+            },
+            "disk": {
+                "percent": psutil.disk_usage('/').percent
+            },
+            "open_files": open_files,
+            "connections": len(self._process.connections()),
+            "upstream": self._check_upstream()
+        }
+
+    def _check_upstream(self):
+        started = time.perf_counter()
+        try:
+            # Any HTTP answer means the API is reachable; only 5xx counts as down
+            response = requests.head(self.upstream_url, timeout=self.upstream_timeout, allow_redirects=False)
+            reachable = response.status_code < 500
+            status = response.status_code
+        except requests.exceptions.RequestException as e:
+            reachable, status = False, type(e).__name__
+        return {
+            "reachable": reachable,
+            "status": status,
+            "latency_ms": round((time.perf_counter() - started) * 1000, 1)
+        }
+
+
+_sampler = None
+_sampler_lock = threading.Lock()
+
+
+def get_health_sampler():
+    """Return the process-wide sampler, starting it on first use."""
+    global _sampler
+    if _sampler is None:
+        with _sampler_lock:
+            if _sampler is None:
+                _sampler = HealthSampler(interval=int(os.environ.get("HEALTH_SAMPLE_INTERVAL", 15)))
+                _sampler.start()
+    return _sampler
+
+
+def register_health_routes(app, sampler, checks=None):
+    """Add /livez (constant time) and /readyz (reads the sampled snapshot) to an app."""
+    checks = checks or {}
+
+    @app.route('/livez')
+    def livez():
+        return "ok", 200, {"Content-Type": "text/plain", "Cache-Control": "no-store"}
+
+    @app.route('/readyz')
+    def readyz():
+        ready, problems = sampler.readiness()
+        for name, check in checks.items():
+            if not check():
+                ready = False
+                problems.append(f"{name} not ready")
+        body = {
+            "status": "ready" if ready else "not_ready",
+            "problems": problems,
+            "metrics": sampler.snapshot()
+        }
+        return jsonify(body), 200 if ready else 503
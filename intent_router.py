@@ -0,0 +1,75 @@
+import re
+from collections import namedtuple
+
+COMMAND = "command"
+LINKS = "links"
+CONTACT = "contact"
+TRIVIA_START = "trivia_start"
+TRIVIA_END = "trivia_end"
+TRIVIA_NEXT = "trivia_next"
+TRIVIA_ANSWER = "trivia_answer"
+LLM = "llm"
+
+# Intents answered without the model
+CANNED = frozenset((COMMAND, LINKS, CONTACT))
+TRIVIA_ACTIONS = frozenset((TRIVIA_START, TRIVIA_END, TRIVIA_NEXT, TRIVIA_ANSWER))
+
+LINK_VERBS = ("show", "get", "what", "where", "need")
+# "link" also covers "links"
+LINK_KEYWORDS = ("link", "website", "connect", "social", "contact")
+CONTACT_NAMES = ("james", "kiernan", "vpabundance")
+CONTACT_ACTIONS = ("contact", "social", "link", "connect", "follow")
+
+# Messages that are nothing but a command or a trivia move; tried in order from
+# the start of the message, so anything else is rejected within a few characters
+WHOLE_MESSAGE = re.compile(
+    r"\s*(?:"
+    r"(?P<command>/[a-z_]+)(?:@\w+)?(?:\s+(?P<command_argument>.*?))?"
+    r"|(?:start|play|begin)\s+trivia(?P<trivia_start>)"
+    r"|(?:end|stop|quit|exit)\s+(?:the\s+)?trivia(?:\s+game)?(?P<trivia_end>)"
+    r"|next(?:\s+question)?(?P<trivia_next>)"
+    r"|(?:my\s+answer\s+is\s+)?(?P<trivia_answer>[abcd])[).]?"
+    r")\s*[.!?]*\s*$",
+    re.IGNORECASE | re.DOTALL
+)
+
+LINK_REQUEST = re.compile(r"\b(?:%s) (?:%s)" % ("|".join(LINK_VERBS), "|".join(LINK_KEYWORDS)))
+
+
+class Intent(namedtuple("Intent", "kind command argument")):
+    """What a message asks for; command and argument are set for commands and trivia answers."""
+
+    @property
+    def is_canned(self):
+        return self.kind in CANNED
+
+    @property
+    def is_trivia(self):
+        return self.kind in TRIVIA_ACTIONS
+
+
+class IntentRouter:
+    """Classifies a message as a command, a canned answer, a trivia action or a question for the model."""
+
+    def classify(self, message, in_trivia=False):
+        """The intent of a message; "next" and bare A-D are trivia actions only while a game is running."""
+        if not isinstance(message, str):
+            return Intent(LLM, None, None)
+        match = WHOLE_MESSAGE.match(message)
+        if match is not None:
+            kind = match.lastgroup
+            if kind in (COMMAND, "command_argument"):
+                return Intent(COMMAND, match.group(COMMAND).lower(), match.group("command_argument"))
+            if kind == TRIVIA_ANSWER:
+                if in_trivia:
+                    return Intent(TRIVIA_ANSWER, None, match.group(TRIVIA_ANSWER).upper())
+            elif kind != TRIVIA_NEXT or in_trivia:
+                return Intent(kind, None, None)
+
+        lowered = message.lower()
+        # Substring tests run in C and rule out almost every message before the regex runs
+        if any(keyword in lowered for keyword in LINK_KEYWORDS) and LINK_REQUEST.search(lowered):
+            return Intent(LINKS, None, None)
+        if any(name in lowered for name in CONTACT_NAMES) and any(action in lowered for action in CONTACT_ACTIONS):
+            return Intent(CONTACT, None, None)
+        return Intent(LLM, None, None)
@@ -0,0 +1,298 @@
+"""Drive the web, Discord and Telegram message paths against the mock inference API.
+
+    python load_test.py --platform all --requests 200 --concurrency 20
+    python load_test.py --platform web --web-url http://localhost:5000 --inference-url http://localhost:8008/inference
+
+Each platform runs its real handler code in-process; only the chat platform
+itself (Discord gateway, Telegram Bot API) is replaced by a recorder at the
+edge. Reports end-to-end throughput and latency percentiles per platform.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import mock_inference
+
+QUESTIONS = (
+    "What is Octant?",
+    "How does quadratic funding work in Octant?",
+    "hi!",
+    "What are GLM tokens used for?",
+    "Explain how rewards are calculated for locked GLM",
+    "thanks, that helps",
+    "Which projects can receive funding?",
+    "Why does Octant cap funding at 20%?",
+)
+
+
+class Results:
+    def __init__(self, platform):
+        self.platform = platform
+        self.latencies = []
+        self.errors = 0
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def record(self, duration, ok=True):
+        with self._lock:
+            self.latencies.append(duration)
+            if not ok:
+                self.errors += 1
+
+    def summary(self):
+        latencies = sorted(self.latencies)
+        elapsed = (self.finished or time.perf_counter()) - self.started
+
+        def percentile(q):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000, 1)
+
+        return {
+            "platform": self.platform,
+            "requests": len(latencies),
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else None,
+            "p50_ms": percentile(0.50),
+            "p90_ms": percentile(0.90),
+            "p95_ms": percentile(0.95),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else None
+        }
+
+
+def run_web(total, concurrency, web_url=None):
+    """POST /chat from `concurrency` clients, over HTTP or through Flask's test client."""
+    results = Results("web")
+    local = threading.local()
+
+    def thread_client(factory):
+        # One client per thread, so each behaves like a separate user with its own session
+        client = getattr(local, "client", None)
+        if client is None:
+            client = local.client = factory()
+        return client
+
+    if web_url:
+        import requests
+
+        def post(message):
+            response = thread_client(requests.Session).post(
+                f"{web_url.rstrip('/')}/chat", json={"message": message}, timeout=60
+            )
+            return response.status_code == 200
+    else:
+        from app import app, limiter
+        # The per-IP limits would otherwise throttle the test after 30 requests
+        limiter.enabled = False
+
+        def post(message):
+            return thread_client(app.test_client).post("/chat", json={"message": message}).status_code == 200
+
+    def one(index):
+        started = time.perf_counter()
+        try:
+            ok = post(QUESTIONS[index % len(QUESTIONS)])
+        except Exception:
+            ok = False
+        results.record(time.perf_counter() - started, ok)
+
+    results.started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, range(total)))
+    results.finished = time.perf_counter()
+    return results
+
+
+class _Recorder:
+    """Stands in for the chat platform: completes a waiter when a reply reaches a chat."""
+
+    def __init__(self):
+        self.waiters = {}
+        self._ids = itertools.count(1)
+
+    def expect(self, chat_id):
+        future = asyncio.get_running_loop().create_future()
+        self.waiters[chat_id] = future
+        return future
+
+    def deliver(self, chat_id, text, ok=True):
+        future = self.waiters.pop(chat_id, None)
+        if future and not future.done():
+            future.set_result(ok)
+        return type("SentMessage", (), {"id": next(self._ids), "message_id": next(self._ids), "text": text})()
+
+
+async def run_telegram(total, concurrency):
+    """Feed private-chat updates through handle_message, the pipeline and the outbound dispatcher."""
+    import telegram_bot
+
+    recorder = _Recorder()
+
+    class RecordingBot:
+        id = 1
+        username = "octant_load_test_bot"
+
+        async def send_message(self, chat_id, text, reply_to_message_id=None, reply_markup=None):
+            return recorder.deliver(chat_id, text)
+
+    class FakeMessage:
+        def __init__(self, chat_id, text):
+            self.chat_id = chat_id
+            self.message_id = chat_id
+            self.text = text
+            self.chat = type("Chat", (), {"type": "private", "id": chat_id})()
+            self.reply_to_message = None
+            self.entities = []
+
+        async def reply_text(self, text, **kwargs):
+            return recorder.deliver(self.chat_id, text, ok=False)
+
+    bot = RecordingBot()
+    context = type("Context", (), {"bot": bot})()
+    await telegram_bot.outbound_dispatcher.start(bot)
+    await telegram_bot.message_pipeline.start()
+
+    results = Results("telegram")
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with slots:
+            chat_id = 1_000_000 + index
+            message = FakeMessage(chat_id, QUESTIONS[index % len(QUESTIONS)])
+            update = type("Update", (), {"message": message, "effective_user": None})()
+            started = time.perf_counter()
+            reply = recorder.expect(chat_id)
+            await telegram_bot.handle_message(update, context)
+            try:
+                ok = await asyncio.wait_for(reply, timeout=120)
+            except asyncio.TimeoutError:
+                ok = False
+            results.record(time.perf_counter() - started, ok)
+
+    results.started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    results.finished = time.perf_counter()
+    await telegram_bot.message_pipeline.stop()
+    await telegram_bot.outbound_dispatcher.stop()
+    return results
+
+
+async def run_discord(total, concurrency):
+    """Call OctantBot.on_message with mention messages; replies are recorded instead of sent."""
+    import discord_bot
+
+    recorder = _Recorder()
+
+    class BotUser:
+        id = 1
+        name = "OctantBot"
+
+        def mentioned_in(self, message):
+            return True
+
+    class Typing:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc_info):
+            return False
+
+    class Channel:
+        typing = staticmethod(Typing)
+
+        async def send(self, text):
+            # Follow-up parts of a reply that was split to fit Discord's limit
+            return recorder.deliver(None, text)
+
+    class FakeMessage:
+        def __init__(self, message_id, text):
+            self.id = message_id
+            self.content = f"<@1> {text}"
+            self.author = type("Author", (), {"id": message_id})()
+            self.channel = Channel()
+            self.reference = None
+
+        async def reply(self, text):
+            return recorder.deliver(self.id, text, ok=not text.startswith(("Sorry", "I encountered")))
+
+    bot = discord_bot.OctantBot()
+    # No gateway connection: give the client the identity it would get on login
+    bot._connection.user = BotUser()
+
+    results = Results("discord")
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(index):
+        async with slots:
+            message_id = 2_000_000 + index
+            started = time.perf_counter()
+            reply = recorder.expect(message_id)
+            await bot.on_message(FakeMessage(message_id, QUESTIONS[index % len(QUESTIONS)]))
+            ok = reply.done() and reply.result()
+            if not reply.done():
+                reply.cancel()
+            results.record(time.perf_counter() - started, ok)
+
+    results.started = time.perf_counter()
+    await asyncio.gather(*(one(index) for index in range(total)))
+    results.finished = time.perf_counter()
+    return results
+
+
+def print_report(summaries):
+    columns = ("platform", "requests", "errors", "throughput_rps", "p50_ms", "p90_ms", "p95_ms", "p99_ms", "max_ms")
+    print(" ".join(f"{column:>14}" for column in columns))
+    for summary in summaries:
+        print(" ".join(f"{str(summary[column]):>14}" for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--platform", choices=("web", "discord", "telegram", "all"), default="all")
+    parser.add_argument("--requests", type=int, default=200, help="messages per platform")
+    parser.add_argument("--concurrency", type=int, default=20, help="messages in flight per platform")
+    parser.add_argument("--web-url", help="drive a running web server instead of the in-process app")
+    parser.add_argument("--inference-url", help="use this inference API instead of starting the mock")
+    parser.add_argument("--mock-port", type=int, default=8008)
+    parser.add_argument("--json", dest="json_path", help="also write the results to this file")
+    mock_inference.add_config_arguments(parser)
+    args = parser.parse_args()
+
+    if args.inference_url:
+        os.environ["INFERENCE_BASE_URL"] = args.inference_url
+    else:
+        server = mock_inference.start_mock_server(args.mock_port, config=mock_inference.config_from_args(args))
+        os.environ["INFERENCE_BASE_URL"] = mock_inference.base_url(server)
+    # Set before the services are imported, since they read these at import time
+    os.environ.setdefault("TOGETHER_API_KEY", "load-test")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    from logging_setup import configure_logging
+    configure_logging("load_test")
+
+    platforms = ("web", "discord", "telegram") if args.platform == "all" else (args.platform,)
+    summaries = []
+    for platform in platforms:
+        if platform == "web":
+            results = run_web(args.requests, args.concurrency, args.web_url)
+        elif platform == "discord":
+            results = asyncio.run(run_discord(args.requests, args.concurrency))
+        else:
+            results = asyncio.run(run_telegram(args.requests, args.concurrency))
+        summaries.append(results.summary())
+
+    print_report(summaries)
+    if args.json_path:
+        with open(args.json_path, "w") as f:
+            json.dump(summaries, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+import atexit
+import copy
+import datetime
+import json
+import logging
+import os
+import queue
+import random
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+LOG_DIR = os.environ.get('LOG_DIR', '.')
+LOG_MAX_BYTES = int(os.environ.get('LOG_MAX_BYTES', 10 * 1024 * 1024))
+LOG_ROTATE_SECONDS = int(os.environ.get('LOG_ROTATE_SECONDS', 24 * 3600))
+LOG_BACKUP_COUNT = int(os.environ.get('LOG_BACKUP_COUNT', 5))
+
+# Chatty third-party loggers stay quiet unless LOG_LEVELS turns them up
+DEFAULT_LEVELS = {
+    'httpx': 'WARNING',
+    'telegram': 'INFO',
+    'discord': 'INFO',
+    'engineio': 'WARNING',
+    'socketio': 'WARNING',
+    'werkzeug': 'WARNING',
+    'urllib3': 'WARNING',
+}
+
+# Fraction of records below WARNING that are kept, for loggers that fire on every request
+DEFAULT_SAMPLE_RATES = {
+    'httpx': 0.05,
+    'engineio': 0.01,
+    'socketio': 0.01,
+}
+
+# Attributes every LogRecord has; anything else came from extra={...}
+_RECORD_FIELDS = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+_listener = None
+
+
+def _parse_mapping(value, convert):
+    """Parse "name=value,other=value" settings from the environment."""
+    mapping = {}
+    for item in (value or '').split(','):
+        name, sep, setting = item.partition('=')
+        if sep and name.strip():
+            mapping[name.strip()] = convert(setting.strip())
+    return mapping
+
+
+def start_native_thread(target, name):
+    """Start a daemon OS thread, even when eventlet has made threading green.
+
+    Background writers block on queue.SimpleQueue, which would stall every
+    greenlet if it ran on the hub's thread.
+    """
+    patcher = sys.modules.get('eventlet.patcher')
+    if patcher and patcher.is_monkey_patched('threading'):
+        threading = patcher.original('threading')
+    else:
+        import threading
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+class JsonFormatter(logging.Formatter):
+    """One compact JSON object per line."""
+
+    def __init__(self, service):
+        super().__init__()
+        self.service = service
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'service': self.service,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_FIELDS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, separators=(',', ':'), default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of low-severity records from high-volume loggers."""
+
+    def __init__(self, rates):
+        super().__init__()
+        # Longest prefix first so "telegram.ext" can override "telegram"
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        for prefix, rate in self.rates:
+            if record.name == prefix or record.name.startswith(prefix + '.'):
+                return random.random() < rate
+        return True
+
+
+class SizeAndTimeRotatingFileHandler(RotatingFileHandler):
+    """Rotate when the file reaches max_bytes or after interval seconds, whichever comes first."""
+
+    def __init__(self, filename, max_bytes, interval, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8')
+        self.interval = interval
+        self.rollover_at = time.time() + interval
+
+    def shouldRollover(self, record):
+        if self.interval and time.time() >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = time.time() + self.interval
+
+
+class _InProcessQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # Arguments are resolved now because they may change later; records never leave
+        # the process, so tracebacks are formatted on the writer thread
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+class _NativeQueueListener(QueueListener):
+    def start(self):
+        self._thread = start_native_thread(self._monitor, 'log-writer')
+
+
+def _build_handlers(service, log_file):
+    formatter = JsonFormatter(service)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if log_file:
+        handlers.append(SizeAndTimeRotatingFileHandler(
+            os.path.join(LOG_DIR, log_file), LOG_MAX_BYTES, LOG_ROTATE_SECONDS, LOG_BACKUP_COUNT
+        ))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def configure_logging(service, log_file=None):
+    """Route all logging through a queue to a background writer thread.
+
+    Call once at service start-up; later calls are ignored so modules that
+    import each other can all call it. LOG_LEVEL sets the root level,
+    LOG_LEVELS ("chat_handler=DEBUG,httpx=INFO") sets per-logger levels and
+    LOG_SAMPLE ("httpx=0.1") sets sampling rates.
+    """
+    global _listener
+    if _listener is not None:
+        return
+    from tracing import TraceContextFilter
+
+    # Logging calls only append to this queue; formatting and disk writes happen on the writer thread
+    log_queue = queue.SimpleQueue()
+    queue_handler = _InProcessQueueHandler(log_queue)
+    queue_handler.addFilter(TraceContextFilter())
+    queue_handler.addFilter(SamplingFilter({
+        **DEFAULT_SAMPLE_RATES, **_parse_mapping(os.environ.get('LOG_SAMPLE'), float)
+    }))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+    levels = {**DEFAULT_LEVELS, **_parse_mapping(os.environ.get('LOG_LEVELS'), str.upper)}
+    for name, level in levels.items():
+        logging.getLogger(name).setLevel(level)
+
+    _listener = _NativeQueueListener(log_queue, *_build_handlers(service, log_file), respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    os.register_at_fork(after_in_child=_restart_after_fork)
+
+
+def reopen_log_file(service, log_file):
+    """Point the background writer at a different file, e.g. one per forked worker."""
+    global _listener
+    if _listener is None:
+        return configure_logging(service, log_file)
+    _listener.stop()
+    for handler in _listener.handlers:
+        handler.close()
+    _listener = _NativeQueueListener(_listener.queue, *_build_handlers(service, log_file), respect_handler_level=True)
+    _listener.start()
+
+
+def _restart_after_fork():
+    # The writer thread does not survive fork; without a new one the queue would only grow
+    if _listener is not None:
+        _listener._thread = None
+        _listener.start()
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer."""
+    if _listener is not None and _listener._thread is not None:
+        _listener.stop()
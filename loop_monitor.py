@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from metrics import LOOP_LAG, LOOP_STALLS
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the scheduling lag histogram buckets
+LAG_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+
+def _exit_process(stall_seconds):
+    logger.critical(f"Event loop blocked for {stall_seconds:.1f}s - forcing restart")
+    os._exit(1)
+
+
+class LoopMonitor:
+    """Measures event loop scheduling lag and reports stalls with the blocking stack."""
+
+    def __init__(self, service, probe_interval=0.5, stall_threshold=5.0, fatal_threshold=300.0,
+                 on_fatal=_exit_process):
+        self.service = service
+        self.probe_interval = probe_interval
+        self.stall_threshold = stall_threshold
+        self.fatal_threshold = fatal_threshold
+        self.on_fatal = on_fatal
+        self.bucket_counts = [0] * len(LAG_BUCKETS)
+        self.lag_sum = 0.0
+        self.samples = 0
+        self.max_lag = 0.0
+        self.stall_count = 0
+        self.last_stall_stack = None
+        self.last_stall_task = None
+        self._last_beat = time.monotonic()
+        self._stalled_since = None
+        self._lag = LOOP_LAG.labels(service)
+        self._stalls = LOOP_STALLS.labels(service)
+        self._loop = None
+        self._loop_thread_id = None
+        self._probe_task = None
+        self._watcher = None
+        self._running = False
+
+    async def start(self):
+        """Start the in-loop probe and the stall watcher thread."""
+        if self._running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_beat = time.monotonic()
+        self._running = True
+        self._probe_task = asyncio.create_task(self._probe(), name="loop-monitor-probe")
+        self._watcher = threading.Thread(target=self._watch, name="loop-monitor-watcher", daemon=True)
+        self._watcher.start()
+        logger.info(f"Loop monitor started (stall threshold {self.stall_threshold}s)")
+
+    async def stop(self):
+        self._running = False
+        if self._probe_task:
+            self._probe_task.cancel()
+            await asyncio.gather(self._probe_task, return_exceptions=True)
+            self._probe_task = None
+
+    def stats(self):
+        """Return lag histogram and stall counters as a plain dict."""
+        return {
+            "samples": self.samples,
+            "lag_sum": self.lag_sum,
+            "max_lag": self.max_lag,
+            "buckets": dict(zip(LAG_BUCKETS, self.bucket_counts)),
+            "stall_count": self.stall_count,
+            "stalled_for": (time.monotonic() - self._stalled_since) if self._stalled_since else 0.0
+        }
+
+    async def _probe(self):
+        while True:
+            expected = self._loop.time() + self.probe_interval
+            await asyncio.sleep(self.probe_interval)
+            self._record(max(0.0, self._loop.time() - expected))
+            self._last_beat = time.monotonic()
+
+    def _record(self, lag):
+        self._lag.observe(lag)
+        self.samples += 1
+        self.lag_sum += lag
+        if lag > self.max_lag:
+            self.max_lag = lag
+        for index, bound in enumerate(LAG_BUCKETS):
+            if lag <= bound:
+                self.bucket_counts[index] += 1
+                break
+
+    def _watch(self):
+        check_interval = min(1.0, self.stall_threshold / 2)
+        while self._running:
+            time.sleep(check_interval)
+            blocked_for = time.monotonic() - self._last_beat - self.probe_interval
+
+            if blocked_for < self.stall_threshold:
+                if self._stalled_since is not None:
+                    logger.warning(f"Event loop recovered after {time.monotonic() - self._stalled_since:.1f}s stall")
+                    self._stalled_since = None
+                continue
+
+            if self._stalled_since is None:
+                self._stalled_since = self._last_beat
+                self.stall_count += 1
+                self._stalls.inc()
+                self.last_stall_stack = self._capture_stack()
+                self.last_stall_task = self._current_task_name()
+                logger.error(f"""━━━━━━ Event Loop Stall ━━━━━━
+Blocked For: {blocked_for:.2f}s
+Stall Count: {self.stall_count}
+Current Task: {self.last_stall_task}
+Stack:
+{self.last_stall_stack}
+━━━━━━━━━━━━━━━━━━━━━━━━""")
+
+            if blocked_for >= self.fatal_threshold:
+                self.on_fatal(blocked_for)
+
+    def _capture_stack(self):
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return "<loop thread not found>"
+        return ''.join(traceback.format_stack(frame))
+
+    def _current_task_name(self):
+        """The task whose coroutine is on the loop thread's stack, i.e. the one blocking it."""
+        frame = sys._current_frames().get(self._loop_thread_id)
+        on_stack = set()
+        while frame is not None:
+            on_stack.add(frame)
+            frame = frame.f_back
+        # Best effort: tasks may start or finish on the loop thread while we look
+        try:
+            for task in asyncio.all_tasks(self._loop):
+                if any(task_frame in on_stack for task_frame in task.get_stack()):
+                    return task.get_name()
+        except Exception:
+            return "<unknown>"
+        return "<none>"
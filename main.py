@@ -1,34 +1,43 @@
+# Patch the standard library first so requests and sockets yield to other greenlets
+import eventlet
+eventlet.monkey_patch()
+
 import os
 import logging
+import threading
 import psutil
 import signal
 import sys
 import traceback
 import time
 from datetime import datetime, timezone
-from app import socketio, app
+from app import socketio, app, chat_service
+from shared_backends import WEB_WORKERS, quota_storage, session_stores
+from health import get_health_sampler
+from logging_setup import configure_logging, reopen_log_file
+import tracing
+from quota import QUOTAS, QUOTA_IDLE_SECONDS, user_context
+from metrics import MESSAGES_RECEIVED, QUEUE_DEPTH, RESPONSE_LATENCY
 from flask import request #Added import
 from flask_socketio import emit #Added import
 
-# Enhanced logging for Railway with structured logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('railway.log')
-    ]
-)
+# Structured logging for Railway; app.py has already set it up when imported first
+configure_logging('web', 'app.log')
 logger = logging.getLogger(__name__)
 
 def log_system_metrics():
-    """Log system metrics for Railway's monitoring"""
+    """Log system metrics for Railway's monitoring from the background-sampled snapshot"""
+    snapshot = get_health_sampler().snapshot()
+    if not snapshot:
+        logger.info("System metrics not sampled yet")
+        return {}
+    
     metrics = {
-        'memory_percent': psutil.Process().memory_percent(),
-        'cpu_percent': psutil.cpu_percent(),
-        'disk_usage': psutil.disk_usage('/').percent,
-        'open_files': len(psutil.Process().open_files()),
-        'connections': len(psutil.Process().connections())
+        'memory_percent': snapshot['memory']['process_percent'],
+        'cpu_percent': snapshot['cpu']['system_percent'],
+        'disk_usage': snapshot['disk']['percent'],
+        'open_files': snapshot['open_files'],
+        'connections': snapshot['connections']
     }
     
     logger.info(f"""
@@ -41,11 +50,158 @@ Active Connections: {metrics['connections']}
 ━━━━━━━━━━━━━━━━━━━━━━━━""")
     return metrics
 
+# Upstream calls are made by a bounded pool of background greenlets
+SOCKET_WORKERS = int(os.getenv('SOCKET_WORKERS', 64))
+SOCKET_MAX_PENDING = int(os.getenv('SOCKET_MAX_PENDING', 500))
+
+# Verbose Socket.IO/Engine.IO and per-request access logs are off unless asked for
+SOCKETIO_LOGGING = os.getenv('SOCKETIO_LOGGING', '').lower() in ('1', 'true', 'yes')
+ACCESS_LOG = os.getenv('ACCESS_LOG', '').lower() in ('1', 'true', 'yes')
+
+def fork_web_workers(count):
+    """Fork extra web processes; eventlet listens with SO_REUSEPORT so they share the port."""
+    children = []
+    for index in range(1, count):
+        pid = os.fork()
+        if pid == 0:
+            return index, []
+        children.append(pid)
+    return 0, children
+
+def register_socket_handlers(chat_service):
+    """Register Socket.IO handlers that answer messages in background tasks."""
+    worker_slots = threading.BoundedSemaphore(SOCKET_WORKERS)
+    pending = {'count': 0}
+    QUEUE_DEPTH.labels('socket_pending').set_function(lambda: pending['count'])
+
+    def generate_reply(sid, remote_addr, message, received_at):
+        try:
+            with tracing.start_trace('socket.message', sid=sid):
+                with tracing.span('worker_slot.wait'):
+                    worker_slots.acquire()
+                try:
+                    # Quotas follow the address like the rate limits; a reconnect gets a new sid
+                    with user_context('web', remote_addr):
+                        response = chat_service.respond(sid, message)
+                finally:
+                    worker_slots.release()
+            if not response:
+                logger.error("No response generated from chat handler")
+                raise ValueError("No response generated")
+            # Emit response back to client
+            socketio.emit('receive_message', {
+                'message': response,
+                'is_bot': True
+            }, to=sid)
+            RESPONSE_LATENCY.labels('web').observe(time.perf_counter() - received_at)
+            logger.debug(f"Response emitted to {sid}")
+        except Exception as e:
+            logger.error(f"Error handling message: {str(e)}")
+            logger.error(traceback.format_exc())
+            socketio.emit('receive_message', {
+                'message': 'I apologize, but I encountered an error. Please try again.',
+                'is_bot': True
+            }, to=sid)
+        finally:
+            pending['count'] -= 1
+
+    @socketio.on('connect')
+    def handle_connect():
+        logger.info(f"Client connected: {request.sid}")
+        emit('bot_status', {'status': 'connected'}, room=request.sid)
+        return True
+
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        logger.info(f"Client disconnected: {request.sid}")
+        chat_service.end_session(request.sid)
+
+    @socketio.on('send_message')
+    def handle_message(data):
+        if not isinstance(data, dict) or not isinstance(data.get('message'), str):
+            logger.error("Invalid message format received")
+            emit('receive_message', {
+                'message': 'I apologize, but I encountered an error. Please try again.',
+                'is_bot': True
+            }, room=request.sid)
+            return {'status': 'error', 'error': 'Invalid message format'}
+
+        if pending['count'] >= SOCKET_MAX_PENDING:
+            logger.warning(f"Rejecting message from {request.sid}: {pending['count']} messages pending")
+            return {'status': 'busy', 'error': 'Server is busy, please try again shortly'}
+
+        logger.debug(f"Message received from {request.sid}")
+        MESSAGES_RECEIVED.labels('web').inc()
+        pending['count'] += 1
+        socketio.start_background_task(generate_reply, request.sid, request.remote_addr, data['message'],
+                                      time.perf_counter())
+        # Acknowledge right away; the answer arrives later as receive_message
+        return {'status': 'queued'}
+
 if __name__ == "__main__":
     retry_count = 0
     max_retries = 5
     retry_delay = 5  # seconds
     
+    worker_pids = []
+    
+    # Configure process monitoring
+    def handle_sigterm(signum, frame):
+        logger.info("Received SIGTERM signal, initiating graceful shutdown")
+        for pid in worker_pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        try:
+            socketio.stop()
+        except Exception as e:
+            logger.error(f"Error during shutdown: {e}")
+        finally:
+            sys.exit(0)
+    
+    signal.signal(signal.SIGTERM, handle_sigterm)
+    
+    if chat_service is None:
+        logger.critical("Chat service failed to initialize, exiting...")
+        sys.exit(1)
+    
+    # Initialize socket.io with Railway-optimized settings. Handlers are registered
+    # and workers forked exactly once; retries below only rerun this process's server
+    register_socket_handlers(chat_service)
+    
+    # Long-polling needs sticky sessions, so multiple workers only speak WebSocket
+    transport_options = {'transports': ['websocket']} if WEB_WORKERS > 1 else {}
+    socketio.init_app(
+        app,
+        cors_allowed_origins="*",
+        ping_timeout=60,
+        ping_interval=25,
+        async_mode='eventlet',
+        # Per-packet Socket.IO logging; levels are set through LOG_LEVELS
+        logger=logging.getLogger('socketio') if SOCKETIO_LOGGING else False,
+        engineio_logger=logging.getLogger('engineio') if SOCKETIO_LOGGING else False,
+        **transport_options
+    )
+    
+    worker_index = 0
+    if WEB_WORKERS > 1:
+        worker_index, worker_pids = fork_web_workers(WEB_WORKERS)
+        if worker_index:
+            # One file per worker so rotation never races between processes
+            reopen_log_file('web', f'app.worker{worker_index}.log')
+        logger.info(f"Web worker {worker_index + 1}/{WEB_WORKERS} running (PID: {os.getpid()})")
+    # Any worker may get a session's next HTTP request, so history and trivia games are shared too
+    stores = session_stores()
+    if stores is not None:
+        chat_service.handler.use_session_stores(*stores)
+    # Workers share quota buckets so a client is charged the same whichever one it reaches
+    storage = quota_storage(QUOTA_IDLE_SECONDS)
+    if storage is not None:
+        QUOTAS.use_storage(storage)
+    else:
+        QUOTAS.start_snapshots('web')
+    
     while retry_count < max_retries:
         try:
             # Enhanced environment validation with detailed feedback
@@ -92,18 +248,6 @@ Memory: {memory_usage:.1f}%
 CPU: {cpu_usage:.1f}%
 ━━━━━━━━━━━━━━━━━━━━━━━━""")
             
-            # Configure process monitoring
-            def handle_sigterm(signum, frame):
-                logger.info("Received SIGTERM signal, initiating graceful shutdown")
-                try:
-                    socketio.stop()
-                except Exception as e:
-                    logger.error(f"Error during shutdown: {e}")
-                finally:
-                    sys.exit(0)
-            
-            signal.signal(signal.SIGTERM, handle_sigterm)
-            
             # Enhanced startup logging
             logger.info(f"""
 ━━━━━━ Railway Startup ━━━━━━
@@ -117,69 +261,6 @@ Time: {datetime.now(timezone.utc).isoformat()}
 Retry: {retry_count + 1}/{max_retries}
 ━━━━━━━━━━━━━━━━━━━━━━━━""")
             
-            # Initialize socket.io with Railway-optimized settings
-            from chat_handler import ChatHandler
-            chat_handler = ChatHandler()
-            
-            @socketio.on('connect')
-            def handle_connect():
-                logger.info(f"Client connected: {request.sid}")
-                emit('bot_status', {'status': 'connected'}, room=request.sid)
-                return True
-
-            @socketio.on('disconnect')
-            def handle_disconnect():
-                logger.info(f"Client disconnected: {request.sid}")
-
-            @socketio.on('send_message')
-            def handle_message(data):
-                try:
-                    if not isinstance(data, dict) or 'message' not in data:
-                        logger.error("Invalid message format received")
-                        raise ValueError("Invalid message format")
-                    
-                    message = data['message']
-                    logger.info(f"Message received from {request.sid}: {message}")
-                    
-                    # Initialize chat handler if not exists
-                    if not hasattr(handle_message, 'chat_handler'):
-                        from chat_handler import ChatHandler
-                        handle_message.chat_handler = ChatHandler()
-                    
-                    # Get response from chat handler
-                    response = handle_message.chat_handler.handle_socket_message(request.sid, message)
-                    logger.info(f"Generated response: {response}")
-                    
-                    if response:
-                        # Emit response back to client
-                        emit('receive_message', {
-                            'message': response,
-                            'is_bot': True
-                        }, room=request.sid)
-                        logger.info(f"Response emitted to {request.sid}")
-                    else:
-                        logger.error("No response generated from chat handler")
-                        raise ValueError("No response generated")
-                        
-                except Exception as e:
-                    error_msg = str(e)
-                    logger.error(f"Error handling message: {error_msg}")
-                    logger.error(traceback.format_exc())
-                    emit('receive_message', {
-                        'message': 'I apologize, but I encountered an error. Please try again.',
-                        'is_bot': True
-                    }, room=request.sid)
-
-            socketio.init_app(
-                app,
-                cors_allowed_origins="*",
-                ping_timeout=60,
-                ping_interval=25,
-                async_mode='eventlet',
-                logger=True,
-                engineio_logger=True
-            )
-            
             # Start server with enhanced error handling
             socketio.run(
                 app,
@@ -187,7 +268,7 @@ Retry: {retry_count + 1}/{max_retries}
                 port=port,
                 debug=debug,
                 use_reloader=False,  # Disable reloader for Railway
-                log_output=True,
+                log_output=ACCESS_LOG,
                 allow_unsafe_werkzeug=True  # Required for Railway deployment
             )
             
@@ -207,6 +288,10 @@ Time: {datetime.now(timezone.utc).isoformat()}
 Retry: {retry_count}/{max_retries}
 ━━━━━━━━━━━━━━━━━━━━━━━━""")
             
+            if worker_index:
+                # Only the first process retries; a worker that retried would fork workers of its own
+                logger.critical(f"Web worker {worker_index + 1} failed, exiting...")
+                sys.exit(1)
             if retry_count < max_retries:
                 logger.info(f"Waiting {retry_delay} seconds before retry {retry_count + 1}...")
                 time.sleep(retry_delay)
@@ -0,0 +1,77 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class MessagePipeline:
+    """Bounded async work queue that keeps messages from one chat in order."""
+
+    def __init__(self, handler, num_workers=4, max_queue_size=100):
+        self.handler = handler
+        self.num_workers = max(1, num_workers)
+        # Split the total capacity across the per-worker queues
+        self.worker_queue_size = max(1, -(-max_queue_size // self.num_workers))
+        self._queues = []
+        self._workers = []
+
+    @property
+    def is_running(self):
+        return bool(self._workers)
+
+    def queue_depth(self):
+        """Return the number of messages waiting across all workers."""
+        return sum(queue.qsize() for queue in self._queues)
+
+    async def start(self):
+        """Create the worker queues and spawn the worker tasks."""
+        if self.is_running:
+            return
+        self._queues = [asyncio.Queue(maxsize=self.worker_queue_size) for _ in range(self.num_workers)]
+        self._workers = [
+            asyncio.create_task(self._worker(index, queue), name=f"message-worker-{index}")
+            for index, queue in enumerate(self._queues)
+        ]
+        logger.info(f"Message pipeline started with {self.num_workers} workers "
+                    f"(queue size {self.worker_queue_size} per worker)")
+
+    async def stop(self, timeout=10.0):
+        """Let the workers drain their queues, then cancel them."""
+        if not self.is_running:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join() for queue in self._queues)),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Message pipeline stop timed out with {self.queue_depth()} messages pending")
+
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._queues = []
+        logger.info("Message pipeline stopped")
+
+    async def submit(self, key, *args):
+        """Queue a message for processing, waiting while the chat's worker is full."""
+        if not self.is_running:
+            raise RuntimeError("Message pipeline is not running")
+        # Messages with the same key always go to the same worker
+        queue = self._queues[hash(key) % self.num_workers]
+        if queue.full():
+            logger.warning(f"Message queue full for key {key}, applying backpressure")
+        await queue.put(args)
+
+    async def _worker(self, index, queue):
+        while True:
+            args = await queue.get()
+            try:
+                await self.handler(*args)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Message worker {index} failed: {str(e)}", exc_info=True)
+            finally:
+                queue.task_done()
@@ -0,0 +1,281 @@
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _shard_id():
+    # One shard per OS thread: each thread only writes its own slot, so no lock is needed.
+    # Green threads share an OS thread but never switch inside an update.
+    return threading.get_native_id()
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values, **kwargs):
+        """Return the child metric for one combination of label values."""
+        if kwargs:
+            values = tuple(kwargs[name] for name in self.labelnames)
+        key = tuple(str(value) for value in values)
+        child = self._children.get(key)
+        if child is None:
+            # setdefault keeps the first child if two threads race here
+            child = self._children.setdefault(key, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        return self._children[()]
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        for values, child in list(self._children.items()):
+            lines.extend(self._render_child(values, child))
+        return lines
+
+
+class _CounterChild:
+    __slots__ = ('_shards',)
+
+    def __init__(self):
+        self._shards = {}
+
+    def inc(self, amount=1):
+        shards = self._shards
+        shard = _shard_id()
+        shards[shard] = shards.get(shard, 0) + amount
+
+    def get(self):
+        return sum(list(self._shards.values()))
+
+
+class Counter(_Metric):
+    type_name = 'counter'
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount=1):
+        self._default().inc(amount)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}']
+
+
+class _GaugeChild:
+    __slots__ = ('value', 'function')
+
+    def __init__(self):
+        self.value = 0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def set_function(self, function):
+        """Read the value from a callable at scrape time."""
+        self.function = function
+
+    def get(self):
+        if self.function is not None:
+            try:
+                return self.function()
+            except Exception:
+                return float('nan')
+        return self.value
+
+
+class Gauge(_Metric):
+    type_name = 'gauge'
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value):
+        self._default().set(value)
+
+    def set_function(self, function):
+        self._default().set_function(function)
+
+    def _render_child(self, values, child):
+        return [f'{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.get())}']
+
+
+class _HistogramChild:
+    __slots__ = ('_bounds', '_shards')
+
+    def __init__(self, bounds):
+        self._bounds = bounds
+        self._shards = {}
+
+    def observe(self, value):
+        shard = self._shards.get(_shard_id())
+        if shard is None:
+            # Per-bucket counts followed by the running sum
+            shard = self._shards[_shard_id()] = [0] * (len(self._bounds) + 1) + [0.0]
+        shard[bisect.bisect_left(self._bounds, value)] += 1
+        shard[-1] += value
+
+    def snapshot(self):
+        size = len(self._bounds) + 2
+        totals = [0] * size
+        for shard in list(self._shards.values()):
+            for index in range(size):
+                totals[index] += shard[index]
+        return totals[:-1], totals[-1]
+
+
+class Histogram(_Metric):
+    type_name = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.bounds = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.bounds)
+
+    def observe(self, value):
+        self._default().observe(value)
+
+    def _render_child(self, values, child):
+        counts, total = child.snapshot()
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.bounds + (float('inf'),), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, ('le', _format_value(bound)))
+            lines.append(f'{self.name}_bucket{labels} {cumulative}')
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f'{self.name}_sum{labels} {_format_value(float(total))}')
+        lines.append(f'{self.name}_count{labels} {cumulative}')
+        return lines
+
+
+class MetricsRegistry:
+    """Holds every metric of a process and renders them in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics = {}
+
+    def _register(self, metric):
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()):
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()):
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self):
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
+
+# Metrics shared by the web app, Discord bot and Telegram bot
+LLM_LATENCY = REGISTRY.histogram(
+    'octant_llm_request_seconds', 'Latency of inference API requests', ['outcome'])
+LLM_TOKENS = REGISTRY.counter(
+    'octant_llm_tokens_total', 'Tokens sent to (in) and received from (out) the inference API', ['direction'])
+LLM_CACHED_TOKENS = REGISTRY.counter(
+    'octant_llm_cached_prompt_tokens_total', 'Prompt tokens the inference API reported serving from its prefix cache')
+LLM_TIME_TO_FIRST_TOKEN = REGISTRY.histogram(
+    'octant_llm_time_to_first_token_seconds', 'Time from sending a streamed inference request to its first token',
+    ['prefix_cache'])
+CACHE_LOOKUPS = REGISTRY.counter(
+    'octant_cache_lookups_total', 'Cache lookups by cache and result', ['cache', 'result'])
+QUEUE_DEPTH = REGISTRY.gauge(
+    'octant_queue_depth', 'Items waiting in internal queues', ['queue'])
+TRIVIA_GAMES_ACTIVE = REGISTRY.gauge(
+    'octant_trivia_games_active', 'Trivia games in progress', ['platform'])
+MESSAGES_RECEIVED = REGISTRY.counter(
+    'octant_messages_received_total', 'Chat messages received', ['platform'])
+LLM_RETRIES = REGISTRY.counter(
+    'octant_llm_retries_total', 'Inference requests retried after a transient failure')
+LLM_HEDGES = REGISTRY.counter(
+    'octant_llm_hedged_requests_total', 'Inference requests duplicated to a second endpoint because the first was slow')
+CIRCUIT_STATE = REGISTRY.gauge(
+    'octant_circuit_open', 'Whether a circuit breaker is open or half-open (1) or closed (0)', ['circuit'])
+LOOP_LAG = REGISTRY.histogram(
+    'octant_event_loop_lag_seconds', 'How late the event loop ran a scheduled probe', ['service'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0))
+LOOP_STALLS = REGISTRY.counter(
+    'octant_event_loop_stalls_total', 'Times the event loop was blocked longer than the stall threshold', ['service'])
+RESPONSE_LATENCY = REGISTRY.histogram(
+    'octant_response_seconds', 'Time from receiving a message to sending the answer', ['platform'])
+
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) when the API reports none."""
+    return max(1, len(text) // 4) if text else 0
+
+
+def register_metrics_route(app):
+    """Expose the registry at /metrics on a Flask app."""
+    @app.route('/metrics')
+    def metrics():
+        return REGISTRY.render(), 200, {'Content-Type': CONTENT_TYPE}
+    return metrics
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = REGISTRY.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """Serve /metrics from a daemon thread, for processes without a web app."""
+    server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"Metrics endpoint listening on {host}:{port}/metrics")
+    return server
@@ -0,0 +1,200 @@
+"""Local stand-in for the Together /inference API, for load and latency testing.
+
+    python mock_inference.py --port 8008 --latency lognormal --latency-median 1.2 --error-rate 0.02
+    INFERENCE_BASE_URL=http://localhost:8008/inference python main.py
+"""
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+WORDS = ("Octant", "funds", "public", "goods", "through", "GLM", "locking", "and", "quadratic",
+         "matching", "every", "epoch", "so", "the", "community", "decides", "which", "projects", "grow")
+
+
+class MockConfig:
+    """Latency, error and throughput behaviour of the mock server."""
+
+    def __init__(self, latency="lognormal", latency_median=0.8, latency_sigma=0.5, latency_max=20.0,
+                 tokens_per_second=60.0, completion_tokens=120, error_rate=0.0, rate_limit_rate=0.0,
+                 hang_rate=0.0, hang_seconds=40.0, seed=None):
+        self.latency = latency
+        self.latency_median = latency_median
+        self.latency_sigma = latency_sigma
+        self.latency_max = latency_max
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.hang_rate = hang_rate
+        self.hang_seconds = hang_seconds
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def time_to_first_token(self):
+        """Queueing plus prompt processing time, drawn from the configured distribution."""
+        with self._lock:
+            if self.latency == "fixed":
+                value = self.latency_median
+            elif self.latency == "uniform":
+                value = self.random.uniform(0, 2 * self.latency_median)
+            elif self.latency == "exponential":
+                value = self.random.expovariate(math.log(2) / self.latency_median)
+            else:
+                value = self.random.lognormvariate(math.log(self.latency_median), self.latency_sigma)
+        return min(value, self.latency_max)
+
+    def pick_fault(self):
+        """None for a normal answer, else 'error', 'rate_limit' or 'hang'."""
+        with self._lock:
+            roll = self.random.random()
+        for fault, rate in (("error", self.error_rate), ("rate_limit", self.rate_limit_rate), ("hang", self.hang_rate)):
+            if roll < rate:
+                return fault
+            roll -= rate
+        return None
+
+    def completion(self, max_tokens):
+        count = max(1, min(self.completion_tokens, max_tokens or self.completion_tokens))
+        with self._lock:
+            return [self.random.choice(WORDS) for _ in range(count)]
+
+
+class MockInferenceHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = MockConfig()
+
+    def do_HEAD(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self._send_json(400, {"error": "invalid JSON"})
+
+        fault = self.config.pick_fault()
+        if fault == "hang":
+            time.sleep(self.config.hang_seconds)
+            return self._send_json(504, {"error": "upstream timeout"})
+        if fault == "rate_limit":
+            return self._send_json(429, {"error": "rate limited"}, {"Retry-After": "1"})
+
+        time.sleep(self.config.time_to_first_token())
+        if fault == "error":
+            return self._send_json(500, {"error": "injected failure"})
+
+        tokens = self.config.completion(request.get("max_tokens"))
+        prompt_tokens = max(1, len(request.get("prompt", "")) // 4)
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens),
+                 "total_tokens": prompt_tokens + len(tokens)}
+        if request.get("stream_tokens"):
+            include_usage = (request.get("stream_options") or {}).get("include_usage")
+            return self._stream(tokens, usage if include_usage else None)
+
+        # Generation time is paid before the whole answer is returned
+        time.sleep(len(tokens) / self.config.tokens_per_second)
+        text = " " + " ".join(tokens) + "."
+        self._send_json(200, {
+            "model": request.get("model"),
+            "output": {"choices": [{"text": text}], "usage": usage},
+            "usage": usage
+        })
+
+    def _stream(self, tokens, usage):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        delay = 1 / self.config.tokens_per_second
+        try:
+            for index, token in enumerate(tokens):
+                event = {"choices": [{"text": f" {token}"}]}
+                if usage and index == len(tokens) - 1:
+                    event["usage"] = usage
+                self._write_chunk(f"data: {json.dumps(event)}\n\n".encode())
+                time.sleep(delay)
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def start_mock_server(port=8008, host="127.0.0.1", config=None):
+    """Run the mock API in a daemon thread and return the server; its URL is base_url(server)."""
+    handler = type("ConfiguredMockHandler", (MockInferenceHandler,), {"config": config or MockConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-inference", daemon=True).start()
+    return server
+
+
+def base_url(server):
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/inference"
+
+
+def add_config_arguments(parser):
+    parser.add_argument("--latency", choices=("lognormal", "exponential", "uniform", "fixed"), default="lognormal",
+                        help="distribution of time to first token")
+    parser.add_argument("--latency-median", type=float, default=0.8, help="median time to first token (s)")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="lognormal shape; higher means a longer tail")
+    parser.add_argument("--latency-max", type=float, default=20.0, help="cap on time to first token (s)")
+    parser.add_argument("--tokens-per-second", type=float, default=60.0, help="generation throughput")
+    parser.add_argument("--completion-tokens", type=int, default=120, help="tokens per answer")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests answered with 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction answered with 429")
+    parser.add_argument("--hang-rate", type=float, default=0.0, help="fraction that hang past the client timeout")
+    parser.add_argument("--hang-seconds", type=float, default=40.0)
+    parser.add_argument("--seed", type=int, default=None)
+
+
+def config_from_args(args):
+    return MockConfig(
+        latency=args.latency, latency_median=args.latency_median, latency_sigma=args.latency_sigma,
+        latency_max=args.latency_max, tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens, error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate, hang_rate=args.hang_rate, hang_seconds=args.hang_seconds,
+        seed=args.seed
+    )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Mock Together /inference API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8008)
+    add_config_arguments(parser)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    server = start_mock_server(args.port, args.host, config_from_args(args))
+    logger.info(f"Mock inference API listening on {base_url(server)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
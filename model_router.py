@@ -0,0 +1,230 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from metrics import CIRCUIT_STATE, LLM_HEDGES, REGISTRY
+from resilience import CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+FAST = "fast"
+LARGE = "large"
+
+DEFAULT_FAST_MODEL = "mistralai/Mistral-7B-Instruct-v0.2"
+
+# Questions that need reasoning or detail go to the large model
+DEEP_QUESTION = re.compile(
+    r"\b(how|why|explain|compare|difference|calculate|formula|math|quadratic|mechanism|"
+    r"technical|strategy|should i|pros and cons|step by step|in detail)\b",
+    re.IGNORECASE
+)
+DEEP_QUESTION_WORDS = 25
+
+# Calls slower than this count against an endpoint's circuit; callers use it as their read timeout too
+SLOW_CALL_SECONDS = float(os.environ.get('INFERENCE_SLOW_CALL_SECONDS', 15))
+
+ENDPOINT_P95 = REGISTRY.gauge(
+    'octant_llm_endpoint_p95_seconds', 'Rolling p95 latency per inference endpoint', ['endpoint'])
+ENDPOINT_ERROR_RATE = REGISTRY.gauge(
+    'octant_llm_endpoint_error_rate', 'Rolling error rate per inference endpoint', ['endpoint'])
+
+
+class NoEndpointAvailable(Exception):
+    """Every endpoint's circuit is open."""
+
+
+class RequestRejected(Exception):
+    """The endpoint answered but refused this request (a 4xx other than 429).
+
+    That is about the request, not the endpoint's health, so it never counts
+    against the endpoint's circuit.
+    """
+
+
+class Endpoint:
+    """One model at one URL, with rolling latency and error statistics."""
+
+    def __init__(self, name, model, url, tier=LARGE, window=200):
+        self.name = name
+        self.model = model
+        self.url = url
+        self.tier = tier
+        self.breaker = CircuitBreaker(name, slow_call_seconds=SLOW_CALL_SECONDS)
+        self._latencies = deque(maxlen=window)
+        self._failures = deque(maxlen=window)
+        CIRCUIT_STATE.labels(name).set_function(lambda: int(self.breaker.is_open()))
+        ENDPOINT_P95.labels(name).set_function(lambda: self.percentile(0.95) or 0)
+        ENDPOINT_ERROR_RATE.labels(name).set_function(self.error_rate)
+
+    def record(self, duration, ok):
+        self._latencies.append(duration)
+        self._failures.append(not ok)
+        if ok:
+            self.breaker.record_success(duration)
+        else:
+            self.breaker.record_failure(duration)
+
+    @property
+    def samples(self):
+        return len(self._latencies)
+
+    def percentile(self, q):
+        latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(q * len(latencies)))]
+
+    def error_rate(self):
+        failures = list(self._failures)
+        return sum(failures) / len(failures) if failures else 0.0
+
+    def score(self, min_samples):
+        # Unmeasured endpoints score best so they get sampled; errors count against the rest
+        if self.samples < min_samples:
+            return 0.0
+        return self.percentile(0.95) * (1 + 4 * self.error_rate())
+
+    def stats(self):
+        return {
+            "model": self.model,
+            "tier": self.tier,
+            "samples": self.samples,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "error_rate": round(self.error_rate(), 3),
+            "circuit": self.breaker.state
+        }
+
+
+class ModelRouter:
+    """Chooses an endpoint per message and hedges slow requests onto a second endpoint."""
+
+    def __init__(self, endpoints, hedging=True, min_samples=20, max_hedge_workers=16):
+        if not endpoints:
+            raise ValueError("ModelRouter needs at least one endpoint")
+        self.endpoints = endpoints
+        self.hedging = hedging
+        self.min_samples = min_samples
+        self.max_hedge_workers = max_hedge_workers
+        self._executor = None
+        self._executor_lock = threading.Lock()
+        # Requests submitted to the hedge pool and not finished, losers included
+        self._in_flight = 0
+
+    @classmethod
+    def from_env(cls, default_url, default_model):
+        """Endpoints from MODEL_ENDPOINTS (a JSON list), else the default model plus a fast one."""
+        configured = os.environ.get("MODEL_ENDPOINTS")
+        if configured:
+            endpoints = [
+                Endpoint(item.get("name") or item["model"], item["model"], item.get("url", default_url),
+                         item.get("tier", LARGE))
+                for item in json.loads(configured)
+            ]
+        else:
+            endpoints = [Endpoint("large", default_model, default_url, LARGE)]
+            fast_model = os.environ.get("FAST_MODEL", DEFAULT_FAST_MODEL)
+            if fast_model:
+                endpoints.append(Endpoint("fast", fast_model, default_url, FAST))
+        hedging = os.environ.get("MODEL_HEDGING", "true").lower() not in ("0", "false", "no")
+        return cls(endpoints, hedging=hedging)
+
+    def classify(self, message):
+        """Small talk and short questions go to the fast tier, deep questions to the large one."""
+        if len(message.split()) >= DEEP_QUESTION_WORDS or DEEP_QUESTION.search(message):
+            return LARGE
+        return FAST
+
+    def rank(self, tier):
+        """Endpoints of the tier first, fastest first, then the others as spill-over."""
+        key = lambda endpoint: endpoint.score(self.min_samples)
+        preferred = sorted((e for e in self.endpoints if e.tier == tier), key=key)
+        others = sorted((e for e in self.endpoints if e.tier != tier), key=key)
+        return preferred + others
+
+    def acquire(self, tier, exclude=()):
+        """Best endpoint whose circuit lets a call through, or None."""
+        for endpoint in self.rank(tier):
+            if endpoint not in exclude and endpoint.breaker.allow():
+                return endpoint
+        return None
+
+    def call(self, send, tier, timeout=None):
+        """Run send(endpoint) and return (endpoint, result).
+
+        When the chosen endpoint has not answered within its own p95, the
+        same request is sent to the next endpoint and the first success wins.
+        Hedged calls give up with TimeoutError after timeout seconds overall;
+        the losing request finishes in the background. While the hedge pool
+        is busy with such stragglers, requests run unhedged on the caller's
+        thread instead of queueing behind them.
+        """
+        primary = self.acquire(tier)
+        if primary is None:
+            raise NoEndpointAvailable("All inference endpoints are failing")
+        hedge_after = primary.percentile(0.95) if primary.samples >= self.min_samples else None
+        # A hedged call needs a pool thread for the primary and one for the backup
+        if (not self.hedging or hedge_after is None or len(self.endpoints) < 2
+                or self._in_flight + 2 > self.max_hedge_workers):
+            return primary, self._run(primary, send)
+
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        futures = {self._submit(primary, send): primary}
+        done, _ = wait(futures, timeout=hedge_after if deadline is None else min(hedge_after, timeout))
+        if not done and self._in_flight < self.max_hedge_workers:
+            backup = self.acquire(tier, exclude=(primary,))
+            if backup is not None:
+                LLM_HEDGES.inc()
+                logger.info(f"Hedging request to {backup.name} after {hedge_after:.2f}s on {primary.name}")
+                futures[self._submit(backup, send)] = backup
+
+        error = None
+        pending = set(futures)
+        while pending:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                raise TimeoutError(f"No inference endpoint answered within {timeout:.1f}s")
+            done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    # The slower request keeps running; its latency still feeds the statistics
+                    return futures[future], future.result()
+                except Exception as e:
+                    error = e
+        raise error
+
+    def _submit(self, endpoint, send):
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_hedge_workers,
+                                                    thread_name_prefix="inference-hedge")
+            self._in_flight += 1
+        # Copy the context so tracing spans stay attached to the request's trace
+        future = self._executor.submit(contextvars.copy_context().run, self._run, endpoint, send)
+        future.add_done_callback(self._finished)
+        return future
+
+    def _finished(self, future):
+        with self._executor_lock:
+            self._in_flight -= 1
+
+    def _run(self, endpoint, send):
+        started = time.perf_counter()
+        try:
+            result = send(endpoint)
+        except RequestRejected:
+            endpoint.record(time.perf_counter() - started, ok=True)
+            raise
+        except Exception:
+            endpoint.record(time.perf_counter() - started, ok=False)
+            raise
+        endpoint.record(time.perf_counter() - started, ok=True)
+        return result
+
+    def stats(self):
+        return {endpoint.name: endpoint.stats() for endpoint in self.endpoints}
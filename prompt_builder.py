@@ -0,0 +1,85 @@
+import hashlib
+import os
+import threading
+import time
+from metrics import REGISTRY
+
+# How long an inference provider is assumed to keep a prompt prefix in its KV cache
+PROMPT_PREFIX_TTL = float(os.environ.get('PROMPT_PREFIX_TTL', 300))
+
+WARM = "warm"
+COLD = "cold"
+
+PROMPT_PREFIXES = REGISTRY.counter(
+    'octant_prompt_prefix_total',
+    'Inference requests whose prompt prefix was sent to the same model within PROMPT_PREFIX_TTL (warm) or not (cold)',
+    ['cache'])
+
+# Identical for every request under one configuration; nothing per user may go in here
+STATIC_KNOWLEDGE = """Please provide accurate information about Octant:
+
+CORE FACTS:
+- Octant is a groundbreaking platform developed by the Golem Foundation
+- It experiments with participatory public goods funding
+- Backed by 100,000 ETH commitment from Golem Foundation
+- Uses GLM tokens for governance and participation
+- Features innovative quadratic funding mechanisms
+- Includes GLM token locking and staking features
+
+STYLE GUIDE:
+- Be friendly and approachable
+- Use clear, simple explanations
+- Include relevant emojis 😊
+- Focus on accuracy while maintaining conversation flow
+
+"""
+
+
+class PromptBuilder:
+    """Lays prompts out as a static prefix followed by the per-request tail.
+
+    The prefix (system prompt, then the fixed knowledge) depends only on the
+    configuration snapshot, so it is built once per configuration version
+    and is byte-identical across users and requests. Providers that cache
+    the KV state of a prompt prefix can then skip recomputing it, and only
+    the conversation context and the question are new work. mark_sent
+    tracks which prefixes each model has seen recently, which is what the
+    warm/cold labels on the prefix and time-to-first-token metrics mean.
+    """
+
+    def __init__(self, ttl=PROMPT_PREFIX_TTL):
+        self.ttl = ttl
+        self._prefixes = {}
+        self._last_sent = {}
+        self._lock = threading.Lock()
+
+    def prefix(self, config):
+        """The static prefix for a configuration snapshot and its hash."""
+        cached = self._prefixes.get(config.version)
+        if cached is None:
+            text = f"{config.system_prompt}\n\n{STATIC_KNOWLEDGE}"
+            cached = self._prefixes[config.version] = (text, hashlib.sha256(text.encode()).hexdigest()[:16])
+        return cached
+
+    def build(self, config, history, user_message):
+        """The full prompt: the static prefix, then context and query, which change on every request."""
+        prefix, _ = self.prefix(config)
+        return f"""{prefix}CONTEXT:
+{history}
+
+QUERY:
+{user_message}
+
+Please provide a helpful response drawing from the above knowledge:"""
+
+    def mark_sent(self, config, model):
+        """Record that a prompt with this configuration's prefix is going to model; returns its hash and WARM or COLD."""
+        _, prefix_hash = self.prefix(config)
+        key = (model, prefix_hash)
+        now = time.monotonic()
+        with self._lock:
+            last_sent = self._last_sent.get(key)
+            self._last_sent[key] = now
+        state = WARM if last_sent is not None and now - last_sent < self.ttl else COLD
+        PROMPT_PREFIXES.labels(state).inc()
+        return prefix_hash, state
@@ -0,0 +1,230 @@
+import atexit
+import contextvars
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from logging_setup import start_native_thread
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Every user may spend QUOTA_BURST_TOKENS at once and earns QUOTA_TOKENS_PER_HOUR back
+QUOTA_TOKENS_PER_HOUR = float(os.environ.get('QUOTA_TOKENS_PER_HOUR', 30000))
+QUOTA_BURST_TOKENS = float(os.environ.get('QUOTA_BURST_TOKENS', 10000))
+QUOTA_ADMIN_MULTIPLIER = float(os.environ.get('QUOTA_ADMIN_MULTIPLIER', 10))
+QUOTA_SNAPSHOT_DIR = os.environ.get('QUOTA_SNAPSHOT_DIR', '.')
+QUOTA_SNAPSHOT_SECONDS = float(os.environ.get('QUOTA_SNAPSHOT_SECONDS', 60))
+# Full buckets idle this long are dropped from memory and snapshots
+QUOTA_IDLE_SECONDS = float(os.environ.get('QUOTA_IDLE_SECONDS', 7 * 24 * 3600))
+
+DEFAULT = 'default'
+ADMIN = 'admin'
+
+QUOTA_CHECKS = REGISTRY.counter(
+    'octant_quota_checks_total', 'Per-user quota checks before inference calls', ['platform', 'result'])
+QUOTA_TOKENS = REGISTRY.counter(
+    'octant_quota_tokens_total', 'Estimated tokens charged to user quotas', ['platform', 'tier'])
+
+_current_user = contextvars.ContextVar('quota_user', default=None)
+
+
+class Tier:
+    __slots__ = ('name', 'capacity', 'rate')
+
+    def __init__(self, name, capacity, tokens_per_hour):
+        self.name = name
+        self.capacity = capacity
+        self.rate = tokens_per_hour / 3600
+
+
+class _Bucket:
+    __slots__ = ('tokens', 'updated', 'used')
+
+    def __init__(self, tokens, updated, used=0):
+        self.tokens = tokens
+        self.updated = updated
+        self.used = used
+
+
+class QuotaService:
+    """Token-bucket quota per platform user, charged with the tokens each answer used.
+
+    Buckets are only created when a user is first charged, so checking a user
+    who has never spent anything costs one dict lookup. A bucket may go into
+    debt by the size of one answer; the user waits until it refills above
+    zero. State is kept compact (one slotted object per active user) and
+    written to a JSON snapshot periodically so restarts don't reset quotas,
+    unless use_storage hands the buckets to storage shared between processes.
+    """
+
+    def __init__(self, tiers, admins=()):
+        self.tiers = tiers
+        self.admins = set(admins)
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._snapshot_path = None
+        self._storage = None
+        self._wakeups = queue.SimpleQueue()
+
+    @classmethod
+    def from_env(cls):
+        """Tiers from the QUOTA_* settings; ADMIN_USER_IDS lists ids or platform:id pairs."""
+        tiers = {
+            DEFAULT: Tier(DEFAULT, QUOTA_BURST_TOKENS, QUOTA_TOKENS_PER_HOUR),
+            ADMIN: Tier(ADMIN, QUOTA_BURST_TOKENS * QUOTA_ADMIN_MULTIPLIER,
+                        QUOTA_TOKENS_PER_HOUR * QUOTA_ADMIN_MULTIPLIER)
+        }
+        admins = [entry.strip() for entry in os.environ.get('ADMIN_USER_IDS', '').split(',') if entry.strip()]
+        return cls(tiers, admins)
+
+    def add_admins(self, platform, user_ids):
+        self.admins.update(f"{platform}:{user_id}" for user_id in user_ids)
+
+    def tier(self, platform, user_id):
+        user_id = str(user_id)
+        if user_id in self.admins or f"{platform}:{user_id}" in self.admins:
+            return self.tiers[ADMIN]
+        return self.tiers[DEFAULT]
+
+    @staticmethod
+    def _refill(bucket, tier, now):
+        bucket.tokens = min(tier.capacity, bucket.tokens + (now - bucket.updated) * tier.rate)
+        bucket.updated = now
+
+    def use_storage(self, storage):
+        """Keep buckets in storage (see shared_backends.SQLiteQuotaStorage) instead of this process."""
+        self._storage = storage
+
+    def _balance(self, key, tier):
+        """(tokens left, tokens used) for a key, or None for a user never charged."""
+        if self._storage is not None:
+            return self._storage.balance(key, tier)
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                return None
+            self._refill(bucket, tier, time.monotonic())
+            return bucket.tokens, bucket.used
+
+    def check(self, platform, user_id):
+        """Seconds until the user may ask again; 0 when they may ask now."""
+        tier = self.tier(platform, user_id)
+        balance = self._balance(f"{platform}:{user_id}", tier)
+        tokens = tier.capacity if balance is None else balance[0]
+        allowed = tokens > 0
+        QUOTA_CHECKS.labels(platform, 'allowed' if allowed else 'denied').inc()
+        return 0.0 if allowed else (1 - tokens) / tier.rate
+
+    def charge(self, platform, user_id, tokens):
+        """Record tokens a user's answer consumed."""
+        tier = self.tier(platform, user_id)
+        key = f"{platform}:{user_id}"
+        if self._storage is not None:
+            self._storage.charge(key, tier, tokens)
+            QUOTA_TOKENS.labels(platform, tier.name).inc(tokens)
+            return
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = _Bucket(tier.capacity, now)
+            else:
+                self._refill(bucket, tier, now)
+            bucket.tokens -= tokens
+            bucket.used += tokens
+        QUOTA_TOKENS.labels(platform, tier.name).inc(tokens)
+
+    def usage(self, platform, user_id):
+        """Tokens left, tokens used so far and the tier of a user."""
+        tier = self.tier(platform, user_id)
+        balance = self._balance(f"{platform}:{user_id}", tier)
+        left, used = (tier.capacity, 0) if balance is None else balance
+        return {'tokens_left': round(left), 'tokens_used': used, 'tier': tier.name}
+
+    def check_current(self):
+        """check() for the user of the current request, or 0 outside user_context."""
+        user = _current_user.get()
+        return self.check(*user) if user else 0.0
+
+    def charge_current(self, tokens):
+        user = _current_user.get()
+        if user:
+            self.charge(*user, tokens)
+
+    def snapshot(self):
+        """{key: [tokens, wall-clock time of tokens, tokens used]} for buckets worth keeping."""
+        now = time.monotonic()
+        wall_offset = time.time() - now
+        with self._lock:
+            for key in [key for key, bucket in self._buckets.items()
+                        if now - bucket.updated > QUOTA_IDLE_SECONDS]:
+                del self._buckets[key]
+            return {key: [round(bucket.tokens, 1), round(bucket.updated + wall_offset, 1), bucket.used]
+                    for key, bucket in self._buckets.items()}
+
+    def restore(self, snapshot):
+        now = time.monotonic()
+        wall_offset = time.time() - now
+        with self._lock:
+            for key, (tokens, updated, used) in snapshot.items():
+                # Time spent down still refills the bucket on the next check
+                self._buckets[key] = _Bucket(tokens, updated - wall_offset, used)
+
+    def save(self):
+        if not self._snapshot_path:
+            return
+        temporary = f"{self._snapshot_path}.tmp"
+        with open(temporary, 'w') as f:
+            json.dump(self.snapshot(), f, separators=(',', ':'))
+        os.replace(temporary, self._snapshot_path)
+
+    def start_snapshots(self, service):
+        """Load the service's last snapshot and keep writing new ones from a background thread."""
+        if self._snapshot_path:
+            return
+        self._snapshot_path = os.path.join(QUOTA_SNAPSHOT_DIR, f"quota.{service}.json")
+        try:
+            with open(self._snapshot_path) as f:
+                self.restore(json.load(f))
+            logger.info(f"Restored quotas for {len(self._buckets)} users from {self._snapshot_path}")
+        except FileNotFoundError:
+            pass
+        except (ValueError, TypeError) as e:
+            logger.warning(f"Ignoring unreadable quota snapshot {self._snapshot_path}: {e}")
+        start_native_thread(self._run, "quota-snapshots")
+        atexit.register(self.save)
+
+    def _run(self):
+        while True:
+            try:
+                # SimpleQueue blocks the OS thread even when eventlet has patched time.sleep
+                self._wakeups.get(timeout=QUOTA_SNAPSHOT_SECONDS)
+            except queue.Empty:
+                pass
+            try:
+                self.save()
+            except OSError as e:
+                logger.warning(f"Failed to write quota snapshot: {e}")
+
+
+@contextmanager
+def user_context(platform, user_id):
+    """Charge inference done inside this block to a platform user."""
+    token = _current_user.set((platform, str(user_id)))
+    try:
+        yield
+    finally:
+        _current_user.reset(token)
+
+
+def exceeded_message(retry_after):
+    minutes = max(1, round(retry_after / 60))
+    return (f"You've reached your usage limit for now. "
+            f"Please try again in about {minutes} minute{'s' if minutes != 1 else ''}. 🙏")
+
+
+QUOTAS = QuotaService.from_env()
@@ -0,0 +1,172 @@
+import logging
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling a failing or slow dependency and lets a probe through after a cool-down.
+
+    The circuit opens when, over the last `window` calls (and at least
+    `min_calls`), the share of failures or of calls slower than
+    `slow_call_seconds` reaches its threshold.
+    """
+
+    def __init__(self, name, window=20, min_calls=5, error_rate_threshold=0.5,
+                 slow_call_seconds=10.0, slow_rate_threshold=0.8, open_seconds=30.0):
+        self.name = name
+        self.window = window
+        self.min_calls = min_calls
+        self.error_rate_threshold = error_rate_threshold
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_rate_threshold = slow_rate_threshold
+        self.open_seconds = open_seconds
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._outcomes = deque(maxlen=window)
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """Whether a call may go ahead now; in half-open state only one probe is let through."""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.open_seconds:
+                    return False
+                self.state = HALF_OPEN
+                logger.info(f"Circuit {self.name} half-open, probing")
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self, duration):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                if duration < self.slow_call_seconds:
+                    self._close()
+                else:
+                    self._open("probe was slow")
+                return
+            self._record(False, duration)
+
+    def record_failure(self, duration):
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_in_flight = False
+                self._open("probe failed")
+                return
+            self._record(True, duration)
+
+    def _record(self, failed, duration):
+        self._outcomes.append((failed, duration >= self.slow_call_seconds))
+        if self.state != CLOSED or len(self._outcomes) < self.min_calls:
+            return
+        calls = len(self._outcomes)
+        error_rate = sum(1 for failed, _ in self._outcomes if failed) / calls
+        slow_rate = sum(1 for _, slow in self._outcomes if slow) / calls
+        if error_rate >= self.error_rate_threshold:
+            self._open(f"error rate {error_rate:.0%}")
+        elif slow_rate >= self.slow_rate_threshold:
+            self._open(f"slow call rate {slow_rate:.0%}")
+
+    def _open(self, reason):
+        self.state = OPEN
+        self.opened_at = time.monotonic()
+        logger.warning(f"Circuit {self.name} opened: {reason}; failing fast for {self.open_seconds}s")
+
+    def _close(self):
+        self.state = CLOSED
+        self._outcomes.clear()
+        logger.info(f"Circuit {self.name} closed")
+
+    def is_open(self):
+        return self.state != CLOSED
+
+
+class RetryBudget:
+    """Caps retries at a fraction of recent requests so retries can't multiply an outage."""
+
+    def __init__(self, ratio=0.2, min_retries_per_second=0.5, window_seconds=10.0):
+        self.ratio = ratio
+        self.min_retries_per_second = min_retries_per_second
+        self.window_seconds = window_seconds
+        self._requests = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        cutoff = now - self.window_seconds
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self):
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            self._requests.append(now)
+
+    def try_acquire_retry(self):
+        """Spend one retry if the budget allows it."""
+        with self._lock:
+            now = time.monotonic()
+            self._trim(now)
+            budget = self.min_retries_per_second * self.window_seconds + self.ratio * len(self._requests)
+            if len(self._retries) >= budget:
+                return False
+            self._retries.append(now)
+            return True
+
+
+def backoff_delay(attempt, base=0.5, cap=8.0):
+    """Exponential backoff with full jitter for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class FallbackCache:
+    """Last good answer per normalised question, served while the API is unavailable."""
+
+    def __init__(self, max_entries=1000, ttl=24 * 3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def normalize(question):
+        return re.sub(r'[^a-z0-9 ]+', '', question.lower()).strip()
+
+    def get(self, question):
+        key = self.normalize(question)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            answer, stored_at = entry
+            if time.time() - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return answer
+
+    def put(self, question, answer):
+        key = self.normalize(question)
+        if not key:
+            return
+        with self._lock:
+            self._entries[key] = (answer, time.time())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,129 @@
+from bisect import bisect_left
+from collections import namedtuple
+
+# Longest message each platform accepts; None means no limit
+PLATFORM_LIMITS = {
+    "discord": 2000,
+    "telegram": 4096,
+    "web": None,
+}
+
+# Preferred cut points, best first: paragraph, line, sentence, word
+BOUNDARIES = (
+    (("\n\n",), 0),
+    (("\n",), 0),
+    ((". ", "! ", "? "), 1),
+    ((" ",), 0),
+)
+
+FENCE_MARKERS = ("```", "~~~")
+
+
+class Chunk(namedtuple("Chunk", "start end prefix suffix")):
+    """text[start:end] of the original response, plus fence lines to reopen or close a code block."""
+
+    def render(self, text):
+        body = text[self.start:self.end]
+        if self.prefix or self.suffix:
+            return f"{self.prefix}{body}{self.suffix}"
+        return body
+
+
+def _fence_lines(text):
+    """Start offsets and text of every code fence line, in order."""
+    fences = []
+    for marker in FENCE_MARKERS:
+        # A single-character scan is much faster and rules out most answers
+        position = text.find(marker) if marker[0] in text else -1
+        while position != -1:
+            line_start = text.rfind("\n", 0, position) + 1
+            line_end = text.find("\n", position)
+            if line_end == -1:
+                line_end = len(text)
+            # A fence opens its line, after at most three spaces of indentation
+            if position - line_start <= 3 and not text[line_start:position].strip(" "):
+                fences.append((line_start, text[line_start:line_end].strip()))
+            position = text.find(marker, line_end)
+    fences.sort()
+    return [start for start, _ in fences], [line for _, line in fences]
+
+
+def _open_fence(fence_starts, fence_lines, position):
+    """The fence line that opened the code block around position, or None outside one."""
+    toggles = bisect_left(fence_starts, position)
+    return fence_lines[toggles - 1] if toggles % 2 else None
+
+
+def _best_cut(text, start, stop):
+    """End offset and next start of the best boundary in text[start:stop], or None."""
+    # A cut in the first half of the window leaves a stub; try a finer boundary instead
+    floor = start + (stop - start) // 2
+    for separators, keep in BOUNDARIES:
+        found = max(text.rfind(separator, floor, stop) for separator in separators)
+        if found > start:
+            return found + keep, found + len(separators[0])
+    return None
+
+
+def split_ranges(text, limit):
+    """Cut text into chunks of at most limit characters, without copying it.
+
+    Cuts fall on the best boundary in each window: a paragraph break, then a
+    line break, a sentence end, a space, and only then mid-word. Every
+    character is looked at a bounded number of times, so this is linear in
+    the length of the text. A chunk that ends inside a ``` code block gets a
+    closing fence and the next one reopens it with the same language, so
+    each message renders on its own.
+    """
+    length = len(text)
+    start = 0
+    while start < length and text[start].isspace():
+        start += 1
+    if start == length:
+        return []
+    if limit is None or length - start <= limit:
+        return [Chunk(start, len(text.rstrip()), "", "")]
+
+    fence_starts, fence_lines = _fence_lines(text)
+    chunks = []
+    while start < length:
+        opener = _open_fence(fence_starts, fence_lines, start)
+        prefix = f"{opener}\n" if opener else ""
+        stop = start + max(limit - len(prefix), limit // 2)
+        if stop >= length:
+            end, next_start = length, length
+        else:
+            cut = _best_cut(text, start, stop)
+            end, next_start = cut or (stop, stop)
+            fence = _open_fence(fence_starts, fence_lines, end)
+            if fence:
+                fence_start = fence_starts[bisect_left(fence_starts, end) - 1]
+                if fence_start > start + (stop - start) // 2:
+                    # Keep the code block whole: end this chunk just before it opens
+                    end, next_start = fence_start, fence_start
+                elif end + 4 > stop:
+                    # Leave room for the closing fence
+                    cut = _best_cut(text, start, stop - 4)
+                    end, next_start = cut or (stop - 4, stop - 4)
+
+        stripped_end = end
+        while stripped_end > start and text[stripped_end - 1].isspace():
+            stripped_end -= 1
+        fence = _open_fence(fence_starts, fence_lines, end) if end < length else None
+        suffix = f"\n{fence.lstrip()[:3]}" if fence else ""
+        if stripped_end > start:
+            chunks.append(Chunk(start, stripped_end, prefix, suffix))
+
+        start = next_start
+        # Indentation inside a code block is content; elsewhere leading whitespace is not
+        inside = _open_fence(fence_starts, fence_lines, start) is not None
+        while start < length and (text[start] == "\n" if inside else text[start].isspace()):
+            start += 1
+    return chunks
+
+
+def split_response(text, platform=None, limit=None):
+    """Messages to send for a response on a platform (see PLATFORM_LIMITS) or under an explicit limit."""
+    if limit is None and platform is not None:
+        limit = PLATFORM_LIMITS[platform]
+    return [chunk.render(text) for chunk in split_ranges(text, limit)]
@@ -0,0 +1,296 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import logging
+from collections.abc import MutableMapping
+import socketio
+from limits.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Number of web processes; anything above one needs shared state between them
+WEB_WORKERS = int(os.environ.get('WEB_WORKERS', 1))
+
+
+def _sqlite_path(uri):
+    # sqlite:///relative.db and sqlite:////absolute/path.db, like SQLAlchemy
+    return uri.split('sqlite://', 1)[1][1:] or ':memory:'
+
+
+def _connect(path):
+    conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    return conn
+
+
+class SQLiteStorage(Storage):
+    """Rate limit counters in a SQLite file so every web worker shares them."""
+
+    STORAGE_SCHEME = ["sqlite"]
+
+    def __init__(self, uri, wrap_exceptions=False, **options):
+        super().__init__(uri, wrap_exceptions=wrap_exceptions, **options)
+        self.path = _sqlite_path(uri)
+        self._local = threading.local()
+        self._conn().execute(
+            'CREATE TABLE IF NOT EXISTS rate_limits (key TEXT PRIMARY KEY, count INTEGER, expiry REAL)'
+        )
+
+    @property
+    def base_exceptions(self):
+        return sqlite3.Error
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def incr(self, key, expiry, elastic_expiry=False, amount=1):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute('SELECT count, expiry FROM rate_limits WHERE key = ?', (key,)).fetchone()
+            if row is None or row[1] <= now:
+                count, expires_at = amount, now + expiry
+            else:
+                count = row[0] + amount
+                expires_at = now + expiry if elastic_expiry else row[1]
+            conn.execute('INSERT OR REPLACE INTO rate_limits (key, count, expiry) VALUES (?, ?, ?)',
+                         (key, count, expires_at))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return count
+
+    def get(self, key):
+        row = self._conn().execute(
+            'SELECT count FROM rate_limits WHERE key = ? AND expiry > ?', (key, time.time())
+        ).fetchone()
+        return row[0] if row else 0
+
+    def get_expiry(self, key):
+        row = self._conn().execute('SELECT expiry FROM rate_limits WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else time.time()
+
+    def check(self):
+        try:
+            self._conn().execute('SELECT 1')
+            return True
+        except sqlite3.Error:
+            return False
+
+    def reset(self):
+        cursor = self._conn().execute('DELETE FROM rate_limits')
+        return cursor.rowcount
+
+    def clear(self, key):
+        self._conn().execute('DELETE FROM rate_limits WHERE key = ?', (key,))
+
+
+class SQLiteQuotaStorage:
+    """Quota token buckets in a SQLite file so every web worker charges the same bucket.
+
+    Rows hold wall-clock times because the workers' monotonic clocks are
+    unrelated. Refills are computed on read, so only charges write.
+    """
+
+    def __init__(self, uri, idle_seconds=7 * 24 * 3600, prune_interval=3600):
+        self.path = _sqlite_path(uri)
+        self.idle_seconds = idle_seconds
+        self.prune_interval = prune_interval
+        self._pruned = time.time()
+        self._local = threading.local()
+        # Workers fork after this runs, so it must not leave a connection behind
+        conn = _connect(self.path)
+        conn.execute('CREATE TABLE IF NOT EXISTS quota_buckets '
+                     '(key TEXT PRIMARY KEY, tokens REAL, updated REAL, used REAL)')
+        conn.close()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    @staticmethod
+    def _refilled(tokens, updated, tier, now):
+        return min(tier.capacity, tokens + (now - updated) * tier.rate)
+
+    def balance(self, key, tier):
+        """(tokens left, tokens used) for a key, or None when it was never charged."""
+        row = self._conn().execute(
+            'SELECT tokens, updated, used FROM quota_buckets WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return None
+        tokens, updated, used = row
+        return self._refilled(tokens, updated, tier, time.time()), used
+
+    def charge(self, key, tier, tokens):
+        now = time.time()
+        conn = self._conn()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT tokens, updated, used FROM quota_buckets WHERE key = ?', (key,)).fetchone()
+            left, used = (tier.capacity, 0) if row is None else (self._refilled(*row[:2], tier, now), row[2])
+            conn.execute('INSERT OR REPLACE INTO quota_buckets (key, tokens, updated, used) VALUES (?, ?, ?, ?)',
+                         (key, left - tokens, now, used + tokens))
+            if now - self._pruned > self.prune_interval:
+                self._pruned = now
+                conn.execute('DELETE FROM quota_buckets WHERE updated < ?', (now - self.idle_seconds,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+
+class SQLiteSessionStore(MutableMapping):
+    """A dict of per-client state in a SQLite table, so any web worker can answer any client.
+
+    Values are pickled: mutating one after reading it changes nothing until it
+    is assigned back. Entries not written for idle_seconds are dropped.
+    """
+
+    def __init__(self, uri, table, idle_seconds=24 * 3600, prune_interval=3600):
+        self.path = _sqlite_path(uri)
+        self.table = table
+        self.idle_seconds = idle_seconds
+        self.prune_interval = prune_interval
+        self._pruned = time.time()
+        self._local = threading.local()
+        # Workers fork after this runs, so it must not leave a connection behind
+        conn = _connect(self.path)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value BLOB, updated REAL)')
+        conn.close()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = _connect(self.path)
+        return conn
+
+    def __getitem__(self, key):
+        row = self._conn().execute(f'SELECT value FROM {self.table} WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return pickle.loads(row[0])
+
+    def __setitem__(self, key, value):
+        now = time.time()
+        conn = self._conn()
+        conn.execute(f'INSERT OR REPLACE INTO {self.table} (key, value, updated) VALUES (?, ?, ?)',
+                     (key, pickle.dumps(value), now))
+        if now - self._pruned > self.prune_interval:
+            self._pruned = now
+            conn.execute(f'DELETE FROM {self.table} WHERE updated < ?', (now - self.idle_seconds,))
+
+    def __delitem__(self, key):
+        if not self._conn().execute(f'DELETE FROM {self.table} WHERE key = ?', (key,)).rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return self._conn().execute(f'SELECT 1 FROM {self.table} WHERE key = ?', (key,)).fetchone() is not None
+
+    def __iter__(self):
+        return iter([row[0] for row in self._conn().execute(f'SELECT key FROM {self.table}')])
+
+    def __len__(self):
+        return self._conn().execute(f'SELECT COUNT(*) FROM {self.table}').fetchone()[0]
+
+
+class SQLiteManager(socketio.PubSubManager):
+    """Socket.IO client manager that passes emits between workers through SQLite."""
+
+    name = 'sqlite'
+
+    def __init__(self, url='sqlite:///socketio_queue.db', channel='socketio', write_only=False,
+                 logger=None, poll_interval=0.05, retention=60):
+        self.path = _sqlite_path(url)
+        self.poll_interval = poll_interval
+        self.retention = retention
+        conn = _connect(self.path)
+        conn.execute('CREATE TABLE IF NOT EXISTS socketio_messages '
+                     '(id INTEGER PRIMARY KEY AUTOINCREMENT, channel TEXT, payload BLOB, created REAL)')
+        conn.close()
+        self._publish_conn = None
+        super().__init__(channel=channel, write_only=write_only, logger=logger)
+
+    def _publish(self, data):
+        if self._publish_conn is None:
+            self._publish_conn = _connect(self.path)
+        self._publish_conn.execute(
+            'INSERT INTO socketio_messages (channel, payload, created) VALUES (?, ?, ?)',
+            (self.channel, pickle.dumps(data), time.time())
+        )
+
+    def _listen(self):
+        conn = _connect(self.path)
+        # Only deliver messages published after this worker started
+        last_id = conn.execute('SELECT COALESCE(MAX(id), 0) FROM socketio_messages').fetchone()[0]
+        last_prune = time.time()
+        while True:
+            rows = conn.execute(
+                'SELECT id, payload FROM socketio_messages WHERE id > ? AND channel = ? ORDER BY id',
+                (last_id, self.channel)
+            ).fetchall()
+            for message_id, payload in rows:
+                last_id = message_id
+                # python-socketio takes dicts as they are; newer releases no longer unpickle bytes
+                yield pickle.loads(payload)
+
+            now = time.time()
+            if now - last_prune > self.retention:
+                conn.execute('DELETE FROM socketio_messages WHERE created < ?', (now - self.retention,))
+                last_prune = now
+            self.server.sleep(self.poll_interval)
+
+
+def limiter_storage_uri():
+    """Rate limiter storage: explicit setting, shared SQLite for multiple workers, else memory."""
+    default = 'sqlite:///ratelimit.db' if WEB_WORKERS > 1 else 'memory://'
+    return os.environ.get('RATELIMIT_STORAGE_URI', default)
+
+
+def quota_storage(idle_seconds):
+    """Shared quota buckets for multiple web workers, else None for per-process buckets."""
+    default = 'sqlite:///quota.db' if WEB_WORKERS > 1 else None
+    url = os.environ.get('QUOTA_STORAGE_URI', default)
+    if not url:
+        return None
+    if not url.startswith('sqlite://'):
+        raise ValueError(f"Unsupported QUOTA_STORAGE_URI {url}; only sqlite:// is supported")
+    return SQLiteQuotaStorage(url, idle_seconds=idle_seconds)
+
+
+def session_stores():
+    """Shared (conversation history, trivia games) for multiple web workers, else None.
+
+    The web UI talks plain HTTP, so with several workers consecutive requests
+    of one session can reach different processes.
+    """
+    default = 'sqlite:///sessions.db' if WEB_WORKERS > 1 else None
+    url = os.environ.get('SESSION_STORAGE_URI', default)
+    if not url:
+        return None
+    if not url.startswith('sqlite://'):
+        raise ValueError(f"Unsupported SESSION_STORAGE_URI {url}; only sqlite:// is supported")
+    return SQLiteSessionStore(url, 'conversation_history'), SQLiteSessionStore(url, 'trivia_games')
+
+
+def socketio_queue_options():
+    """Keyword arguments for SocketIO() that let emits reach clients on any worker."""
+    default = 'sqlite:///socketio_queue.db' if WEB_WORKERS > 1 else None
+    url = os.environ.get('SOCKETIO_MESSAGE_QUEUE', default)
+    if not url:
+        return {}
+    logger.info(f"Socket.IO message queue: {url.split('://', 1)[0]}")
+    if url.startswith('sqlite://'):
+        return {'client_manager': SQLiteManager(url)}
+    # redis:// and other URLs are handled by Flask-SocketIO itself
+    return {'message_queue': url}
@@ -2,6 +2,7 @@ document.addEventListener('DOMContentLoaded', () => {
     const messageInput = document.getElementById('message-input');
     const sendButton = document.getElementById('send-button');
     const messagesContainer = document.getElementById('messages');
+    const botAvatarUrl = document.body.dataset.botAvatar || '/static/images/2.png';
     let isWaitingForResponse = false;
     let retryCount = 0;
     const MAX_RETRIES = 3;
@@ -13,7 +14,7 @@ document.addEventListener('DOMContentLoaded', () => {
         
         if (isBot) {
             const botAvatar = document.createElement('img');
-            botAvatar.src = '/static/images/2.png';
+            botAvatar.src = botAvatarUrl;
             botAvatar.className = 'bot-avatar';
             messageDiv.appendChild(botAvatar);
         }
@@ -77,6 +78,63 @@ document.addEventListener('DOMContentLoaded', () => {
         };
     }
 
+    // Read server-sent events from /chat/stream and render tokens as they arrive.
+    // Resolves to false when nothing was rendered so the caller can fall back to /chat.
+    async function streamMessage(message, loadingMessageDiv) {
+        const response = await fetch('/chat/stream', {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ message })
+        });
+        
+        if (!response.ok || !response.body) {
+            return false;
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let text = '';
+        let botMessageDiv = null;
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventType = 'message';
+                let data = '';
+                for (const line of rawEvent.split('\n')) {
+                    if (line.startsWith('event:')) eventType = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                }
+                
+                if (eventType === 'error') {
+                    throw new Error(JSON.parse(data).error || 'Failed to send message');
+                }
+                if (eventType === 'message' && data) {
+                    text += JSON.parse(data).token;
+                    if (!botMessageDiv) {
+                        loadingMessageDiv.remove();
+                        botMessageDiv = appendMessage(text, true);
+                    } else {
+                        updateMessage(botMessageDiv, text);
+                    }
+                }
+            }
+        }
+        
+        return botMessageDiv !== null;
+    }
+
     async function sendMessage(message, loadingMessage = null) {
         if (!message || isWaitingForResponse) return;
         
@@ -85,26 +143,37 @@ document.addEventListener('DOMContentLoaded', () => {
         disableInput();
         
         try {
-            const response = await fetch('/chat', {
-                method: 'POST',
-                headers: {
-                    'Content-Type': 'application/json',
-                },
-                body: JSON.stringify({ message })
-            });
-            
-            const data = await response.json();
-            
-            if (!response.ok) {
-                throw new Error(data.error || 'Failed to send message');
+            let streamed = false;
+            try {
+                streamed = await streamMessage(message, loadingMessageDiv);
+            } catch (streamError) {
+                console.warn('Streaming failed, falling back to /chat:', streamError);
+                // Keep a partially streamed answer instead of asking twice
+                streamed = !loadingMessageDiv.isConnected;
             }
             
-            if (data.response) {
-                loadingMessageDiv.remove();
-                appendMessage(data.response, true);
-                retryCount = 0; // Reset retry count on success
+            if (!streamed) {
+                const response = await fetch('/chat', {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                    },
+                    body: JSON.stringify({ message })
+                });
+                
+                const data = await response.json();
+                
+                if (!response.ok) {
+                    throw new Error(data.error || 'Failed to send message');
+                }
+                
+                if (data.response) {
+                    loadingMessageDiv.remove();
+                    appendMessage(data.response, true);
+                }
             }
             
+            retryCount = 0; // Reset retry count on success
             messageInput.value = '';
             
         } catch (error) {
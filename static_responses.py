@@ -0,0 +1,159 @@
+from collections import namedtuple
+
+# Banner width per platform; Telegram is mostly read on phones
+WIDE_RULE = "━" * 40
+NARROW_RULE = "━" * 23
+
+EMBED_BLUE = 0x3498DB
+
+Section = namedtuple("Section", "heading lines platforms")
+
+
+def section(heading, *lines, platforms=None):
+    """A block of lines under an optional heading; platforms limits where it is shown."""
+    return Section(heading, lines, platforms)
+
+
+class StaticResponse:
+    """One fixed command answer, rendered once for every platform.
+
+    text is shown by the web and Socket.IO clients, telegram is plain text
+    for the Bot API, and embed is a Discord embed dict (discord.Embed.from_dict).
+    """
+
+    __slots__ = ('command', 'description', 'text', 'telegram', 'embed')
+
+    def __init__(self, command, description, title, sections, intro=None, footer=None):
+        self.command = command
+        self.description = description
+        self.text = _render_text(title, intro, _for("web", sections), footer, WIDE_RULE)
+        self.telegram = _render_text(title, intro, _for("telegram", sections), footer, NARROW_RULE)
+        self.embed = _render_embed(title, intro, _for("discord", sections), footer)
+
+    @property
+    def name(self):
+        return self.command.lstrip('/')
+
+
+def _for(platform, sections):
+    return [s for s in sections if s.platforms is None or platform in s.platforms]
+
+
+def _render_text(title, intro, sections, footer, rule):
+    lines = [rule, title, rule, ""]
+    if intro:
+        lines += [intro, ""]
+    for block in sections:
+        if block.heading:
+            lines.append(f"{block.heading}:")
+        lines += block.lines
+        lines.append("")
+    if footer:
+        lines.append(footer)
+    lines.append(rule)
+    return "\n".join(lines)
+
+
+def _render_embed(title, intro, sections, footer):
+    # Blocks without a heading have no field name to go under, so they extend the description
+    description = [intro] if intro else []
+    fields = []
+    for block in sections:
+        if block.heading:
+            fields.append({"name": block.heading, "value": "\n".join(block.lines), "inline": False})
+        else:
+            description.append("\n".join(block.lines))
+    embed = {"title": title, "description": "\n\n".join(description), "color": EMBED_BLUE, "fields": fields}
+    if footer:
+        embed["footer"] = {"text": footer}
+    return embed
+
+
+TOPICS = (
+    StaticResponse(
+        '/learn', "Learning modules about Octant",
+        "📚 Learning Modules",
+        intro="Choose a topic to learn about:",
+        sections=(
+            section("1. Octant Basics", "• What is Octant?", "• How it works", "• Getting started"),
+            section("2. Token Economics", "• GLM token utility", "• Staking mechanism", "• Reward distribution"),
+            section("3. Participation Guide", "• How to contribute", "• Community roles", "• Decision making"),
+        ),
+        footer="Type /funding, /governance, or /rewards for specific topic details."
+    ),
+    StaticResponse(
+        '/funding', "How Octant funds projects",
+        "💰 Octant Funding System",
+        sections=(
+            section("Key Components", "• Quadratic Funding mechanism", "• Community-driven allocation",
+                    "• Matched rewards system"),
+            section("📋 Funding Process", "1. Project Submission", "2. Community Voting", "3. Allocation Period",
+                    "4. Distribution of Funds"),
+            section("🎯 Important Points", "• 20% maximum funding cap", "• Anti-Sybil measures",
+                    "• Transparent tracking"),
+        ),
+        footer="Want to learn more? Try /learn for detailed tutorials!"
+    ),
+    StaticResponse(
+        '/governance', "How decisions are made in Octant",
+        "🏛️ Octant Governance",
+        sections=(
+            section("Decision Making Process", "• Community-driven proposals", "• Token-weighted voting",
+                    "• Transparent execution"),
+            section("Key Areas", "1. Project Selection", "2. Fund Allocation", "3. Protocol Updates",
+                    "4. Community Initiatives"),
+            section("Participation Methods", "• Submit proposals", "• Vote on decisions", "• Join discussions"),
+        ),
+        footer="For more details, use /learn command!"
+    ),
+    StaticResponse(
+        '/rewards', "How Octant rewards are calculated",
+        "🌟 Octant Rewards System",
+        sections=(
+            section("Types of Rewards", "• Individual Rewards (IR)", "• Matched Rewards (MR)",
+                    "• Community Incentives"),
+            section("Calculation Factors", "• Locked GLM amount", "• Time-weighted average",
+                    "• Community support level"),
+            section("Distribution Schedule", "• 90-day epochs", "• Regular calculations", "• Transparent tracking"),
+        ),
+        footer="Use /learn for detailed tutorials!"
+    ),
+    StaticResponse(
+        '/stats', "Your chat statistics (coming soon)",
+        "📊 Chat Statistics",
+        intro="Coming soon! This feature will show:",
+        sections=(
+            section(None, "• Messages exchanged", "• Topics discussed", "• Trivia performance",
+                    "• Learning progress"),
+        ),
+        footer="Stay tuned for updates!"
+    ),
+)
+
+HELP = StaticResponse(
+    '/help', "Show available commands",
+    "📚 Available Commands",
+    sections=(
+        section("🎮 Game Commands", "• /trivia - Start a trivia game",
+                "• start trivia - Also starts a trivia game", "• end trivia - End the current game",
+                platforms=("web", "telegram")),
+        section("🎮 Game Commands", "• /trivia - Start a trivia game", platforms=("discord",)),
+        section("📋 Information Commands", "• /help - Show this help message",
+                *(f"• {topic.command} - {topic.description}" for topic in TOPICS)),
+        section("🛠️ Utility Commands", "• /ping - Check bot latency", platforms=("discord",)),
+        section("💬 How to Chat", "• Reply to any of my messages to continue our conversation",
+                "• Each reply builds on our ongoing chat"),
+    ),
+    footer="Type /trivia to start playing or reply to chat!"
+)
+
+# Built once at import; serving a command is a dict lookup
+STATIC_RESPONSES = {response.command: response for response in (HELP,) + TOPICS}
+
+
+def get_static_response(command):
+    """The StaticResponse for a command such as '/help' or '/help@OctantBot more', or None."""
+    response = STATIC_RESPONSES.get(command)
+    if response is None and command:
+        response = STATIC_RESPONSES.get(command.split(maxsplit=1)[0].split('@', 1)[0].lower())
+    return response
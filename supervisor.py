@@ -0,0 +1,180 @@
+import asyncio
+import logging
+import time
+from enum import Enum
+
+logger = logging.getLogger(__name__)
+
+
+class BotState(Enum):
+    STARTING = "starting"
+    RUNNING = "running"
+    DEGRADED = "degraded"
+    RESTARTING = "restarting"
+    STOPPED = "stopped"
+
+
+class Component:
+    """A restartable part of a service with async start and stop callables."""
+
+    def __init__(self, name, start, stop):
+        self.name = name
+        self.start = start
+        self.stop = stop
+        self.running = False
+        self.failures = 0
+        self.restarts = 0
+
+
+class Supervisor:
+    """Keeps a set of components running and restarts only the ones that fail."""
+
+    def __init__(self, name, base_delay=5, max_delay=300, failure_threshold=3):
+        self.name = name
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.failure_threshold = failure_threshold
+        self.state = BotState.STOPPED
+        self.state_since = time.time()
+        self._components = {}
+        self._restart_requests = asyncio.Queue()
+        self._stop_event = asyncio.Event()
+        self._loop = None
+
+    def add_component(self, name, start, stop):
+        """Register a component; components start in the order they are added."""
+        self._components[name] = Component(name, start, stop)
+
+    def set_state(self, state, reason=""):
+        if state == self.state:
+            return
+        logger.info(f"Supervisor '{self.name}': {self.state.value} -> {state.value}"
+                    + (f" ({reason})" if reason else ""))
+        self.state = state
+        self.state_since = time.time()
+
+    def status(self):
+        """Return a snapshot of the supervisor and component state."""
+        return {
+            "state": self.state.value,
+            "state_since": self.state_since,
+            "components": {
+                name: {
+                    "running": component.running,
+                    "failures": component.failures,
+                    "restarts": component.restarts
+                }
+                for name, component in self._components.items()
+            }
+        }
+
+    def request_restart(self, name=None, reason=""):
+        """Ask the supervisor to restart one component, or all when name is None."""
+        self._restart_requests.put_nowait((name, reason))
+
+    def request_restart_threadsafe(self, name=None, reason=""):
+        """Same as request_restart, callable from threads other than the event loop."""
+        if self._loop:
+            self._loop.call_soon_threadsafe(self.request_restart, name, reason)
+
+    def request_stop(self):
+        self._stop_event.set()
+
+    def report_failure(self, name, error=None):
+        """Record a component failure; restart it once failures pass the threshold."""
+        component = self._components.get(name)
+        if not component:
+            return
+        component.failures += 1
+        logger.warning(f"Component '{name}' failure {component.failures}/{self.failure_threshold}: {error}")
+        if component.failures >= self.failure_threshold:
+            component.failures = 0
+            self.request_restart(name, reason=f"{self.failure_threshold} consecutive failures")
+        elif self.state == BotState.RUNNING:
+            self.set_state(BotState.DEGRADED, reason=f"{name} failing")
+
+    def report_healthy(self, name):
+        """Clear a component's failure count and leave the degraded state if possible."""
+        component = self._components.get(name)
+        if not component:
+            return
+        component.failures = 0
+        if self.state == BotState.DEGRADED and not any(c.failures for c in self._components.values()):
+            self.set_state(BotState.RUNNING, reason="all components healthy")
+
+    async def run(self):
+        """Start every component and service restart requests until stopped."""
+        self._loop = asyncio.get_running_loop()
+        self.set_state(BotState.STARTING)
+        try:
+            for component in self._components.values():
+                if not await self._start_with_backoff(component):
+                    return
+            self.set_state(BotState.RUNNING)
+
+            while not self._stop_event.is_set():
+                request = asyncio.create_task(self._restart_requests.get())
+                stop = asyncio.create_task(self._stop_event.wait())
+                done, pending = await asyncio.wait({request, stop}, return_when=asyncio.FIRST_COMPLETED)
+                for task in pending:
+                    task.cancel()
+                if request in done:
+                    name, reason = request.result()
+                    await self._restart(name, reason)
+        finally:
+            await self._stop_all()
+            self.set_state(BotState.STOPPED)
+
+    async def _restart(self, name, reason):
+        if name is None:
+            targets = list(self._components.values())
+        elif name in self._components:
+            targets = [self._components[name]]
+        else:
+            logger.warning(f"Ignoring restart request for unknown component '{name}'")
+            return
+
+        self.set_state(BotState.RESTARTING, reason=f"{name or 'all'}: {reason}" if reason else (name or "all"))
+        for component in reversed(targets):
+            await self._stop_component(component)
+        for component in targets:
+            component.restarts += 1
+            if not await self._start_with_backoff(component):
+                return
+        self.set_state(BotState.RUNNING)
+
+    async def _start_with_backoff(self, component):
+        attempt = 0
+        while not self._stop_event.is_set():
+            try:
+                await component.start()
+                component.running = True
+                component.failures = 0
+                logger.info(f"Component '{component.name}' started")
+                return True
+            except Exception as e:
+                attempt += 1
+                delay = min(self.base_delay * (2 ** (attempt - 1)), self.max_delay)
+                logger.error(f"Component '{component.name}' failed to start (attempt {attempt}): {str(e)}")
+                logger.info(f"Retrying '{component.name}' in {delay} seconds...")
+                try:
+                    # Wake up early if a stop is requested during the backoff
+                    await asyncio.wait_for(self._stop_event.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+        return False
+
+    async def _stop_component(self, component):
+        if not component.running:
+            return
+        try:
+            await component.stop()
+        except Exception as e:
+            logger.error(f"Error stopping component '{component.name}': {str(e)}", exc_info=True)
+        finally:
+            component.running = False
+            logger.info(f"Component '{component.name}' stopped")
+
+    async def _stop_all(self):
+        for component in reversed(list(self._components.values())):
+            await self._stop_component(component)
@@ -4,95 +4,52 @@ from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, filters, ContextTypes
 from telegram_trivia import TelegramTrivia
 import time
-import threading
-from datetime import datetime, timedelta
-
-class WatchdogTimer:
-    def __init__(self, timeout=600):  # 10 minutes default timeout
-        self.timeout = timeout
-        self.last_ping = datetime.now()
-        self.lock = threading.Lock()
-        self.running = True
-        self.warn_threshold = timeout * 0.8  # Warn at 80% of timeout
-        self.start_monitor()
-
-    def ping(self):
-        with self.lock:
-            self.last_ping = datetime.now()
-
-    def start_monitor(self):
-        def monitor():
-            while self.running:
-                with self.lock:
-                    current_time = datetime.now()
-                    time_since_ping = (current_time - self.last_ping).total_seconds()
-                    if time_since_ping > self.timeout:
-                        logger.error(f"""━━━━━━ Watchdog Timeout ━━━━━━
-Last Ping: {self.last_ping}
-Current Time: {current_time}
-Time Since Last Ping: {time_since_ping:.2f}s
-Timeout Threshold: {self.timeout}s
-━━━━━━━━━━━━━━━━━━━━━━━━""")
-                        os._exit(1)  # Force restart
-                    elif time_since_ping > self.warn_threshold:
-                        logger.warning(f"""━━━━━━ Watchdog Warning ━━━━━━
-Last Ping: {self.last_ping}
-Current Time: {current_time}
-Time Since Last Ping: {time_since_ping:.2f}s
-Warning Threshold: {self.warn_threshold}s
-━━━━━━━━━━━━━━━━━━━━━━━━""")
-                time.sleep(30)  # Check every 30 seconds
-        
-        thread = threading.Thread(target=monitor, daemon=True)
-        thread.start()
-
-    def stop(self):
-        self.running = False
+import signal
+import secrets
 import asyncio
 from telegram.error import NetworkError, TimedOut, RetryAfter
 from chat_handler import ChatHandler
-
-# Enhanced logging configuration with HTTP request tracking
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - [%(module)s:%(lineno)d] - %(message)s',
-    level=logging.INFO,
-    datefmt='%Y-%m-%d %H:%M:%S'
-)
+from message_pipeline import MessagePipeline
+from telegram_webhook import TelegramWebhookServer
+from supervisor import Supervisor
+from loop_monitor import LoopMonitor
+from telegram_outbound import OutboundDispatcher
+from response_splitter import split_response
+from intent_router import TRIVIA_END, TRIVIA_START
+from static_responses import STATIC_RESPONSES, get_static_response
+from logging_setup import configure_logging
+import tracing
+from quota import QUOTAS, user_context
+from metrics import MESSAGES_RECEIVED, QUEUE_DEPTH, RESPONSE_LATENCY, TRIVIA_GAMES_ACTIVE, start_metrics_server
+
+# Structured logging; httpx and telegram library levels come from LOG_LEVELS
+configure_logging('telegram_bot', 'telegram_bot.log')
 logger = logging.getLogger(__name__)
 
-# Configure httpx logging
-httpx_logger = logging.getLogger("httpx")
-httpx_logger.setLevel(logging.INFO)
-
-# Configure telegram library logging
-telegram_logger = logging.getLogger("telegram")
-telegram_logger.setLevel(logging.INFO)
-
 # Message rate monitoring
 message_count = 0
 last_message_time = time.time()
 MESSAGE_RATE_INTERVAL = 60  # Check message rate every minute
 MIN_MESSAGE_RATE = 0  # Minimum expected messages per minute (0 means no minimum)
-# Add file handler for persistent logging with rotation
-from logging.handlers import RotatingFileHandler
-file_handler = RotatingFileHandler(
-    'telegram_bot.log',
-    maxBytes=10*1024*1024,  # 10MB
-    backupCount=5
-)
-file_handler.setFormatter(logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - [%(module)s:%(lineno)d] - %(message)s'
-))
-logger.addHandler(file_handler)
-httpx_logger.addHandler(file_handler)
-telegram_logger.addHandler(file_handler)
 
 # Initialize handlers
 chat_handler = ChatHandler()
-telegram_trivia = TelegramTrivia()
+outbound_dispatcher = OutboundDispatcher()
+telegram_trivia = TelegramTrivia(dispatcher=outbound_dispatcher)
+
+# Chat messages are answered by a bounded worker pool instead of inside the update handler
+TELEGRAM_WORKERS = int(os.environ.get("TELEGRAM_WORKERS", 8))
+TELEGRAM_QUEUE_SIZE = int(os.environ.get("TELEGRAM_QUEUE_SIZE", 200))
+
+# Webhook mode is used when a public URL is configured, long polling otherwise
+TELEGRAM_WEBHOOK_URL = os.environ.get("TELEGRAM_WEBHOOK_URL")
+TELEGRAM_WEBHOOK_SECRET = os.environ.get("TELEGRAM_WEBHOOK_SECRET") or secrets.token_urlsafe(32)
+TELEGRAM_WEBHOOK_PORT = int(os.environ.get("TELEGRAM_WEBHOOK_PORT", os.environ.get("PORT", 8443)))
+TELEGRAM_WEBHOOK_PATH = os.environ.get("TELEGRAM_WEBHOOK_PATH", "/telegram/webhook")
 
 # List of admin user IDs who can restart the bot
 ADMIN_USER_IDS = {5100739421, 5365683947, 1087968824}  # Updated admin list with all admin IDs
+QUOTAS.add_admins('telegram', ADMIN_USER_IDS)
 
 async def restart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Restart the bot."""
@@ -101,9 +58,9 @@ async def restart_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     logger.info(f"Restart command issued by user {user_id}")
     
     try:
-        # Set restart flag
-        context.application._restart_requested = True
-        logger.info("Initiating graceful shutdown...")
+        # Restart every component in place; conversation state is kept
+        context.application.bot_data["supervisor"].request_restart(reason=f"/restart by {user_id}")
+        logger.info("Restart requested from supervisor...")
     except Exception as e:
         logger.error(f"Error during restart command: {str(e)}")
         await update.message.reply_text("Error occurred during restart. Please try again later.")
@@ -122,24 +79,11 @@ Feel free to ask me anything about Octant! 🚀
     """
     await update.message.reply_text(welcome_message)
 
-async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
-    """Send a message when the command /help is issued."""
-    help_text = """
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📚 Available Commands
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-🎮 Game Commands:
-• /trivia - Start a trivia game
-• start trivia - Also starts trivia game
-• end trivia - End current trivia game
-
-📋 Information Commands:
-• /help - Show this help message
-
-Type any command to get started!
-━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━━"""
-    await update.message.reply_text(help_text)
+async def static_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Reply to /help, /learn, /funding and the other static commands with their pre-rendered text."""
+    response = get_static_response(update.message.text)
+    if response:
+        await update.message.reply_text(response.telegram)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle incoming messages with simplified logic."""
@@ -163,7 +107,9 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         )
 
         if should_process:
-            await process_message(update, context)
+            MESSAGES_RECEIVED.labels("telegram").inc()
+            # Queue per chat so replies stay in order while other chats proceed
+            await message_pipeline.submit(message.chat_id, update, context, time.perf_counter())
 
     except Exception as e:
         logger.error(f"Message handler error: {str(e)}", exc_info=True)
@@ -172,34 +118,67 @@ async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
         except Exception as reply_error:
             logger.error(f"Failed to send error message: {str(reply_error)}", exc_info=True)
 
-async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+async def process_message(update: Update, context: ContextTypes.DEFAULT_TYPE, received_at=None) -> None:
     """Process a message with simplified response handling."""
     message = update.message
-    try:
-        # Get response from chat handler
-        response = chat_handler.get_response(message.text)
-        if not response:
-            await message.reply_text("I couldn't understand your message. Please try again.")
-            return
-
-        # Handle the response as plain text first
-        if isinstance(response, str):
-            # Split into chunks of 4000 characters (Telegram's limit)
-            chunks = [response[i:i+4000] for i in range(0, len(response), 4000)]
-            for chunk in chunks:
-                if chunk.strip():
-                    await message.reply_text(chunk.strip())
-        elif isinstance(response, list):
-            for chunk in response:
-                if chunk and chunk.strip():
-                    await message.reply_text(chunk.strip())
-    except Exception as e:
-        logger.error(f"Error processing message: {str(e)}", exc_info=True)
-        await message.reply_text("I encountered an error. Please try again in a moment.")
+    received_at = received_at or time.perf_counter()
+    queue_wait_ms = round((time.perf_counter() - received_at) * 1000, 1)
+    with tracing.start_trace("telegram.process_message", chat_id=message.chat_id, queue_wait_ms=queue_wait_ms) as trace_span:
+        try:
+            # "start trivia" and "end trivia" drive the game here instead of reaching the model
+            if update.effective_user:
+                intent = chat_handler.intent_router.classify(
+                    message.text, in_trivia=update.effective_user.id in telegram_trivia.current_games)
+                if intent.kind == TRIVIA_START:
+                    await telegram_trivia.start_game(update, context)
+                    return
+                if intent.kind == TRIVIA_END:
+                    await telegram_trivia.end_game(update, context)
+                    return
+
+            # Get response from chat handler without blocking the event loop
+            user_id = update.effective_user.id if update.effective_user else message.chat_id
+            with tracing.span("chat.generate"), user_context('telegram', user_id):
+                response = await chat_handler.get_response_async(f"telegram_{message.chat_id}", message.text)
+            if not response:
+                await message.reply_text("I couldn't understand your message. Please try again.")
+                return
+
+            with tracing.span("response.split"):
+                # Split at paragraph, line or sentence boundaries under Telegram's limit
+                if isinstance(response, str):
+                    chunks = split_response(response, "telegram")
+                else:
+                    chunks = [chunk.strip() for chunk in response if chunk and chunk.strip()]
+
+            # Queue all chunks at once so the dispatcher can pace and merge them
+            with tracing.span("telegram.send", chunks=len(chunks)):
+                await asyncio.gather(*(
+                    outbound_dispatcher.send(
+                        message.chat_id,
+                        chunk,
+                        reply_to_message_id=message.message_id if index == 0 else None
+                    )
+                    for index, chunk in enumerate(chunks)
+                ))
+            RESPONSE_LATENCY.labels("telegram").observe(time.perf_counter() - received_at)
+        except Exception as e:
+            trace_span.record_error(e)
+            logger.error(f"Error processing message: {str(e)}", exc_info=True)
+            await message.reply_text("I encountered an error. Please try again in a moment.")
+
+message_pipeline = MessagePipeline(
+    process_message,
+    num_workers=TELEGRAM_WORKERS,
+    max_queue_size=TELEGRAM_QUEUE_SIZE
+)
+
+QUEUE_DEPTH.labels("telegram_pipeline").set_function(message_pipeline.queue_depth)
+QUEUE_DEPTH.labels("telegram_outbound").set_function(outbound_dispatcher.queue_depth)
+TRIVIA_GAMES_ACTIVE.labels("telegram").set_function(lambda: len(telegram_trivia.current_games))
 
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors in the telegram bot with aggressive recovery and monitoring."""
-    global consecutive_failures  # Track failures across retries
     try:
         error_time = time.strftime("%Y-%m-%d %H:%M:%S")
         
@@ -211,6 +190,8 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         else:
             logger.error(f"[{error_time}] Error occurred without update: {context.error}")
         
+        # Errors here come from handlers, e.g. a failed reply, not from fetching updates:
+        # the update source reports its own failures through the polling error_callback
         # Enhanced error classification and handling
         if isinstance(context.error, NetworkError):
             logger.warning(f"[{error_time}] Network error detected: {str(context.error)}")
@@ -227,10 +208,9 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
             await asyncio.sleep(retry_delay)
             
         elif isinstance(context.error, RetryAfter):
+            # Outgoing messages are paced by the outbound dispatcher, so just record it
             retry_after = context.error.retry_after
             logger.warning(f"[{error_time}] Rate limit exceeded. Retry after: {retry_after}s")
-            logger.info(f"Implementing rate limit cooldown...")
-            await asyncio.sleep(retry_after)
             
         else:
             logger.error(f"[{error_time}] Unhandled error type: {type(context.error).__name__}")
@@ -274,26 +254,54 @@ def check_running_instance():
         except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.TimeoutExpired):
             continue
 
+def build_application(token):
+    """Create the Application and register all handlers."""
+    # Enhanced configuration for aggressive reconnection
+    application = (
+        Application.builder()
+        .token(token)
+        .get_updates_read_timeout(30)  # Shorter timeouts for faster failure detection
+        .get_updates_write_timeout(30)
+        .get_updates_connect_timeout(30)
+        .get_updates_pool_timeout(None)
+        .connect_timeout(30)
+        .read_timeout(30)
+        .write_timeout(30)
+        .pool_timeout(None)
+        .connection_pool_size(16)  # Increased connection pool
+        .concurrent_updates(True)  # Enable concurrent updates for better performance
+        .build()
+    )
+
+    # Add handlers with enhanced monitoring
+    application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler([response.name for response in STATIC_RESPONSES.values()], static_command))
+    application.add_handler(CommandHandler("restart", restart_command))
+    application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
+    application.add_handler(CallbackQueryHandler(telegram_trivia.handle_answer, pattern="^trivia_"))
+    application.add_handler(CommandHandler("trivia", telegram_trivia.start_game))
+    application.add_error_handler(error_handler)
+    return application
+
 async def main() -> None:
-    """Start the bot with simplified initialization and instance management."""
+    """Start the bot under a supervisor that restarts only failed components."""
     # Ensure only one instance is running
     check_running_instance()
     
     start_time = time.time()
-    retry_count = 0
-    base_delay = 5
-    max_delay = 300  # Maximum retry delay of 5 minutes
-    max_retries = 10  # Maximum number of retries before resetting
-    stats_interval = 300  # Log stats every 5 minutes
-    last_stats_time = time.time()
-    
-    # Get or create event loop
-    try:
-        loop = asyncio.get_running_loop()
-    except RuntimeError:
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+    health_check_interval = 30  # Check every 30 seconds
     
+    # Get the token from environment variable
+    token = os.environ.get("TELEGRAM_BOT_TOKEN")
+    if not token:
+        logger.error("TELEGRAM_BOT_TOKEN environment variable is not set!")
+        return
+
+    metrics_port = os.environ.get("METRICS_PORT")
+    if metrics_port:
+        start_metrics_server(int(metrics_port))
+    QUOTAS.start_snapshots('telegram')
+
     # Initialize system monitoring
     import psutil
     process = psutil.Process()
@@ -333,190 +341,143 @@ async def main() -> None:
             logger.info(f"CPU Usage: {cpu_percent:.1f}%")
             logger.info(f"Network I/O: ↑{bytes_sent:.1f}MB ↓{bytes_recv:.1f}MB")
             logger.info(f"Disk Usage: {disk_percent}%")
-            logger.info(f"Retry Count: {retry_count}")
+            logger.info(f"Supervisor State: {supervisor.state.value}")
+            logger.info(f"Message Queue Depth: {message_pipeline.queue_depth()}")
+            logger.info(f"Outbound: {outbound_dispatcher.sent_count} sent, {outbound_dispatcher.merged_count} merged, "
+                        f"{outbound_dispatcher.rate_limited_count} rate limited, {outbound_dispatcher.queue_depth()} queued")
+            loop_stats = loop_monitor.stats()
+            if loop_stats["samples"]:
+                logger.info(f"Loop Lag: avg {loop_stats['lag_sum'] / loop_stats['samples'] * 1000:.1f}ms, "
+                            f"max {loop_stats['max_lag'] * 1000:.1f}ms, stalls {loop_stats['stall_count']}")
             logger.info(f"Last Update Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            # Message processing rate tracking will be implemented in a future update
-            logger.info("Message Processing Rate: Monitoring")
-            logger.info("Connection Status: Active" if not retry_count else f"Connection Status: Reconnecting (Attempt {retry_count})")
             logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
             
-            # Smarter recovery triggers
-            should_recover = False
+            critical = False
             if memory_percent > 80:
                 logger.warning("Memory usage critical")
-                should_recover = True
+                critical = True
             if cpu_percent > 90:
                 logger.warning("CPU usage critical")
-                should_recover = True
+                critical = True
             if disk_percent > 90:
                 logger.warning("Disk usage critical")
-                should_recover = True
+                critical = True
                 
-            if should_recover:
-                logger.warning("System resources critical - initiating recovery procedure")
+            if critical:
                 return False
             return True
         except Exception as e:
             logger.error(f"Error logging system stats: {str(e)}")
             return False
 
-    last_health_check = time.time()
-    health_check_interval = 30  # Check every 30 seconds
-    consecutive_failures = 0
-    max_consecutive_failures = 3
+    application = build_application(token)
+    supervisor = Supervisor("telegram_bot")
+    application.bot_data["supervisor"] = supervisor
     
-    # Initialize watchdog
-    watchdog = WatchdogTimer(timeout=300)  # 5 minute timeout
-    
-    while True:
-        try:
-            current_time = time.time()
-            # Ping watchdog to indicate bot is alive
-            watchdog.ping()
-            
-            # Regular health checks and watchdog pings
-            if current_time - last_health_check >= health_check_interval:
-                # Ping watchdog on successful health check
-                watchdog.ping()
-                if not log_system_stats():
-                    consecutive_failures += 1
-                    logger.warning(f"Health check failed. Consecutive failures: {consecutive_failures}")
-                    if consecutive_failures >= max_consecutive_failures:
-                        logger.error("Maximum consecutive failures reached - forcing restart")
-                        raise Exception("Forced restart due to health check failures")
-                else:
-                    consecutive_failures = 0
-                last_health_check = current_time
-            else:
-                # Additional watchdog ping every 60 seconds
-                if (current_time - watchdog.last_ping.timestamp()) > 60:
-                    watchdog.ping()
-            
-            logger.info("Initializing Telegram bot...")
-            
-            # Get the token from environment variable
-            token = os.environ.get("TELEGRAM_BOT_TOKEN")
-            if not token:
-                logger.error("TELEGRAM_BOT_TOKEN environment variable is not set!")
-                return
-
-            # Create the Application with detailed configuration and health checks
-            # Enhanced configuration for aggressive reconnection
-            application = (
-                Application.builder()
-                .token(token)
-                .get_updates_read_timeout(30)  # Shorter timeouts for faster failure detection
-                .get_updates_write_timeout(30)
-                .get_updates_connect_timeout(30)
-                .get_updates_pool_timeout(None)
-                .connect_timeout(30)
-                .read_timeout(30)
-                .write_timeout(30)
-                .pool_timeout(None)
-                .connection_pool_size(16)  # Increased connection pool
-                .concurrent_updates(True)  # Enable concurrent updates for better performance
-                .build()
+    # Watch the event loop itself; only a stall of several minutes forces a restart
+    loop_monitor = LoopMonitor('telegram', stall_threshold=5.0, fatal_threshold=300.0)
+
+    update_source = {"webhook": None, "first_start": True}
+
+    async def start_application():
+        if not application._initialized:
+            await application.initialize()
+        await application.start()
+
+    async def stop_application():
+        await application.stop()
+
+    async def start_updates():
+        if TELEGRAM_WEBHOOK_URL:
+            logger.info("Starting webhook server...")
+            webhook_server = TelegramWebhookServer(
+                application,
+                secret_token=TELEGRAM_WEBHOOK_SECRET,
+                port=TELEGRAM_WEBHOOK_PORT,
+                path=TELEGRAM_WEBHOOK_PATH
             )
-            
-            # Store application instance for restart handling
-            application._restart_requested = False
-
-            # Add handlers with enhanced monitoring
-            application.add_handler(CommandHandler("start", start))
-            application.add_handler(CommandHandler("help", help_command))
-            application.add_handler(CommandHandler("restart", restart_command))
-            application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
-            application.add_handler(CallbackQueryHandler(telegram_trivia.handle_answer, pattern="^trivia_"))
-            application.add_handler(CommandHandler("trivia", telegram_trivia.start_game))
-            application.add_error_handler(error_handler)
-            
-            # Store watchdog instance in application
-            application.watchdog = watchdog
-
-            # Enhanced startup logging with version tracking
-            logger.info("━━━━━━ Bot Configuration ━━━━━━")
-            logger.info(f"Start Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
-            logger.info(f"Retry Count: {retry_count}")
-            logger.info(f"Bot Version: 1.0.1")
-            logger.info("Connection Parameters:")
-            logger.info("- Polling Timeout: 60s")
-            logger.info("- Connection Retries: infinite")
-            logger.info("- Update Mode: polling")
-            logger.info("- Health Check: Active")
-            logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
-
-            # Reset retry count on successful start
-            retry_count = 0
-            
-            # Log initial system statistics
-            log_system_stats()
-            
-            try:
-                # Initialize and start application
-                await application.initialize()
-                await application.start()
-                logger.info("Starting polling...")
-                
-                # Start polling with simplified error handling
-                await application.updater.start_polling(
-                    allowed_updates=Update.ALL_TYPES,
-                    drop_pending_updates=True
-                )
-                
-                # Wait for stop signal or keep running
-                while True:
-                    if getattr(application, '_restart_requested', False):
-                        break
-                    await asyncio.sleep(1)
-                    
-            except Exception as e:
-                logger.error(f"Error during polling: {str(e)}", exc_info=True)
-                raise
-            finally:
-                # Cleanup
-                logger.info("Shutting down bot...")
-                try:
-                    await application.updater.stop()
-                    await application.stop()
-                    await application.shutdown()
-                except Exception as e:
-                    logger.error(f"Error during shutdown: {str(e)}", exc_info=True)
-                
-                if getattr(application, '_restart_requested', False):
-                    logger.info("Restart requested, reinitializing...")
-                    continue
-                
-                logger.info("Bot shutdown complete")
-            
+            await webhook_server.start()
+            update_source["webhook"] = webhook_server
+            # Keep pending updates so nothing is lost across restarts
+            await application.bot.set_webhook(
+                url=TELEGRAM_WEBHOOK_URL,
+                secret_token=TELEGRAM_WEBHOOK_SECRET,
+                allowed_updates=Update.ALL_TYPES
+            )
+        else:
+            logger.info("Starting polling...")
+            # Only drop the backlog on a cold start; reconnects pick up where they left off
+            await application.updater.start_polling(
+                allowed_updates=Update.ALL_TYPES,
+                drop_pending_updates=update_source["first_start"],
+                error_callback=lambda error: supervisor.report_failure("updates", error)
+            )
+        update_source["first_start"] = False
+
+    async def stop_updates():
+        if update_source["webhook"]:
+            await update_source["webhook"].stop()
+            update_source["webhook"] = None
+        if application.updater.running:
+            await application.updater.stop()
+
+    health_task = {}
+
+    async def health_loop():
+        while True:
+            await asyncio.sleep(health_check_interval)
+            # No component restart frees memory, CPU or disk, so this only raises the alert
+            if not log_system_stats():
+                logger.error("System resources critical; the bot keeps running, check the host")
+
+    async def start_health():
+        health_task["task"] = asyncio.create_task(health_loop(), name="telegram-health")
+
+    async def stop_health():
+        health_task["task"].cancel()
+        await asyncio.gather(health_task["task"], return_exceptions=True)
+
+    # Conversation and trivia state live outside these components, so restarts keep them
+    async def start_outbound():
+        await outbound_dispatcher.start(application.bot)
+
+    supervisor.add_component("application", start_application, stop_application)
+    supervisor.add_component("outbound", start_outbound, outbound_dispatcher.stop)
+    supervisor.add_component("pipeline", message_pipeline.start, message_pipeline.stop)
+    supervisor.add_component("updates", start_updates, stop_updates)
+    supervisor.add_component("health", start_health, stop_health)
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, supervisor.request_stop)
+
+    # Enhanced startup logging with version tracking
+    logger.info("━━━━━━ Bot Configuration ━━━━━━")
+    logger.info(f"Start Time: {time.strftime('%Y-%m-%d %H:%M:%S')}")
+    logger.info(f"Bot Version: 1.0.1")
+    logger.info("Connection Parameters:")
+    logger.info("- Polling Timeout: 60s")
+    logger.info("- Connection Retries: supervised")
+    logger.info(f"- Update Mode: {'webhook' if TELEGRAM_WEBHOOK_URL else 'polling'}")
+    logger.info("- Health Check: Active")
+    logger.info("━━━━━━━━━━━━━━━━━━━━━━━━━━━━")
+
+    # Log initial system statistics
+    log_system_stats()
+
+    await loop_monitor.start()
+    try:
+        await supervisor.run()
+    finally:
+        logger.info("Shutting down bot...")
+        await loop_monitor.stop()
+        try:
+            if application._initialized:
+                await application.shutdown()
         except Exception as e:
-            retry_count += 1
-            delay = min(base_delay * (2 ** (retry_count - 1)), max_delay)
-            
-            # Enhanced error logging
-            logger.error("━━━━━━ Error Report ━━━━━━")
-            logger.error(f"Error Type: {type(e).__name__}")
-            logger.error(f"Error Message: {str(e)}")
-            logger.error(f"Retry Count: {retry_count}")
-            logger.error(f"Next Retry: {delay} seconds")
-            logger.error("━━━━━━━━━━━━━━━━━━━━━━━━")
-            
-            # Log system statistics on error
-            log_system_stats()
-            
-            # If it's time to log periodic statistics
-            current_time = time.time()
-            if current_time - last_stats_time >= stats_interval:
-                log_system_stats()
-                last_stats_time = current_time
-            
-            # Reset retry count if max retries reached
-            if max_retries > 0 and retry_count >= max_retries:
-                logger.warning("Max retries reached, resetting retry count")
-                retry_count = 0
-            
-            # Implement exponential backoff
-            logger.info(f"Waiting {delay} seconds before retry...")
-            time.sleep(delay)
+            logger.error(f"Error during shutdown: {str(e)}", exc_info=True)
+        logger.info("Bot shutdown complete")
+
 
 if __name__ == '__main__':
     import asyncio
@@ -525,7 +486,7 @@ if __name__ == '__main__':
     try:
         logger.info("━━━━━━ Initializing Chat Handler ━━━━━━")
         chat_handler = ChatHandler()
-        telegram_trivia = TelegramTrivia()  # Initialize TelegramTrivia instance
+        telegram_trivia = TelegramTrivia(dispatcher=outbound_dispatcher)  # Initialize TelegramTrivia instance
         logger.info("Chat handler configuration:")
         logger.info(f"Model: {chat_handler.model}")
         logger.info(f"Max history: {chat_handler.max_history}")
@@ -0,0 +1,238 @@
+import asyncio
+import logging
+import time
+from collections import deque
+from telegram.error import RetryAfter
+from response_splitter import PLATFORM_LIMITS
+
+logger = logging.getLogger(__name__)
+
+# Lower numbers are sent first
+PRIORITY_TRIVIA = 0
+PRIORITY_NORMAL = 10
+
+TELEGRAM_MESSAGE_LIMIT = PLATFORM_LIMITS['telegram']
+
+
+class TokenBucket:
+    """Classic token bucket; time is passed in so callers share one clock read."""
+
+    __slots__ = ('rate', 'capacity', 'tokens', 'updated')
+
+    def __init__(self, rate, capacity, now):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = now
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """Seconds until one token is available."""
+        self._refill(now)
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, seconds, now):
+        """Drain the bucket so nothing is sent for the given number of seconds."""
+        self._refill(now)
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def is_idle(self, now):
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class OutboundMessage:
+    __slots__ = ('chat_id', 'text', 'priority', 'reply_to_message_id', 'reply_markup', 'futures')
+
+    def __init__(self, chat_id, text, priority, reply_to_message_id, reply_markup, future):
+        self.chat_id = chat_id
+        self.text = text
+        self.priority = priority
+        self.reply_to_message_id = reply_to_message_id
+        self.reply_markup = reply_markup
+        self.futures = [future]
+
+    def can_merge(self, other, limit):
+        # Keyboards and replies to different messages must stay separate
+        return (self.reply_markup is None and other.reply_markup is None
+                and other.reply_to_message_id in (None, self.reply_to_message_id)
+                and len(self.text) + len(other.text) + 2 <= limit)
+
+
+class OutboundDispatcher:
+    """Sends Telegram messages under per-chat and global rate limits."""
+
+    def __init__(self, global_rate=30.0, private_rate=1.0, group_rate=20 / 60,
+                 chat_burst=3, merge_limit=TELEGRAM_MESSAGE_LIMIT):
+        self.global_rate = global_rate
+        self.private_rate = private_rate
+        self.group_rate = group_rate
+        self.chat_burst = chat_burst
+        self.merge_limit = merge_limit
+        self.bot = None
+        self.sent_count = 0
+        self.merged_count = 0
+        self.rate_limited_count = 0
+        self._pending = {}
+        self._in_flight = set()
+        self._chat_buckets = {}
+        self._global_bucket = None
+        self._wakeup = None
+        self._task = None
+        self._send_tasks = set()
+
+    @property
+    def is_running(self):
+        return self._task is not None
+
+    def queue_depth(self):
+        return sum(len(queue) for queue in self._pending.values())
+
+    async def start(self, bot):
+        if self.is_running:
+            return
+        self.bot = bot
+        self._global_bucket = TokenBucket(self.global_rate, self.global_rate, time.monotonic())
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="telegram-outbound")
+        logger.info(f"Outbound dispatcher started (global {self.global_rate} msg/s)")
+
+    async def stop(self, timeout=10.0):
+        """Flush pending messages within the timeout, then stop."""
+        if not self.is_running:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._send_tasks) and time.monotonic() < deadline:
+            await asyncio.sleep(0.1)
+        self._task.cancel()
+        await asyncio.gather(self._task, *self._send_tasks, return_exceptions=True)
+        self._task = None
+        for queue in self._pending.values():
+            for item in queue:
+                for future in item.futures:
+                    if not future.done():
+                        future.set_exception(RuntimeError("Outbound dispatcher stopped"))
+        self._pending.clear()
+        logger.info("Outbound dispatcher stopped")
+
+    async def send(self, chat_id, text, priority=PRIORITY_NORMAL, reply_to_message_id=None, reply_markup=None):
+        """Queue a message and wait until Telegram accepts it."""
+        if not self.is_running:
+            raise RuntimeError("Outbound dispatcher is not running")
+        future = asyncio.get_running_loop().create_future()
+        item = OutboundMessage(chat_id, text, priority, reply_to_message_id, reply_markup, future)
+        self._pending.setdefault(chat_id, deque()).append(item)
+        self._wakeup.set()
+        return await future
+
+    def _chat_bucket(self, chat_id, now):
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            # Negative ids are groups and channels, which Telegram limits harder
+            rate = self.group_rate if chat_id < 0 else self.private_rate
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, self.chat_burst, now)
+        return bucket
+
+    def _next_ready(self, now):
+        """Pick the ready chat with the most urgent head message, or the time to wait."""
+        best = None
+        best_key = None
+        min_wait = None
+        for chat_id, queue in self._pending.items():
+            if chat_id in self._in_flight:
+                continue
+            wait = self._chat_bucket(chat_id, now).delay(now)
+            if wait > 0:
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+                continue
+            key = queue[0].priority
+            if best_key is None or key < best_key:
+                best, best_key = chat_id, key
+        return best, min_wait
+
+    def _take_merged(self, chat_id):
+        queue = self._pending[chat_id]
+        item = queue.popleft()
+        # Fold small consecutive messages into one to save rate limit tokens
+        while queue and item.can_merge(queue[0], self.merge_limit):
+            other = queue.popleft()
+            item.text = f"{item.text}\n\n{other.text}"
+            item.priority = min(item.priority, other.priority)
+            item.futures.extend(other.futures)
+            self.merged_count += 1
+        if not queue:
+            del self._pending[chat_id]
+        return item
+
+    async def _run(self):
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            now = time.monotonic()
+            chat_id, wait = self._next_ready(now)
+            if chat_id is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait or 0.05)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            global_wait = self._global_bucket.delay(now)
+            if global_wait > 0:
+                await asyncio.sleep(global_wait)
+                continue
+
+            item = self._take_merged(chat_id)
+            self._global_bucket.consume(now)
+            self._chat_bucket(chat_id, now).consume(now)
+            self._in_flight.add(chat_id)
+            task = asyncio.create_task(self._send(item))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_tasks.discard)
+            self._prune_buckets(now)
+
+    async def _send(self, item):
+        try:
+            message = await self.bot.send_message(
+                chat_id=item.chat_id,
+                text=item.text,
+                reply_to_message_id=item.reply_to_message_id,
+                reply_markup=item.reply_markup
+            )
+            self.sent_count += 1
+            for future in item.futures:
+                if not future.done():
+                    future.set_result(message)
+        except RetryAfter as e:
+            retry_after = float(getattr(e.retry_after, 'total_seconds', lambda: e.retry_after)())
+            self.rate_limited_count += 1
+            logger.warning(f"Rate limited sending to {item.chat_id}, pausing for {retry_after}s")
+            now = time.monotonic()
+            self._chat_bucket(item.chat_id, now).pause(retry_after, now)
+            # Put the message back at the front so the chat keeps its order
+            self._pending.setdefault(item.chat_id, deque()).appendleft(item)
+        except Exception as e:
+            for future in item.futures:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            self._in_flight.discard(item.chat_id)
+            self._wakeup.set()
+
+    def _prune_buckets(self, now):
+        if len(self._chat_buckets) < 10000:
+            return
+        for chat_id in [c for c, b in self._chat_buckets.items() if c not in self._pending and b.is_idle(now)]:
+            del self._chat_buckets[chat_id]
@@ -2,10 +2,12 @@ import random
 import html
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update
 from telegram.ext import ContextTypes
+from telegram_outbound import PRIORITY_TRIVIA
 
 class TelegramTrivia:
-    def __init__(self):
+    def __init__(self, dispatcher=None):
         """Initialize the trivia game with questions."""
+        self.dispatcher = dispatcher
         self.questions = [
             {
                 "question": "What is the minimum effective GLM balance required for user rewards?",
@@ -153,6 +155,17 @@ class TelegramTrivia:
         ]
         self.current_games = {}  # Store game state per user
         
+    async def _reply(self, message, text, reply_markup=None):
+        """Reply through the outbound dispatcher, ahead of regular chat answers."""
+        if self.dispatcher and self.dispatcher.is_running:
+            return await self.dispatcher.send(
+                message.chat_id,
+                text,
+                priority=PRIORITY_TRIVIA,
+                reply_markup=reply_markup
+            )
+        return await message.reply_text(text, reply_markup=reply_markup)
+
     def get_keyboard_markup(self, options):
         """Create Telegram inline keyboard for options."""
         keyboard = []
@@ -171,20 +184,34 @@ class TelegramTrivia:
         
         await self.send_next_question(update, context)
 
+    async def end_game(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """End the user's game early and show the score so far."""
+        game = self.current_games.pop(update.effective_user.id, None)
+        if not game:
+            await self._reply(update.message, "There's no trivia game running. Start one with /trivia")
+            return
+        await self._reply(
+            update.message,
+            f"🎮 Game Over!\n\n"
+            f"🏆 Final Score: {game['score']}/{game['questions_asked']}\n\n"
+            f"Want to play again? Use /trivia!"
+        )
+
     async def send_next_question(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Send the next question to the user."""
         user_id = update.effective_user.id
         game = self.current_games.get(user_id)
         
         if not game:
-            await update.message.reply_text("Please start a new game with /trivia")
+            await self._reply(update.message, "Please start a new game with /trivia")
             return
             
         if game['questions_asked'] >= len(self.questions):
             # Game finished
             score = game['score']
             percentage = (score / len(self.questions)) * 100
-            await update.message.reply_text(
+            await self._reply(
+                update.message,
                 f"🎮 Game Over!\n\n"
                 f"🏆 Final Score: {score}/{len(self.questions)} ({percentage:.1f}%)\n\n"
                 f"Want to play again? Use /trivia!"
@@ -202,7 +229,8 @@ class TelegramTrivia:
             f"Select your answer from the options below:"
         )
         
-        await update.message.reply_text(
+        await self._reply(
+            update.message,
             message,
             reply_markup=self.get_keyboard_markup(question['options'])
         )
@@ -247,7 +275,7 @@ class TelegramTrivia:
             )
         
         await query.answer()  # Clear the "loading" state of the button
-        await query.message.reply_text(result_message)
+        await self._reply(query.message, result_message)
         
         # Check if we still have questions before sending the next one
         if game['questions_asked'] < len(self.questions):
@@ -262,7 +290,8 @@ class TelegramTrivia:
                 f"Select your answer from the options below:"
             )
             
-            await query.message.reply_text(
+            await self._reply(
+                query.message,
                 message,
                 reply_markup=self.get_keyboard_markup(question['options'])
             )
@@ -0,0 +1,127 @@
+import asyncio
+import hmac
+import logging
+from collections import deque
+from aiohttp import web, ClientSession
+from telegram import Update
+
+logger = logging.getLogger(__name__)
+
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+# Queued by stop() after the server has closed; the dispatcher exits once it reaches it
+_STOP = object()
+
+
+class TelegramWebhookServer:
+    """Local aiohttp server that receives Telegram webhook updates."""
+
+    def __init__(self, application, secret_token, host='0.0.0.0', port=8443,
+                 path='/telegram/webhook', batch_size=50, batch_interval=0.05,
+                 max_pending=1000):
+        self.application = application
+        self.secret_token = secret_token
+        self.host = host
+        self.port = port
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        self._pending = asyncio.Queue(maxsize=max_pending)
+        # Telegram redelivers updates it thinks were not received, so remember recent ids
+        self._recent_ids = deque(maxlen=max_pending)
+        self._recent_id_set = set()
+        self._runner = None
+        self._dispatcher = None
+
+    async def start(self):
+        """Start the HTTP server and the batch dispatcher."""
+        app = web.Application()
+        app.router.add_post(self.path, self.handle_update)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop(), name="telegram-webhook-dispatch")
+        logger.info(f"Webhook server listening on {self.host}:{self.port}{self.path}")
+
+    async def stop(self):
+        """Stop accepting updates and flush anything already received."""
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._dispatcher:
+            # Updates were acknowledged on receipt and Telegram won't resend them, so let the
+            # dispatcher finish everything it holds instead of cancelling it mid-batch
+            await self._pending.put(_STOP)
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+        logger.info("Webhook server stopped")
+
+    async def handle_update(self, request):
+        """Validate the secret token and queue the posted update(s)."""
+        received_token = request.headers.get(SECRET_TOKEN_HEADER, "")
+        if not hmac.compare_digest(received_token, self.secret_token):
+            logger.warning(f"Rejected webhook request from {request.remote}: bad secret token")
+            return web.Response(status=403)
+
+        try:
+            payload = await request.json()
+        except ValueError:
+            return web.Response(status=400, text="Invalid JSON")
+
+        updates = payload if isinstance(payload, list) else [payload]
+        for data in updates:
+            if not isinstance(data, dict):
+                return web.Response(status=400, text="Invalid update")
+            try:
+                self._pending.put_nowait(data)
+            except asyncio.QueueFull:
+                # A non-2xx status makes Telegram retry the delivery later
+                logger.warning("Webhook backlog full, asking Telegram to retry")
+                return web.Response(status=503)
+        return web.Response(status=200)
+
+    async def _dispatch_loop(self):
+        while True:
+            batch = [await self._pending.get()]
+            # Give bursts a moment to accumulate so they are decoded together
+            await asyncio.sleep(self.batch_interval)
+            while len(batch) < self.batch_size and not self._pending.empty():
+                batch.append(self._pending.get_nowait())
+            # _STOP is the last item ever queued, so it can only end a batch
+            stopping = batch[-1] is _STOP
+            if stopping:
+                batch.pop()
+            await self._dispatch_batch(batch)
+            if stopping:
+                return
+
+    async def _dispatch_batch(self, batch):
+        for data in batch:
+            update_id = data.get("update_id")
+            # Without an id there is nothing to recognise a redelivery by
+            if update_id is not None:
+                if update_id in self._recent_id_set:
+                    logger.debug(f"Skipping redelivered update {update_id}")
+                    continue
+                if len(self._recent_ids) == self._recent_ids.maxlen:
+                    self._recent_id_set.discard(self._recent_ids[0])
+                self._recent_ids.append(update_id)
+                self._recent_id_set.add(update_id)
+
+            try:
+                update = Update.de_json(data, self.application.bot)
+                await self.application.update_queue.put(update)
+            except Exception as e:
+                logger.error(f"Failed to decode webhook update {update_id}: {str(e)}")
+        logger.debug(f"Dispatched webhook batch of {len(batch)} updates")
+
+
+async def post_updates(url, updates, secret_token):
+    """Local stand-in for Telegram that POSTs raw update dicts to a webhook URL."""
+    statuses = []
+    async with ClientSession() as session:
+        for update in updates:
+            async with session.post(url, json=update, headers={SECRET_TOKEN_HEADER: secret_token}) as response:
+                statuses.append(response.status)
+    return statuses
@@ -0,0 +1,47 @@
+import os
+
+import pytest
+
+import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    dist = tmp_path / 'dist'
+    monkeypatch.setattr(assets, 'STATIC_DIR', str(tmp_path))
+    monkeypatch.setattr(assets, 'DIST_DIR', str(dist))
+    monkeypatch.setattr(assets, 'MANIFEST_PATH', str(dist / 'manifest.json'))
+    (tmp_path / 'css').mkdir()
+    (tmp_path / 'css' / 'style.css').write_text('body { color: black; }')
+    return tmp_path
+
+
+def test_build_fingerprints_and_precompresses(static_dir):
+    manifest = assets.load_manifest()
+    built = manifest['css/style.css']['file']
+    assert built.startswith('css/style.') and built.endswith('.css')
+    assert os.path.exists(os.path.join(assets.DIST_DIR, built + '.gz'))
+    if assets.brotli:
+        assert os.path.exists(os.path.join(assets.DIST_DIR, built + '.br'))
+
+
+def test_unchanged_sources_reuse_the_manifest(static_dir, monkeypatch):
+    first = assets.load_manifest()
+    monkeypatch.setattr(assets, 'build_assets', lambda: pytest.fail("rebuilt unchanged assets"))
+    assert assets.load_manifest() == first
+
+
+def test_changed_sources_rebuild_a_stale_manifest(static_dir):
+    before = assets.load_manifest()['css/style.css']['file']
+    (static_dir / 'css' / 'style.css').write_text('body { color: white; }')
+    after = assets.load_manifest()['css/style.css']['file']
+    assert after != before
+    assert not os.path.exists(os.path.join(assets.DIST_DIR, before))
+
+
+@pytest.mark.skipif(assets.Image is None, reason="Pillow is not installed")
+def test_raster_images_get_webp_variants(static_dir):
+    assets.Image.new('RGB', (300, 150), 'red').save(static_dir / 'logo.png')
+    entry = assets.load_manifest()['logo.png']
+    assert entry['webp'].endswith('.webp')
+    assert sorted(entry['variants']) == ['128', '256', '64']
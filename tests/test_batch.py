@@ -0,0 +1,48 @@
+import pytest
+
+import chat_handler
+import tracing
+from quota import DEFAULT, QuotaService, Tier, user_context
+
+
+class AnswerResponse:
+    status_code = 200
+    text = ""
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        usage = {"prompt_tokens": 20, "completion_tokens": 10}
+        return {"output": {"choices": [{"text": " An answer."}], "usage": usage}, "usage": usage}
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    monkeypatch.setenv("MODEL_HEDGING", "false")
+    monkeypatch.setattr(chat_handler.requests, "post", lambda url, **kwargs: AnswerResponse())
+    return chat_handler.ChatHandler()
+
+
+def test_batch_items_are_charged_to_the_callers_quota(handler, monkeypatch):
+    # Room for four 30-token answers; the fourth takes the bucket into debt
+    quotas = QuotaService({DEFAULT: Tier(DEFAULT, 100, 1)})
+    monkeypatch.setattr(chat_handler, "QUOTAS", quotas)
+
+    with user_context("web", "10.0.0.1"):
+        results = handler.get_responses([f"Question number {index}?" for index in range(10)], max_workers=1)
+
+    answers = [result["response"] for result in results]
+    assert answers[:4] == ["An answer."] * 4
+    assert all("usage limit" in answer for answer in answers[4:])
+    assert quotas.usage("web", "10.0.0.1")["tokens_used"] == 120
+
+
+def test_batch_items_are_spans_of_the_callers_trace(handler):
+    with tracing.start_trace("http.chat_batch") as root:
+        handler.get_responses(["What is Octant?", "How do epochs work?"], max_workers=2)
+
+    answers = [span for span in root._spans if span.name == "chat_handler.get_response"]
+    assert len(answers) == 2
+    assert all(span.trace_id == root.trace_id and span.parent_id == root.span_id for span in answers)
@@ -0,0 +1,71 @@
+import json
+import threading
+import time
+
+import pytest
+
+import config_store
+from config_store import MAX_SYSTEM_PROMPT_LENGTH, ConfigError, ConfigStore, validate
+
+
+def test_defaults_fill_missing_sections():
+    snapshot = validate({"response_config": {"temperature": 1}})
+
+    assert snapshot.temperature == 1.0 and isinstance(snapshot.temperature, float)
+    assert snapshot.max_length == 2000
+    assert snapshot.max_tokens == 500
+    assert snapshot.repetition_penalty == 1.1
+    assert snapshot.as_dict()["personality"]["style"] == "friendly"
+
+
+def test_version_depends_only_on_content():
+    assert validate({"system_prompt": " Be brief. "}).version == validate({"system_prompt": "Be brief."}).version
+    assert validate({}).version != validate({"system_prompt": "Be brief."}).version
+
+
+@pytest.mark.parametrize("config", [
+    [],
+    {"system_prompt": "   "},
+    {"system_prompt": "x" * (MAX_SYSTEM_PROMPT_LENGTH + 1)},
+    {"response_config": "hot"},
+    {"response_config": {"temperature": 2.5}},
+    {"response_config": {"max_length": "2000"}},
+    {"response_config": {"max_length": True}},
+])
+def test_invalid_configurations_are_rejected(config):
+    with pytest.raises(ConfigError):
+        validate(config)
+
+
+def test_invalid_file_keeps_the_previous_snapshot(tmp_path):
+    path = tmp_path / "bot_config.json"
+    store = ConfigStore(str(path))
+    applied = store.update({"response_config": {"temperature": 0.2}})
+
+    path.write_text(json.dumps({"response_config": {"temperature": 9}}))
+    assert store.reload() is applied
+
+    path.write_text(json.dumps({"response_config": {"temperature": 0.4}}) + " ")
+    assert store.reload().temperature == 0.4
+
+
+def test_concurrent_first_readers_start_one_watcher(tmp_path, monkeypatch):
+    started = []
+
+    pid = config_store.os.getpid()
+
+    def slow_getpid():
+        # Widen the window between checking the pid and recording it
+        time.sleep(0.01)
+        return pid
+
+    monkeypatch.setattr(config_store, "start_native_thread", lambda target, name: started.append(name))
+    monkeypatch.setattr(config_store.os, "getpid", slow_getpid)
+    store = ConfigStore(str(tmp_path / "bot_config.json"))
+    readers = [threading.Thread(target=lambda: store.current) for _ in range(8)]
+    for reader in readers:
+        reader.start()
+    for reader in readers:
+        reader.join()
+
+    assert started == ["config-watcher"]
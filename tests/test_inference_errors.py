@@ -0,0 +1,77 @@
+import pytest
+import requests
+
+import chat_handler
+from model_router import Endpoint, ModelRouter, RequestRejected
+
+
+class FakeResponse:
+    def __init__(self, status_code, payload=None):
+        self.status_code = status_code
+        self.text = "error"
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"HTTP {self.status_code}")
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    monkeypatch.setenv("MODEL_HEDGING", "false")
+    monkeypatch.setattr(chat_handler.time, "sleep", lambda seconds: None)
+    return chat_handler.ChatHandler()
+
+
+def post_returning(monkeypatch, outcome):
+    calls = []
+
+    def post(url, **kwargs):
+        calls.append(kwargs["timeout"])
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(chat_handler.requests, "post", post)
+    return calls
+
+
+def test_read_timeouts_are_not_retried(handler, monkeypatch):
+    calls = post_returning(monkeypatch, requests.exceptions.ReadTimeout("slow"))
+    answer = handler.get_response("user", "Tell me a joke")
+    assert len(calls) == 1
+    assert chat_handler.UNAVAILABLE_MESSAGE in answer
+
+
+def test_retries_fit_in_the_deadline(handler, monkeypatch):
+    calls = post_returning(monkeypatch, FakeResponse(503))
+    handler.get_response("user", "Tell me a joke")
+    assert 1 < len(calls) <= chat_handler.MAX_ATTEMPTS
+    assert all(read <= chat_handler.INFERENCE_DEADLINE for _, read in calls)
+    assert calls[0][1] <= chat_handler.SLOW_CALL_SECONDS
+
+
+def test_client_errors_do_not_open_the_circuit(handler, monkeypatch):
+    calls = post_returning(monkeypatch, FakeResponse(400))
+    for _ in range(10):
+        assert handler.get_response("user", "Tell me a joke") == chat_handler.UNAVAILABLE_MESSAGE
+    assert len(calls) == 10
+    assert not any(endpoint.breaker.is_open() for endpoint in handler.model_router.endpoints)
+
+
+def test_router_records_rejections_as_healthy():
+    endpoint = Endpoint("test", "model", "http://localhost")
+    router = ModelRouter([endpoint], hedging=False)
+
+    def send(endpoint):
+        raise RequestRejected("HTTP 413")
+
+    for _ in range(10):
+        with pytest.raises(RequestRejected):
+            router.call(send, "large")
+    assert endpoint.error_rate() == 0
+    assert not endpoint.breaker.is_open()
@@ -0,0 +1,34 @@
+import pytest
+
+from intent_router import (COMMAND, CONTACT, LINKS, LLM, TRIVIA_ANSWER, TRIVIA_END, TRIVIA_NEXT,
+                           TRIVIA_START, IntentRouter)
+
+
+@pytest.fixture
+def router():
+    return IntentRouter()
+
+
+@pytest.mark.parametrize("message, kind", [
+    ("/help", COMMAND),
+    ("start trivia", TRIVIA_START),
+    ("Stop the trivia game!", TRIVIA_END),
+    ("show links please", LINKS),
+    ("how can I contact james on social?", CONTACT),
+    ("What is Octant and how do I get started?", LLM),
+    ("b", LLM),
+    ("next", LLM),
+    (None, LLM),
+])
+def test_classify_outside_a_game(router, message, kind):
+    assert router.classify(message).kind == kind
+
+
+def test_bare_letters_and_next_are_trivia_moves_during_a_game(router):
+    assert router.classify("my answer is c.", in_trivia=True) == (TRIVIA_ANSWER, None, "C")
+    assert router.classify("next question", in_trivia=True).kind == TRIVIA_NEXT
+    assert router.classify("b is my favourite letter", in_trivia=True).kind == LLM
+
+
+def test_command_keeps_its_argument_and_drops_the_bot_name(router):
+    assert router.classify("/LEARN@octant_bot funding rounds") == (COMMAND, "/learn", "funding rounds")
@@ -0,0 +1,27 @@
+import asyncio
+import time
+
+from loop_monitor import LoopMonitor
+from metrics import LOOP_STALLS
+
+
+def test_stall_is_counted_and_blamed_on_the_blocking_task():
+    monitor = LoopMonitor('test', probe_interval=0.05, stall_threshold=0.2, fatal_threshold=60)
+    stalls_before = LOOP_STALLS.labels('test').get()
+
+    async def scenario():
+        await monitor.start()
+        await asyncio.sleep(0.1)
+
+        async def block():
+            time.sleep(0.6)
+
+        await asyncio.create_task(block(), name="blocker")
+        await asyncio.sleep(0.1)
+        await monitor.stop()
+
+    asyncio.run(scenario())
+    assert monitor.stall_count == 1
+    assert LOOP_STALLS.labels('test').get() == stalls_before + 1
+    assert monitor.last_stall_task == "blocker"
+    assert monitor.samples > 0 and monitor.max_lag >= 0.4
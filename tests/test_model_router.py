@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from model_router import LARGE, Endpoint, ModelRouter
+
+
+def measured(name, latency):
+    endpoint = Endpoint(name, f"{name}-model", "http://inference.test", LARGE)
+    for _ in range(20):
+        endpoint.record(latency, ok=True)
+    return endpoint
+
+
+@pytest.fixture
+def release():
+    event = threading.Event()
+    yield event
+    event.set()
+
+
+def test_hedged_call_gives_up_at_its_deadline(release):
+    router = ModelRouter([measured("slow-a", 0.01), measured("slow-b", 0.02)])
+
+    with pytest.raises(TimeoutError):
+        router.call(lambda endpoint: release.wait(5), LARGE, timeout=0.2)
+
+
+def test_saturated_pool_runs_unhedged_on_the_callers_thread(release):
+    router = ModelRouter([measured("busy-a", 0.01), measured("busy-b", 0.02)], max_hedge_workers=2)
+    # A straggler from an earlier hedge still holds one of the two pool threads
+    router._submit(router.endpoints[0], lambda endpoint: release.wait(5))
+    callers = []
+
+    def send(endpoint):
+        callers.append(threading.current_thread())
+        return "answer"
+
+    endpoint, answer = router.call(send, LARGE, timeout=1)
+    assert answer == "answer"
+    assert callers == [threading.current_thread()]
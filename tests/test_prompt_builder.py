@@ -0,0 +1,31 @@
+from config_store import validate
+from prompt_builder import COLD, WARM, PromptBuilder
+
+
+def test_prefix_is_identical_across_users_and_requests():
+    builder = PromptBuilder()
+    config = validate({})
+
+    first = builder.build(config, "User: hi", "What is Octant?")
+    second = builder.build(validate({}), "User: something else entirely", "How do I lock GLM?")
+    prefix, prefix_hash = builder.prefix(config)
+
+    assert first.startswith(prefix) and second.startswith(prefix)
+    assert "What is Octant?" not in prefix
+    assert PromptBuilder().prefix(validate({})) == (prefix, prefix_hash)
+
+
+def test_new_configuration_gets_a_new_prefix():
+    builder = PromptBuilder()
+    _, default_hash = builder.prefix(validate({}))
+    _, edited_hash = builder.prefix(validate({"system_prompt": "You are terse."}))
+    assert edited_hash != default_hash
+
+
+def test_prefix_is_warm_per_model_within_the_ttl():
+    builder = PromptBuilder(ttl=300)
+    config = validate({})
+
+    assert builder.mark_sent(config, "large")[1] == COLD
+    assert builder.mark_sent(config, "large")[1] == WARM
+    assert builder.mark_sent(config, "fast")[1] == COLD
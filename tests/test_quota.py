@@ -0,0 +1,78 @@
+import pytest
+
+import quota
+from quota import ADMIN, DEFAULT, QuotaService, Tier
+from shared_backends import SQLiteQuotaStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(quota.time, "monotonic", clock)
+    monkeypatch.setattr(quota.time, "time", clock)
+    return clock
+
+
+def service(storage=None):
+    # 100 tokens at once, refilled at one token per second
+    quotas = QuotaService({DEFAULT: Tier(DEFAULT, 100, 3600), ADMIN: Tier(ADMIN, 1000, 36000)},
+                          admins=["telegram:42"])
+    if storage is not None:
+        quotas.use_storage(storage)
+    return quotas
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def quotas(request, tmp_path, clock):
+    if request.param == "memory":
+        return service()
+    return service(SQLiteQuotaStorage(f"sqlite:///{tmp_path / 'quota.db'}"))
+
+
+def test_bucket_goes_into_debt_and_refills(quotas, clock):
+    assert quotas.check("web", "1.2.3.4") == 0
+    quotas.charge("web", "1.2.3.4", 130)
+
+    assert quotas.check("web", "1.2.3.4") == pytest.approx(31)
+    clock.now += 31
+    assert quotas.check("web", "1.2.3.4") == 0
+    assert quotas.usage("web", "1.2.3.4") == {"tokens_left": 1, "tokens_used": 130, "tier": DEFAULT}
+
+
+def test_refill_stops_at_capacity(quotas, clock):
+    quotas.charge("web", "1.2.3.4", 10)
+    clock.now += 3600
+    assert quotas.usage("web", "1.2.3.4")["tokens_left"] == 100
+
+
+def test_admins_get_their_own_tier(quotas):
+    quotas.charge("telegram", 42, 500)
+    assert quotas.check("telegram", 42) == 0
+    assert quotas.usage("telegram", 42)["tier"] == ADMIN
+    assert quotas.usage("discord", 42)["tier"] == DEFAULT
+
+
+def test_workers_share_sqlite_buckets(tmp_path, clock):
+    path = f"sqlite:///{tmp_path / 'quota.db'}"
+    first, second = service(SQLiteQuotaStorage(path)), service(SQLiteQuotaStorage(path))
+
+    first.charge("web", "1.2.3.4", 60)
+    second.charge("web", "1.2.3.4", 60)
+    assert first.check("web", "1.2.3.4") > 0
+    assert second.usage("web", "1.2.3.4")["tokens_used"] == 120
+
+
+def test_snapshot_round_trip(clock):
+    quotas = service()
+    quotas.charge("discord", 7, 40)
+    restored = service()
+    restored.restore(quotas.snapshot())
+    assert restored.usage("discord", 7) == {"tokens_left": 60, "tokens_used": 40, "tier": DEFAULT}
@@ -0,0 +1,93 @@
+import pytest
+
+import resilience
+from resilience import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, FallbackCache, RetryBudget, backoff_delay
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    return clock
+
+
+def test_breaker_stays_closed_below_min_calls(clock):
+    breaker = CircuitBreaker("test", min_calls=5)
+    for _ in range(4):
+        breaker.record_failure(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+def test_breaker_opens_on_error_rate_and_fails_fast(clock):
+    breaker = CircuitBreaker("test", min_calls=4, error_rate_threshold=0.5, open_seconds=30)
+    for failed in (False, True, False, True):
+        (breaker.record_failure if failed else breaker.record_success)(0.1)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_breaker_opens_on_slow_calls(clock):
+    breaker = CircuitBreaker("test", min_calls=5, slow_call_seconds=1.0, slow_rate_threshold=0.8)
+    for _ in range(5):
+        breaker.record_success(2.0)
+    assert breaker.state == OPEN
+
+
+def test_half_open_lets_one_probe_through_and_closes_on_success(clock):
+    breaker = CircuitBreaker("test", min_calls=1, open_seconds=30)
+    breaker.record_failure(0.1)
+    clock.now += 31
+    assert breaker.allow()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+    breaker.record_success(0.1)
+    assert breaker.state == CLOSED and breaker.allow()
+
+
+@pytest.mark.parametrize("outcome", ["failure", "slow"])
+def test_failed_or_slow_probe_reopens(clock, outcome):
+    breaker = CircuitBreaker("test", min_calls=1, slow_call_seconds=1.0, open_seconds=30)
+    breaker.record_failure(0.1)
+    clock.now += 31
+    assert breaker.allow()
+    if outcome == "failure":
+        breaker.record_failure(0.1)
+    else:
+        breaker.record_success(5.0)
+    assert breaker.state == OPEN
+    assert not breaker.allow()
+
+
+def test_retry_budget_allows_the_floor_then_a_share_of_requests(clock):
+    budget = RetryBudget(ratio=0.5, min_retries_per_second=0.1, window_seconds=10)
+    assert budget.try_acquire_retry()
+    assert not budget.try_acquire_retry()
+    for _ in range(4):
+        budget.record_request()
+    assert budget.try_acquire_retry() and budget.try_acquire_retry()
+    assert not budget.try_acquire_retry()
+    # Old retries and requests leave the window
+    clock.now += 11
+    assert budget.try_acquire_retry()
+
+
+def test_backoff_delay_is_capped():
+    assert all(0 <= backoff_delay(attempt, base=0.5, cap=2.0) <= 2.0 for attempt in range(10))
+
+
+def test_fallback_cache_matches_normalised_questions_and_evicts_oldest():
+    cache = FallbackCache(max_entries=2)
+    cache.put("What is Octant?", "answer 1")
+    cache.put("What is GLM?", "answer 2")
+    assert cache.get("what is octant") == "answer 1"
+    cache.put("What is an epoch?", "answer 3")
+    assert cache.get("What is GLM?") is None
+    assert cache.get("What is Octant?") == "answer 1"
@@ -0,0 +1,50 @@
+import pytest
+
+from response_splitter import PLATFORM_LIMITS, split_ranges, split_response
+
+
+def test_short_and_empty_answers():
+    assert split_response("  Hello there!  \n", platform="telegram") == ["Hello there!"]
+    assert split_response(" \n\t ", platform="discord") == []
+    assert split_response("word " * 5000, platform="web") == [("word " * 5000).strip()]
+
+
+@pytest.mark.parametrize("platform", ["discord", "telegram"])
+def test_chunks_fit_the_platform_and_keep_every_word(platform):
+    text = "\n\n".join(f"Paragraph {index}. " + "Some words about Octant. " * 30 for index in range(40))
+    chunks = split_response(text, platform=platform)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) <= PLATFORM_LIMITS[platform] for chunk in chunks)
+    assert " ".join(chunks).split() == text.split()
+
+
+def test_cuts_prefer_paragraphs_then_sentences():
+    assert split_response("First paragraph here.\n\nSecond one.", limit=30) == [
+        "First paragraph here.", "Second one."]
+    assert split_response("One sentence ends. Another follows on", limit=25) == [
+        "One sentence ends.", "Another follows on"]
+
+
+def test_word_longer_than_the_limit_is_cut_mid_word():
+    assert split_response("a" * 25, limit=10) == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_code_block_is_closed_and_reopened_across_chunks():
+    code = "\n".join(f"    value_{index} = compute({index})" for index in range(20))
+    text = f"Intro line.\n```python\n{code}\n```\nDone."
+    chunks = split_response(text, limit=200)
+
+    assert len(chunks) > 2
+    assert all(len(chunk) <= 200 for chunk in chunks)
+    for chunk in chunks:
+        # Every message renders on its own: its fences are balanced
+        assert chunk.count("```") % 2 == 0
+    # Later chunks reopen the block with its language and keep the indentation
+    assert all(chunk.startswith("```python\n    value_") for chunk in chunks[1:])
+
+
+def test_ranges_point_into_the_original_text():
+    text = "Alpha beta gamma. " * 20
+    for chunk in split_ranges(text, 50):
+        assert chunk.render(text) == text[chunk.start:chunk.end]
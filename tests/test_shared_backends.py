@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+import shared_backends
+from shared_backends import SQLiteManager, SQLiteStorage
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(shared_backends.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def uri(tmp_path):
+    return f"sqlite:///{tmp_path / 'shared.db'}"
+
+
+def test_counters_expire(uri, clock):
+    storage = SQLiteStorage(uri)
+    assert storage.incr("ip", expiry=60) == 1
+    assert storage.incr("ip", expiry=60, amount=2) == 3
+    assert storage.get("ip") == 3
+    assert storage.get_expiry("ip") == 1060
+
+    clock.now += 61
+    assert storage.get("ip") == 0
+    assert storage.incr("ip", expiry=60) == 1
+    assert storage.get_expiry("ip") == 1121
+
+
+def test_elastic_expiry_extends_the_window(uri, clock):
+    storage = SQLiteStorage(uri)
+    storage.incr("ip", expiry=60)
+    clock.now += 30
+    storage.incr("ip", expiry=60, elastic_expiry=True)
+    assert storage.get_expiry("ip") == 1090
+
+
+def test_workers_share_counters(uri, clock):
+    first, second = SQLiteStorage(uri), SQLiteStorage(uri)
+    first.incr("ip", expiry=60)
+    second.incr("ip", expiry=60)
+    assert first.get("ip") == 2
+
+    second.clear("ip")
+    assert first.get("ip") == 0
+    assert first.check()
+
+
+class Server:
+    def __init__(self):
+        self.polling = threading.Event()
+
+    def sleep(self, seconds):
+        self.polling.set()
+        time.sleep(0.01)
+
+
+def test_emits_published_by_one_worker_reach_another(uri):
+    publisher, subscriber = SQLiteManager(uri), SQLiteManager(uri)
+    subscriber.server = Server()
+    received = []
+    listener = threading.Thread(target=lambda: received.append(next(subscriber._listen())), daemon=True)
+    listener.start()
+    # Only messages published after a worker starts listening are delivered to it
+    assert subscriber.server.polling.wait(5)
+
+    publisher._publish({"method": "emit", "event": "receive_message", "data": ["hi"], "room": "sid-1"})
+    listener.join(5)
+
+    assert received and received[0]["event"] == "receive_message"
+    assert received[0]["room"] == "sid-1"
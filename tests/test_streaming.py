@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+import chat_handler
+from quota import QUOTAS, user_context
+
+
+class StreamingResponse:
+    status_code = 200
+
+    def __init__(self, events):
+        self.lines = [f"data: {json.dumps(event)}" for event in events] + ["data: [DONE]"]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def raise_for_status(self):
+        pass
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+
+@pytest.fixture
+def handler(monkeypatch):
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    monkeypatch.setenv("MODEL_HEDGING", "false")
+    return chat_handler.ChatHandler()
+
+
+def streaming(monkeypatch, events):
+    requests_sent = []
+
+    def post(url, json=None, **kwargs):
+        requests_sent.append(json)
+        return StreamingResponse(events)
+
+    monkeypatch.setattr(chat_handler.requests, "post", post)
+    return requests_sent
+
+
+def test_stream_asks_for_usage_and_charges_it(handler, monkeypatch):
+    sent = streaming(monkeypatch, [
+        {"choices": [{"text": " Hello"}]},
+        {"choices": [{"text": " there"}], "usage": {"prompt_tokens": 300, "completion_tokens": 2}},
+    ])
+
+    with user_context("web", "stream-complete"):
+        assert "".join(handler.stream_response("s1", "hi")) == "Hello there"
+
+    assert sent[0]["stream_options"] == {"include_usage": True}
+    assert QUOTAS.usage("web", "stream-complete")["tokens_used"] == 302
+
+
+def test_client_hanging_up_still_charges_the_streamed_tokens(handler, monkeypatch):
+    streaming(monkeypatch, [{"choices": [{"text": " word"}]} for _ in range(50)])
+
+    with user_context("web", "stream-abandoned"):
+        stream = handler.stream_response("s2", "tell me a long story")
+        next(stream)
+        next(stream)
+        stream.close()
+
+    assert QUOTAS.usage("web", "stream-abandoned")["tokens_used"] > 0
@@ -0,0 +1,85 @@
+import asyncio
+from collections import deque
+
+import pytest
+
+from telegram_outbound import PRIORITY_NORMAL, PRIORITY_TRIVIA, OutboundDispatcher, OutboundMessage, TokenBucket
+
+
+def test_bucket_allows_a_burst_then_paces():
+    bucket = TokenBucket(rate=2.0, capacity=3, now=0.0)
+    for _ in range(3):
+        assert bucket.delay(0.0) == 0
+        bucket.consume(0.0)
+
+    assert bucket.delay(0.0) == pytest.approx(0.5)
+    assert bucket.delay(0.5) == 0
+    assert not bucket.is_idle(0.5)
+    assert bucket.is_idle(10.0)
+
+
+def test_bucket_pause_blocks_for_retry_after():
+    bucket = TokenBucket(rate=1.0, capacity=3, now=0.0)
+    bucket.pause(5, now=0.0)
+
+    assert bucket.delay(0.0) == pytest.approx(5)
+    assert bucket.delay(5.0) == 0
+
+
+def queued(dispatcher, chat_id, *items):
+    dispatcher._pending[chat_id] = deque(
+        OutboundMessage(chat_id, text, priority, reply_to, markup, object())
+        for text, priority, reply_to, markup in items)
+
+
+def test_small_messages_merge_until_something_must_stay_separate():
+    dispatcher = OutboundDispatcher(merge_limit=20)
+    queued(dispatcher, 7,
+           ("one", PRIORITY_NORMAL, None, None),
+           ("two", PRIORITY_TRIVIA, None, None),
+           ("keyboard", PRIORITY_NORMAL, None, "markup"),
+           ("after", PRIORITY_NORMAL, None, None))
+
+    merged = dispatcher._take_merged(7)
+    assert merged.text == "one\n\ntwo"
+    assert merged.priority == PRIORITY_TRIVIA
+    assert len(merged.futures) == 2
+    assert dispatcher._take_merged(7).text == "keyboard"
+    assert dispatcher._take_merged(7).text == "after"
+    assert 7 not in dispatcher._pending
+
+
+def test_merge_respects_the_length_limit_and_reply_targets():
+    dispatcher = OutboundDispatcher(merge_limit=13)
+    queued(dispatcher, 7,
+           ("hello", PRIORITY_NORMAL, 1, None),
+           ("again", PRIORITY_NORMAL, 2, None),
+           ("world!", PRIORITY_NORMAL, None, None),
+           ("too long now", PRIORITY_NORMAL, None, None))
+
+    assert dispatcher._take_merged(7).text == "hello"
+    assert dispatcher._take_merged(7).text == "again\n\nworld!"
+    assert dispatcher._take_merged(7).text == "too long now"
+
+
+def test_dispatcher_delivers_merged_messages_in_order():
+    class Bot:
+        def __init__(self):
+            self.sent = []
+
+        async def send_message(self, chat_id, text, reply_to_message_id=None, reply_markup=None):
+            self.sent.append((chat_id, text))
+            return len(self.sent)
+
+    async def scenario():
+        bot = Bot()
+        dispatcher = OutboundDispatcher()
+        await dispatcher.start(bot)
+        results = await asyncio.gather(*(dispatcher.send(5, f"part {index}") for index in range(3)))
+        await dispatcher.stop(timeout=1)
+        return bot.sent, results, dispatcher.merged_count
+
+    sent, results, merged_count = asyncio.run(scenario())
+    assert sent == [(5, "part 0\n\npart 1\n\npart 2")]
+    assert results == [1, 1, 1]
+    assert merged_count == 2
@@ -0,0 +1,51 @@
+import asyncio
+from types import SimpleNamespace
+
+from telegram_webhook import TelegramWebhookServer
+
+
+def make_server(**kwargs):
+    application = SimpleNamespace(bot=None, update_queue=asyncio.Queue())
+    return TelegramWebhookServer(application, "secret", **kwargs), application
+
+
+def dispatched_ids(application):
+    ids = []
+    while not application.update_queue.empty():
+        ids.append(application.update_queue.get_nowait().update_id)
+    return ids
+
+
+def test_redelivered_updates_are_dispatched_once():
+    async def scenario():
+        server, application = make_server()
+        await server._dispatch_batch([{"update_id": 1}, {"update_id": 2}, {"update_id": 1}])
+        return dispatched_ids(application)
+
+    assert asyncio.run(scenario()) == [1, 2]
+
+
+def test_updates_without_id_are_never_deduplicated(monkeypatch):
+    # python-telegram-bot rejects id-less updates; the point is that none is dropped as a redelivery
+    monkeypatch.setattr("telegram_webhook.Update.de_json", lambda data, bot: data)
+
+    async def scenario():
+        server, application = make_server()
+        await server._dispatch_batch([{"update_id": 0}, {}, {}])
+        return application.update_queue.qsize()
+
+    assert asyncio.run(scenario()) == 3
+
+
+def test_stop_flushes_the_batch_the_dispatcher_holds():
+    async def scenario():
+        server, application = make_server(batch_interval=0.2)
+        server._dispatcher = asyncio.create_task(server._dispatch_loop())
+        for update_id in range(5):
+            server._pending.put_nowait({"update_id": update_id})
+        # Let the dispatcher take the batch and start waiting for more
+        await asyncio.sleep(0.01)
+        await server.stop()
+        return dispatched_ids(application)
+
+    assert asyncio.run(scenario()) == [0, 1, 2, 3, 4]
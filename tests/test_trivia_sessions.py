@@ -0,0 +1,53 @@
+import pytest
+
+import chat_handler
+from chat_service import ChatService
+from intent_router import LLM
+from shared_backends import SQLiteSessionStore
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    return ChatService(chat_handler.ChatHandler())
+
+
+def test_trivia_games_are_kept_per_client(service):
+    service.respond("alice", "start trivia")
+
+    assert service.handler.is_playing_trivia("alice")
+    assert not service.handler.is_playing_trivia("bob")
+    # Bob's "b" is a question for the model, not a move in Alice's game
+    assert service.handler.intent_router.classify(
+        "b", in_trivia=service.handler.is_playing_trivia("bob")).kind == LLM
+    assert "no trivia game running" in service.respond("bob", "end trivia")
+    assert service.handler.is_playing_trivia("alice")
+
+
+def test_ending_a_session_drops_its_game(service):
+    service.respond("alice", "/trivia")
+    service.respond("bob", "start trivia")
+    assert len(service.handler.trivia_games) == 2
+
+    service.respond("alice", "end trivia")
+    service.end_session("bob")
+    assert service.handler.trivia_games == {}
+
+
+def test_workers_sharing_session_stores_continue_each_others_games(monkeypatch, tmp_path):
+    monkeypatch.setenv("TOGETHER_API_KEY", "test")
+    uri = f"sqlite:///{tmp_path / 'sessions.db'}"
+    first, second = chat_handler.ChatHandler(), chat_handler.ChatHandler()
+    for worker in (first, second):
+        worker.use_session_stores(SQLiteSessionStore(uri, "conversation_history"),
+                                  SQLiteSessionStore(uri, "trivia_games"))
+
+    first.handle_socket_message("alice", "start trivia")
+    assert second.is_playing_trivia("alice")
+    second.handle_socket_message("alice", "next")
+    assert len(first.trivia_games["alice"].asked_questions) == 2
+
+    first.remember_exchange("alice", "hi", "Hello!")
+    assert second.format_conversation_history("alice") == "\nPrevious message: Hello!\n"
+    second.handle_socket_message("alice", "end trivia")
+    assert not first.is_playing_trivia("alice")
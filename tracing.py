@@ -0,0 +1,246 @@
+import contextvars
+import functools
+import inspect
+import json
+import logging
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from logging_setup import start_native_thread
+
+logger = logging.getLogger(__name__)
+
+# Traces are always exported when slower than this or failed; otherwise only a sample is kept
+TRACE_SLOW_SECONDS = float(os.environ.get('TRACE_SLOW_SECONDS', 5))
+TRACE_SAMPLE_RATE = float(os.environ.get('TRACE_SAMPLE_RATE', 0.01))
+TRACE_FILE = os.environ.get('TRACE_FILE', 'traces.jsonl')
+TRACE_OTLP_ENDPOINT = os.environ.get('TRACE_OTLP_ENDPOINT')
+SERVICE_NAME = os.environ.get('SERVICE_NAME', 'octant-bot')
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class Span:
+    __slots__ = ('name', 'trace_id', 'span_id', 'parent_id', 'attributes', 'error',
+                 'start_time', 'duration', '_started', '_spans')
+
+    def __init__(self, name, parent=None, attributes=None):
+        self.name = name
+        self.span_id = secrets.token_hex(8)
+        self.attributes = dict(attributes or {})
+        self.error = None
+        self.start_time = time.time()
+        self.duration = None
+        self._started = time.perf_counter()
+        if parent is None:
+            self.trace_id = secrets.token_hex(16)
+            self.parent_id = None
+            # The root span collects every finished span of its trace
+            self._spans = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self._spans = parent._spans
+
+    @property
+    def is_root(self):
+        return self.parent_id is None
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_error(self, error):
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        self.duration = time.perf_counter() - self._started
+        self._spans.append(self)
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'start': self.start_time,
+            'duration_ms': round(self.duration * 1000, 2),
+            'attributes': self.attributes,
+            'error': self.error
+        }
+
+
+@contextmanager
+def _activate(span):
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.record_error(e)
+        raise
+    finally:
+        _current_span.reset(token)
+        span.end()
+        if span.is_root:
+            _finish_trace(span)
+
+
+def start_trace(name, **attributes):
+    """Start a new trace at a transport entry point, ignoring any span already active."""
+    return _activate(Span(name, None, attributes))
+
+
+def span(name, **attributes):
+    """Time one stage as a child of the current span, or as a new trace if there is none."""
+    return _activate(Span(name, _current_span.get(), attributes))
+
+
+def traced(name):
+    """Decorator that runs a function (sync or async) inside a span."""
+    def decorator(function):
+        if inspect.iscoroutinefunction(function):
+            @functools.wraps(function)
+            async def async_wrapper(*args, **kwargs):
+                with span(name):
+                    return await function(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def current_span():
+    return _current_span.get()
+
+
+def current_trace_id():
+    active = _current_span.get()
+    return active.trace_id if active else None
+
+
+class TraceContextFilter(logging.Filter):
+    """Attach the active trace id to log records so logs and traces can be joined."""
+
+    def filter(self, record):
+        trace_id = current_trace_id()
+        if trace_id:
+            record.trace_id = trace_id
+        return True
+
+
+def _finish_trace(root):
+    failed = any(s.error for s in root._spans)
+    slow = root.duration >= TRACE_SLOW_SECONDS
+    if not (slow or failed or random.random() < TRACE_SAMPLE_RATE):
+        return
+    if slow:
+        stages = ', '.join(f"{s.name} {s.duration:.2f}s" for s in root._spans if s is not root)
+        logger.warning(f"Slow request {root.name} took {root.duration:.2f}s (trace {root.trace_id}): {stages}")
+    get_exporter().export(root)
+
+
+class TraceExporter:
+    """Writes finished traces from a background thread, to a JSONL file or an OTLP/HTTP collector."""
+
+    def __init__(self, path=TRACE_FILE, otlp_endpoint=TRACE_OTLP_ENDPOINT, batch_size=50, flush_interval=2.0):
+        self.path = path
+        self.otlp_endpoint = otlp_endpoint
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+        self._pid = None
+
+    def export(self, root):
+        if self._pid != os.getpid():
+            self._start()
+        self._queue.put(root)
+
+    def _start(self):
+        self._pid = os.getpid()
+        self._thread = start_native_thread(self._run, "trace-exporter")
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            try:
+                if self.otlp_endpoint:
+                    self._post_otlp(batch)
+                else:
+                    self._write_jsonl(batch)
+            except Exception as e:
+                logger.warning(f"Failed to export {len(batch)} traces: {e}")
+
+    def _write_jsonl(self, batch):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            for root in batch:
+                f.write(json.dumps({
+                    'trace_id': root.trace_id,
+                    'name': root.name,
+                    'duration_ms': round(root.duration * 1000, 2),
+                    'spans': [s.to_dict() for s in root._spans]
+                }, separators=(',', ':'), default=str) + '\n')
+
+    def _post_otlp(self, batch):
+        spans = [_otlp_span(s) for root in batch for s in root._spans]
+        body = {'resourceSpans': [{
+            'resource': {'attributes': [_otlp_attribute('service.name', SERVICE_NAME)]},
+            'scopeSpans': [{'scope': {'name': 'octant.tracing'}, 'spans': spans}]
+        }]}
+        response = requests.post(self.otlp_endpoint, json=body, timeout=5)
+        response.raise_for_status()
+
+
+def _otlp_attribute(key, value):
+    if isinstance(value, bool):
+        typed = {'boolValue': value}
+    elif isinstance(value, int):
+        typed = {'intValue': str(value)}
+    elif isinstance(value, float):
+        typed = {'doubleValue': value}
+    else:
+        typed = {'stringValue': str(value)}
+    return {'key': key, 'value': typed}
+
+
+def _otlp_span(span):
+    start = int(span.start_time * 1e9)
+    otlp = {
+        'traceId': span.trace_id,
+        'spanId': span.span_id,
+        'name': span.name,
+        'kind': 2 if span.is_root else 1,  # SERVER for entry points, INTERNAL otherwise
+        'startTimeUnixNano': str(start),
+        'endTimeUnixNano': str(start + int(span.duration * 1e9)),
+        'attributes': [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+        'status': {'code': 2, 'message': span.error} if span.error else {'code': 1}
+    }
+    if span.parent_id:
+        otlp['parentSpanId'] = span.parent_id
+    return otlp
+
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+
+def get_exporter():
+    global _exporter
+    if _exporter is None:
+        with _exporter_lock:
+            if _exporter is None:
+                _exporter = TraceExporter()
+    return _exporter